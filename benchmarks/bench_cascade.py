@@ -0,0 +1,223 @@
+"""
+Replay the fixture corpus through JobDiscoverySpider, offline.
+
+    python benchmarks/bench_cascade.py [-n REPEAT] [-f NAME ...] [--report out.json] [--compare base.json]
+
+Every fixture goes through the callback it was recorded with (parse, parse_ats,
+parse_job_page). Results are grouped by the branch that produced them
+("parse/next_data", "parse_job_page/json-ld", "parse_ats/greenhouse", ...) and
+reported as throughput, latency percentiles and peak memory, plus the items and
+follow-up requests each fixture produced.
+
+--report writes all of it as sorted, indented JSON, so two reports diff cleanly.
+--compare prints the timing change per branch and every fixture whose output
+changed against an earlier report.
+"""
+import argparse
+import asyncio
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import scrapy
+from scrapy import Request
+from scrapy.utils.test import get_crawler
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from corpus import FIXTURES, load_fixtures  # noqa: E402
+from jobscraper.spiders.job_discovery_spider import JobDiscoverySpider  # noqa: E402
+
+SETTINGS = {
+    # Nothing is read from or written to the files of a real crawl
+    "RENDER_MEMORY_FILE": None,
+    "JSON_PATHS_FILE": None,
+    "API_ENDPOINTS_FILE": None,
+    "SITEMAP_MEMORY_FILE": None,
+    "HOST_HEALTH_FILE": None,
+    "CRAWL_STATE_FILE": None,
+    "OFFLOAD_MODE": None,
+    "LOG_ENABLED": False,
+}
+
+
+def make_spider():
+    crawler = get_crawler(JobDiscoverySpider, SETTINGS)
+    spider = JobDiscoverySpider.from_crawler(crawler)
+    crawler.spider = spider
+    return spider
+
+
+async def run_callback(spider, fixture):
+    result = getattr(spider, fixture.callback)(fixture.response(spider))
+    if hasattr(result, "__aiter__"):
+        return [r async for r in result]
+    return list(result or ())
+
+
+def describe(result):
+    if isinstance(result, Request):
+        return {
+            "request": result.url,
+            "callback": getattr(result.callback, "__name__", None),
+            "playwright": bool(result.meta.get("playwright")),
+            "job": result.meta.get("job"),
+        }
+    return {"item": dict(result)}
+
+
+def branch(fixture, results):
+    if fixture.callback == "parse_ats":
+        return f"parse_ats/{fixture.meta.get('ats')}"
+    for result in results:
+        if isinstance(result, Request):
+            if result.meta.get("playwright"):
+                return f"{fixture.callback}/render"
+            job = result.meta.get("job") or {}
+        else:
+            job = result
+        if job.get("resolved_via"):
+            return f"{fixture.callback}/{job['resolved_via']}"
+    return f"{fixture.callback}/none"
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+
+async def replay(fixtures, repeat):
+    """
+    Per fixture: latencies (seconds, one per round), peak memory and the described output.
+    A new spider per round - per-domain memories (e.g. JSON paths) are warm after the first fixture pass.
+    """
+    runs = {f.name: {"latencies": []} for f in fixtures}
+    for _ in range(repeat):
+        spider = make_spider()
+        for fixture in fixtures:
+            start = time.perf_counter()
+            results = await run_callback(spider, fixture)
+            runs[fixture.name]["latencies"].append(time.perf_counter() - start)
+            runs[fixture.name]["output"] = [describe(r) for r in results]
+            runs[fixture.name]["branch"] = branch(fixture, results)
+    # Memory in its own pass - tracing slows everything down
+    spider = make_spider()
+    for fixture in fixtures:
+        tracemalloc.start()
+        await run_callback(spider, fixture)
+        runs[fixture.name]["peak_kb"] = tracemalloc.get_traced_memory()[1] / 1024
+        tracemalloc.stop()
+    return runs
+
+
+def build_report(fixtures, runs, repeat):
+    by_branch = {}
+    report_fixtures = {}
+    for fixture in fixtures:
+        run = runs[fixture.name]
+        latencies = run["latencies"]
+        report_fixtures[fixture.name] = {
+            "branch": run["branch"],
+            "bytes": len(fixture.body),
+            "p50_ms": round(statistics.median(latencies) * 1000, 3),
+            "peak_kb": round(run["peak_kb"], 1),
+            "items": sum(1 for o in run["output"] if "item" in o),
+            "requests": sum(1 for o in run["output"] if "request" in o),
+            "output": run["output"],
+        }
+        group = by_branch.setdefault(run["branch"], {"fixtures": 0, "bytes": 0, "latencies": [], "peak_kb": 0, "outputs": 0})
+        group["fixtures"] += 1
+        group["bytes"] += len(fixture.body)
+        group["latencies"] += latencies
+        group["peak_kb"] = max(group["peak_kb"], run["peak_kb"])
+        group["outputs"] += len(run["output"])
+
+    branches = {}
+    for name, group in by_branch.items():
+        latencies = group["latencies"]
+        total = sum(latencies)
+        branches[name] = {
+            "fixtures": group["fixtures"],
+            "outputs": group["outputs"],
+            "pages_per_s": round(len(latencies) / total, 1) if total else None,
+            "mb_per_s": round(group["bytes"] * repeat / total / 1e6, 2) if total else None,
+            "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+            "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+            "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+            "max_ms": round(max(latencies) * 1000, 3),
+            "peak_kb": round(group["peak_kb"], 1),
+        }
+    return {
+        "environment": {
+            "python": platform.python_version(),
+            "scrapy": scrapy.__version__,
+            "machine": platform.machine(),
+            "repeat": repeat,
+        },
+        "branches": branches,
+        "fixtures": report_fixtures,
+    }
+
+
+def print_report(report):
+    print(f"{'branch':<32} {'pages':>5} {'out':>5} {'pages/s':>9} {'MB/s':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'peak KB':>9}")
+    for name, b in sorted(report["branches"].items()):
+        print(f"{name:<32} {b['fixtures']:>5} {b['outputs']:>5} {b['pages_per_s']:>9} {b['mb_per_s']:>7} "
+              f"{b['p50_ms']:>8} {b['p95_ms']:>8} {b['p99_ms']:>8} {b['peak_kb']:>9}")
+
+
+def print_comparison(base, report):
+    print(f"\nvs {base['environment']}")
+    for name, b in sorted(report["branches"].items()):
+        old = base["branches"].get(name)
+        if not old:
+            print(f"  {name}: new branch")
+            continue
+        change = (b["p50_ms"] - old["p50_ms"]) / old["p50_ms"] * 100 if old["p50_ms"] else 0
+        print(f"  {name}: p50 {old['p50_ms']} -> {b['p50_ms']} ms ({change:+.1f}%), "
+              f"peak {old['peak_kb']} -> {b['peak_kb']} KB")
+    for name in sorted(set(base["branches"]) - set(report["branches"])):
+        print(f"  {name}: no longer used")
+    changed = []
+    for name, fixture in sorted(report["fixtures"].items()):
+        old = base["fixtures"].get(name)
+        if old is None:
+            continue
+        if old["branch"] != fixture["branch"] or old["output"] != fixture["output"]:
+            changed.append(f"  {name}: {old['branch']} ({old['items']} items, {old['requests']} requests) -> "
+                           f"{fixture['branch']} ({fixture['items']} items, {fixture['requests']} requests)")
+    print(f"\n{len(changed)} fixture(s) with different output" + (":" if changed else ""))
+    for line in changed:
+        print(line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay recorded pages through the spider and time the extraction cascade.")
+    parser.add_argument("-n", "--repeat", type=int, default=20)
+    parser.add_argument("-d", "--fixtures", default=str(FIXTURES), help="fixture directory")
+    parser.add_argument("-f", dest="names", action="append", help="only this fixture (repeatable)")
+    parser.add_argument("--report", help="write the full report as JSON")
+    parser.add_argument("--compare", help="earlier report to compare against")
+    args = parser.parse_args(argv)
+
+    fixtures = load_fixtures(args.fixtures, args.names)
+    if not fixtures:
+        parser.error(f"no fixtures in {args.fixtures}")
+    runs = asyncio.run(replay(fixtures, args.repeat))
+    report = build_report(fixtures, runs, args.repeat)
+    print_report(report)
+    if args.report:
+        with open(args.report, "w", encoding="utf8") as f:
+            json.dump(report, f, indent=2, sort_keys=True, ensure_ascii=False, default=str)
+            f.write("\n")
+    if args.compare:
+        with open(args.compare, "r", encoding="utf8") as f:
+            print_comparison(json.load(f), report)
+
+
+if __name__ == "__main__":
+    main()
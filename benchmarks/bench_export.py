@@ -0,0 +1,143 @@
+"""
+Size and load time of the compact corpus (jobscraper.export) against plain JSON Lines,
+what the feed export writes, for several runs over the same postings.
+
+    python benchmarks/bench_export.py [--companies 300] [--jobs 10] [--runs 5] [--codecs gzip,zstd,parquet]
+
+Each run sees every posting again (with a few new ones), like a daily crawl. Descriptions
+are made of words from the fixture pages, ~3 KB each. Codecs whose library is not
+installed are skipped.
+"""
+import argparse
+import json
+import os
+import random
+import re
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from jobscraper.export import Corpus, CorpusWriter  # noqa: E402
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+
+
+def vocabulary():
+    text = " ".join(p.read_text("utf8") for p in FIXTURES.glob("*.html"))
+    words = re.findall(r"[A-Za-z]{3,12}", re.sub(r"<[^>]+>", " ", text))
+    return sorted(set(words))
+
+
+def runs(companies, jobs, count, seed=0):
+    """
+    Items of each run, with scraped_at set - a list per run.
+    """
+    rng = random.Random(seed)
+    words = vocabulary()
+
+    def posting(company, n):
+        return {
+            "company": company,
+            "title": f"{rng.choice(['Senior', 'Staff', 'Lead', ''])} DevOps Engineer {n}".strip(),
+            "href": f"https://{company.lower()}.example.com/jobs/{n}",
+            "source_url": f"https://{company.lower()}.example.com/careers",
+            "resolved_via": rng.choice(["html_extract", "next_data", "js", "json-ld"]),
+            "description": " ".join(rng.choice(words) for _ in range(450)),
+        }
+
+    postings = [posting(f"Company{c}", n) for c in range(companies) for n in range(jobs)]
+    result = []
+    for day in range(count):
+        # A few postings are new every run
+        postings += [posting(f"Company{rng.randrange(companies)}", jobs + day * 1000 + n) for n in range(len(postings) // 20)]
+        stamp = f"2026-01-{day + 1:02d}T06:00:00Z"
+        result.append([{**p, "scraped_at": stamp} for p in postings])
+    return result
+
+
+def size(path):
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return sum(f.stat().st_size for f in Path(path).iterdir())
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def write_plain(path, batches):
+    with open(path, "w", encoding="utf8") as f:
+        for items in batches:
+            for item in items:
+                f.write(json.dumps(item, ensure_ascii=False) + "\n")
+
+
+def read_plain(path, company=None):
+    with open(path, encoding="utf8") as f:
+        items = (json.loads(line) for line in f)
+        return [i for i in items if company is None or i["company"] == company]
+
+
+def write_corpus(directory, batches, fmt, codec):
+    for items in batches:
+        # One writer per run, as in a crawl
+        writer = CorpusWriter(directory, fmt=fmt, codec=codec)
+        for item in items:
+            writer.write(item)
+        writer.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--companies", type=int, default=300)
+    parser.add_argument("--jobs", type=int, default=10)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--codecs", default="gzip,zstd,parquet")
+    args = parser.parse_args()
+
+    batches = runs(args.companies, args.jobs, args.runs)
+    total = sum(map(len, batches))
+    company = "Company7"
+    work = tempfile.mkdtemp(prefix="bench-export-")
+    print(f"{total} items over {args.runs} runs")
+    print(f"{'output':<14}{'MB':>9}{'write s':>10}{'load all s':>12}{'no desc s':>11}{'by company s':>14}{'items':>8}")
+
+    plain = os.path.join(work, "items.jsonl")
+    write_time, _ = timed(lambda: write_plain(plain, batches))
+    load_time, loaded = timed(lambda: read_plain(plain))
+    query_time, found = timed(lambda: read_plain(plain, company))
+    # Plain JSON Lines can't be read without the descriptions
+    print(f"{'jsonl':<14}{size(plain) / 1e6:>9.1f}{write_time:>10.2f}{load_time:>12.2f}{load_time:>11.2f}{query_time:>14.3f}{len(found):>8}")
+    expected = sorted((i["company"], i["href"], i["scraped_at"], i["description"]) for i in loaded)
+
+    failed = False
+    for codec in args.codecs.split(","):
+        fmt = "parquet" if codec == "parquet" else "jsonl"
+        directory = os.path.join(work, codec)
+        try:
+            write_time, _ = timed(lambda: write_corpus(directory, batches, fmt, codec))
+        except ValueError as e:
+            print(f"{codec:<14}skipped: {e}")
+            continue
+        corpus = Corpus(directory)
+        load_time, loaded = timed(lambda: list(corpus.items(descriptions=True)))
+        bare_time, _ = timed(lambda: list(Corpus(directory).items()))
+        query_time, found_corpus = timed(lambda: list(Corpus(directory).items(company=company)))
+        got = sorted((i["company"], i["href"], i["scraped_at"], i["description"]) for i in loaded)
+        if got != expected or len(found_corpus) != len(found):
+            failed = True
+            print(f"MISMATCH for {codec}")
+        print(f"{codec:<14}{size(directory) / 1e6:>9.1f}{write_time:>10.2f}{load_time:>12.2f}{bare_time:>11.2f}"
+              f"{query_time:>14.3f}{len(found_corpus):>8}")
+    shutil.rmtree(work, ignore_errors=True)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+"""
+Compare html_extract against the old per-element XPath version over the saved fixture pages.
+
+    python benchmarks/bench_html_extract.py [-n REPEAT]
+
+Both versions must produce the same candidates: one per href, with the title
+html_extract keeps when nested containers point at the same link.
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+from scrapy import Request
+from scrapy.http import HtmlResponse
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from jobscraper.dedup import better_title  # noqa: E402
+from jobscraper.spiders.job_discovery_spider import JobDiscoverySpider  # noqa: E402
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+
+
+def legacy_html_extract(spider, response, job):
+    for el in response.css("a[href], button, div, li, span, tr, td, h1, h2, h3, h4, h5, h6"):
+        text = spider.parse_text(el.xpath("normalize-space(.)").get())
+        if not text:
+            continue
+        href = spider.parse_href(response, el.xpath(
+            ".//@href | "
+            "./ancestor::a/@href | "
+            "./preceding-sibling::a[1]/@href | "
+            "../following-sibling::a[1]/@href"
+        ).get())
+        if not href:
+            continue
+        job['title'] = text
+        job['href'] = href
+        job['resolved_via'] = 'html_extract'
+        yield response.follow(href, callback=spider.parse_job_page, meta={"job": dict(job)})
+
+
+def candidates(results):
+    # Follow-up requests of the legacy version, job page candidates of html_extract
+    titles = {}
+    for result in results:
+        url, title = (result.url, result.meta["job"]["title"]) if isinstance(result, Request) else (result["resolve_url"], result["title"])
+        titles[url] = better_title(titles.get(url), title)
+    return list(titles.items())
+
+
+def load(path):
+    url = f"https://www.example.com/{path.stem.replace('_', '-')}"
+    # A fresh response each time, so neither version benefits from a cached selector
+    return lambda: HtmlResponse(url, body=path.read_bytes(), encoding="utf-8")
+
+
+def measure(fn, make_response, repeat):
+    timings = []
+    for _ in range(repeat):
+        response = make_response()
+        start = time.perf_counter()
+        result = list(fn(response, {"company": "fixture"}))
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", "--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    spider = JobDiscoverySpider()
+    failed = False
+    print(f"{'fixture':<32}{'legacy ms':>12}{'scan ms':>12}{'speedup':>10}{'found':>8}")
+    for path in sorted(FIXTURES.glob("*.html")):
+        make_response = load(path)
+        legacy_time, legacy = measure(lambda r, j: legacy_html_extract(spider, r, j), make_response, args.repeat)
+        scan_time, scanned = measure(spider.html_extract, make_response, args.repeat)
+        expected, got = candidates(legacy), candidates(scanned)
+        if expected != got:
+            failed = True
+            print(f"MISMATCH in {path.name}:\n  legacy: {expected}\n  scan:   {got}")
+        print(f"{path.name:<32}{legacy_time * 1000:>12.2f}{scan_time * 1000:>12.2f}{legacy_time / scan_time:>9.1f}x{len(got):>8}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
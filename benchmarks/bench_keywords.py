@@ -0,0 +1,131 @@
+"""
+Compare the keyword automaton (jobscraper.keywords) against the alternation regexes it
+replaced, with the built-in keywords and with 10x / 100x as many.
+
+    python benchmarks/bench_keywords.py [-n REPEAT] [--scales 1,10,100]
+
+The strings are what the spider classifies: the candidate texts of the fixture pages
+(job_title, per element) and their visible text (the generic check of parse).
+Both must agree on every string.
+"""
+import argparse
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+from parsel import Selector
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from jobscraper.dom import scan_job_links  # noqa: E402
+from jobscraper.keywords import DEFAULT_KEYWORDS, KeywordMatcher  # noqa: E402
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+
+TECH = [
+    "backend", "frontend", "fullstack", "data", "ml", "ai", "cloud", "platform", "security", "network",
+    "embedded", "firmware", "mobile", "ios", "android", "qa", "test", "automation", "infrastructure", "site",
+    "python", "java", "golang", "rust", "c++", "react", "node", "kubernetes", "database", "storage",
+    "systems", "release", "build", "performance", "reliability", "analytics", "bi", "computer vision", "nlp",
+    "hardware", "rf", "fpga", "asic", "validation", "integration", "solutions", "support", "game", "graphics",
+]
+ROLES = ["engineer", "developer", "architect", "team lead", "researcher", "scientist", "analyst", "specialist"]
+
+
+def scaled_keywords(scale, seed=0):
+    """
+    DEFAULT_KEYWORDS with about `scale` times as many keywords in each kind - real-looking role
+    families first, then made-up words so every scale gets distinct keywords.
+    """
+    rng = random.Random(seed)
+
+    def word():
+        return "".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(5, 10)))
+
+    config = {
+        "roles": {family: list(keywords) for family, keywords in DEFAULT_KEYWORDS["roles"].items()},
+        "generic": list(DEFAULT_KEYWORDS["generic"]),
+        "noise": list(DEFAULT_KEYWORDS["noise"]),
+    }
+    roles = sum(len(k) for k in config["roles"].values())
+    phrases = [f"{tech} {role}" for tech in TECH for role in ROLES]
+    for i in range(roles * (scale - 1)):
+        keyword = phrases[i] if i < len(phrases) else f"{word()} {rng.choice(ROLES)}"
+        config["roles"].setdefault(keyword.split()[0], []).append(keyword)
+    for kind in ("generic", "noise"):
+        config[kind] += [word() for _ in range(len(config[kind]) * (scale - 1))]
+    return config
+
+
+def regexes(config):
+    """
+    The keywords as the spider used to have them: one alternation regex per kind.
+    """
+    def alternation(keywords, bounded):
+        words = ["\\s+".join(re.escape(w) for w in k.lower().split()) for k in keywords]
+        if bounded:
+            return re.compile(r"\b(?:" + "|".join(words) + r")\b", re.IGNORECASE)
+        return re.compile("(?:" + "|".join(words) + ")", re.IGNORECASE)
+
+    roles = [k for keywords in config["roles"].values() for k in keywords]
+    return alternation(roles, True), alternation(config["generic"], False), alternation(config["noise"], False)
+
+
+def corpus():
+    titles, pages = [], []
+    for path in sorted(FIXTURES.glob("*.html")):
+        selector = Selector(text=path.read_text("utf8"), type="html")
+        titles += [text for text, _ in scan_job_links(selector.root, lambda t: t)]
+        pages.append(" ".join(selector.xpath("//a//text() | //h2//text() | //h3//text() | //li//text()").getall()))
+    return titles, pages
+
+
+def measure(fn, strings, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = [fn(s) for s in strings]
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", "--repeat", type=int, default=5)
+    parser.add_argument("--scales", default="1,10,100")
+    args = parser.parse_args()
+
+    titles, pages = corpus()
+    failed = False
+    print(f"{len(titles)} titles, {len(pages)} pages ({sum(map(len, pages)) / 1024:.0f} KB of visible text)")
+    print(f"{'scale':>6}{'keywords':>10}{'build ms':>10}{'check':>9}{'regex ms':>11}{'automaton ms':>14}{'speedup':>9}")
+    for scale in (int(s) for s in args.scales.split(",")):
+        config = scaled_keywords(scale)
+        count = sum(len(k) for k in config["roles"].values()) + len(config["generic"]) + len(config["noise"])
+        start = time.perf_counter()
+        matcher = KeywordMatcher.from_config(config)
+        build = time.perf_counter() - start
+        role, generic, noise = regexes(config)
+        checks = [
+            # job_title: the title of a job we want (per candidate element)
+            ("title", titles, lambda t: bool(role.search(t)) and not noise.search(t), lambda t: bool(matcher.job_role(t))),
+            # parse: does the page look like a careers page at all
+            ("generic", pages, lambda t: bool(generic.search(t)), matcher.has_generic),
+        ]
+        for name, strings, legacy, new in checks:
+            legacy_time, expected = measure(legacy, strings, args.repeat)
+            new_time, got = measure(new, strings, args.repeat)
+            if expected != got:
+                failed = True
+                diff = [s for s, a, b in zip(strings, expected, got) if a != b][:5]
+                print(f"MISMATCH at scale {scale} ({name}): {diff}")
+            print(f"{scale:>6}{count:>10}{build * 1000:>10.1f}{name:>9}{legacy_time * 1000:>11.2f}"
+                  f"{new_time * 1000:>14.2f}{legacy_time / new_time:>8.1f}x")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
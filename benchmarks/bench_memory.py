@@ -0,0 +1,124 @@
+"""
+Peak memory of the queues a big crawl fills: the start requests waiting in the scheduler,
+and the job page candidates waiting for Phase B - plain dicts in Scrapy's scheduler and a
+deque, against JobRecords in SpillingScheduler and SpillQueue.
+
+    python benchmarks/bench_memory.py [--boards 1000,10000,30000] [--jobs 10] [--limit 5000]
+
+Boards are made-up careers pages; each has --jobs job page candidates.
+"""
+import argparse
+import gc
+import sys
+import time
+import tracemalloc
+from collections import deque
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import scrapy  # noqa: E402
+from scrapy.core.scheduler import Scheduler  # noqa: E402
+from scrapy.utils.test import get_crawler  # noqa: E402
+
+from jobscraper.items import JobRecord, job_page_candidate  # noqa: E402
+from jobscraper.scheduler import SpillingScheduler, SpillQueue  # noqa: E402
+
+
+class Spider(scrapy.Spider):
+    name = "bench"
+
+    def parse(self, response):
+        pass
+
+
+def boards(count):
+    return [(f"Company{n}", f"https://careers.company{n}.example.com/jobs") for n in range(count)]
+
+
+def start_requests(spider, count, record):
+    for company, url in boards(count):
+        job = JobRecord(company=company, source_url=url) if record else {"company": company, "source_url": url}
+        yield scrapy.Request(url, callback=spider.parse, meta={"job": job})
+
+
+def candidates(count, jobs, record):
+    for company, url in boards(count):
+        for n in range(jobs):
+            href = f"{url}/{n}"
+            job = {"company": company, "source_url": url}
+            if record:
+                yield job_page_candidate(JobRecord(job), href, title=f"DevOps Engineer {n}", href=href, resolved_via="js")
+            else:
+                yield dict(job, title=f"DevOps Engineer {n}", href=href, resolved_via="js", resolve_url=href)
+
+
+def measure(fn):
+    """
+    (peak traced bytes, seconds) of fn().
+    """
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak, elapsed
+
+
+def scheduler_run(cls, count, limit, record):
+    # DownloaderAwarePriorityQueue needs a running engine; both sides get the plain one
+    settings = {
+        "SCHEDULER_MEMORY_LIMIT": limit,
+        "SCHEDULER_PRIORITY_QUEUE": "scrapy.pqueues.ScrapyPriorityQueue",
+        "LOG_ENABLED": False,
+    }
+    crawler = get_crawler(Spider, settings)
+    crawler.spider = spider = Spider.from_crawler(crawler)
+    scheduler = cls.from_crawler(crawler)
+    scheduler.open(spider)
+    for request in start_requests(spider, count, record):
+        scheduler.enqueue_request(request)
+    drained = 0
+    while scheduler.next_request() is not None:
+        drained += 1
+    scheduler.close("finished")
+    assert drained == count, (drained, count)
+
+
+def queue_run(count, jobs, limit, record):
+    queue = SpillQueue(limit) if record else deque()
+    for candidate in candidates(count, jobs, record):
+        queue.append(candidate)
+    drained = 0
+    while queue:
+        queue.popleft()
+        drained += 1
+    if record:
+        queue.close()
+    assert drained == count * jobs, (drained, count * jobs)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--boards", default="1000,10000,30000")
+    parser.add_argument("--jobs", type=int, default=10)
+    parser.add_argument("--limit", type=int, default=5000)
+    args = parser.parse_args()
+
+    print(f"{'':32} {'boards':>7} {'peak MB':>9} {'seconds':>8}")
+    for count in (int(n) for n in args.boards.split(",")):
+        rows = (
+            ("Scheduler, dict meta", lambda: scheduler_run(Scheduler, count, 0, False)),
+            ("SpillingScheduler, JobRecord", lambda: scheduler_run(SpillingScheduler, count, args.limit, True)),
+            (f"deque of dicts (x{args.jobs})", lambda: queue_run(count, args.jobs, 0, False)),
+            (f"SpillQueue of JobRecords (x{args.jobs})", lambda: queue_run(count, args.jobs, args.limit, True)),
+        )
+        for label, fn in rows:
+            peak, elapsed = measure(fn)
+            print(f"{label:32} {count:>7} {peak / 2**20:>9.1f} {elapsed:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Time and peak memory of reading the job postings out of a big gzipped sitemap:
+jobscraper.sitemap.sitemap_links (decompressed and parsed a chunk at a time) against
+gunzip + Scrapy's Sitemap (the whole document, then the whole tree) with the same filter.
+
+    python benchmarks/bench_sitemap.py [--urls 10000,50000] [--jobs-every 50]
+
+Sitemaps are made up: one URL in --jobs-every is a DevOps/SRE posting under /careers/.
+"""
+import argparse
+import gc
+import gzip
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from scrapy.utils.gz import gunzip  # noqa: E402
+from scrapy.utils.sitemap import Sitemap  # noqa: E402
+
+from jobscraper.keywords import load_keywords  # noqa: E402
+from jobscraper.sitemap import job_link, sitemap_links  # noqa: E402
+
+ROLES = ["senior-devops-engineer", "sre", "mlops-engineer", "frontend-developer"]
+
+
+def sitemap(urls, jobs_every):
+    entries = []
+    for n in range(urls):
+        if n % jobs_every:
+            path = f"/products/item-{n}/overview"
+        else:
+            path = f"/careers/{ROLES[n // jobs_every % len(ROLES)]}-{n}"
+        entries.append(f"<url><loc>https://example.com{path}</loc><lastmod>2026-01-01</lastmod></url>")
+    body = '<?xml version="1.0" encoding="UTF-8"?><urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+    return gzip.compress((body + "".join(entries) + "</urlset>").encode())
+
+
+def scrapy_links(body, keywords):
+    jobs = []
+    for entry in Sitemap(gunzip(body)):
+        title = job_link(entry.get("loc"), None, keywords)
+        if title:
+            jobs.append((title, entry["loc"]))
+    return jobs
+
+
+def measure(fn):
+    """
+    (result, peak traced bytes, seconds) of fn() - timed on a run of its own, tracemalloc slows it down.
+    """
+    gc.collect()
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, peak, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--urls", default="10000,50000")
+    parser.add_argument("--jobs-every", type=int, default=50)
+    args = parser.parse_args()
+    keywords = load_keywords()
+
+    print(f"{'':24} {'urls':>7} {'gz KB':>7} {'jobs':>6} {'peak MB':>9} {'ms':>8}")
+    for urls in (int(n) for n in args.urls.split(",")):
+        body = sitemap(urls, args.jobs_every)
+        rows = (
+            ("gunzip + Sitemap", lambda: scrapy_links(body, keywords)),
+            ("sitemap_links", lambda: sitemap_links(body, keywords)[0]),
+        )
+        results = []
+        for label, fn in rows:
+            jobs, peak, elapsed = measure(fn)
+            results.append(jobs)
+            print(f"{label:24} {urls:>7} {len(body) // 1024:>7} {len(jobs):>6} {peak / 2**20:>9.1f} {elapsed * 1000:>8.1f}")
+        assert results[0] == results[1]
+
+
+if __name__ == "__main__":
+    main()
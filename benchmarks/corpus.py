@@ -0,0 +1,88 @@
+"""
+The fixture corpus: recorded responses, each stored as its body (<name>.html / .json / ...)
+next to <name>.meta.json with the url, status, headers, the spider callback that
+handled it and the request meta it needs (job, ats, ...).
+"""
+import json
+import mimetypes
+import re
+from pathlib import Path
+
+from scrapy import Request
+from scrapy.http import Headers
+from scrapy.responsetypes import responsetypes
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+
+# Request meta worth recording - the rest is Scrapy/Playwright internals
+RECORDED_META = ("job", "ats", "ats_posting", "is_playwright")
+
+
+class Fixture:
+    def __init__(self, name, body_path, url, status, headers, callback, meta, method="GET"):
+        self.name = name
+        self.body_path = body_path
+        self.url = url
+        self.status = status
+        self.headers = headers
+        self.callback = callback
+        self.meta = meta
+        self.method = method
+        self.body = body_path.read_bytes()
+
+    def response(self, spider):
+        """
+        A fresh response for this fixture, with the request the spider would have made.
+        """
+        request = Request(self.url, method=self.method, callback=getattr(spider, self.callback),
+                          meta=json.loads(json.dumps(self.meta)), dont_filter=True)
+        headers = Headers(self.headers)
+        cls = responsetypes.from_args(headers=headers, url=self.url, body=self.body)
+        return cls(self.url, status=self.status, headers=headers, body=self.body, request=request)
+
+
+def load_fixtures(directory=FIXTURES, names=None):
+    fixtures = []
+    for meta_path in sorted(Path(directory).glob("*.meta.json")):
+        name = meta_path.name[:-len(".meta.json")]
+        if names and name not in names:
+            continue
+        bodies = [p for p in meta_path.parent.glob(f"{name}.*") if not p.name.endswith(".meta.json")]
+        if not bodies:
+            continue
+        with open(meta_path, "r", encoding="utf8") as f:
+            info = json.load(f)
+        fixtures.append(Fixture(
+            name, bodies[0], info["url"], info.get("status", 200), info.get("headers", {}),
+            info["callback"], info.get("meta", {}), info.get("method", "GET"),
+        ))
+    return fixtures
+
+
+def slug(text):
+    return re.sub(r"[^a-z0-9]+", "_", (text or "").lower()).strip("_")[:40] or "page"
+
+
+def save_fixture(directory, name, response, callback, meta):
+    """
+    Write one response to the corpus. Returns the body path.
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    content_type = response.headers.get("Content-Type", b"text/html").decode("latin1")
+    extension = mimetypes.guess_extension(content_type.split(";")[0].strip()) or ".html"
+    body_path = directory / f"{name}{extension}"
+    body_path.write_bytes(response.body)
+    info = {
+        "url": response.url,
+        "status": response.status,
+        "headers": {"Content-Type": content_type},
+        "callback": callback,
+        "meta": {k: meta[k] for k in RECORDED_META if k in meta},
+    }
+    if response.request is not None and response.request.method != "GET":
+        info["method"] = response.request.method
+    with open(directory / f"{name}.meta.json", "w", encoding="utf8") as f:
+        json.dump(info, f, indent=2, sort_keys=True, default=str)
+        f.write("\n")
+    return body_path
@@ -0,0 +1,70 @@
+"""
+Record live responses into the benchmark corpus.
+
+    python benchmarks/record.py -i jobs.json -a company=Acme [--limit 3] [-o benchmarks/fixtures]
+
+Runs the job_discovery crawl as usual and saves every response that reaches a
+spider callback (listing, ATS board and posting pages, browser renders too) with
+the request meta needed to replay it offline (see bench_cascade.py).
+"""
+import argparse
+import os
+import sys
+from collections import Counter
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from corpus import FIXTURES, save_fixture, slug  # noqa: E402
+
+
+class Recorder:
+    def __init__(self, directory, limit):
+        self.directory = directory
+        self.limit = limit
+        self.counts = Counter()
+        self.saved = 0
+
+    def response_received(self, response, request, spider):
+        callback = getattr(request.callback, "__name__", None) or "parse"
+        if not hasattr(spider, callback) or not hasattr(response, "text"):
+            return
+        job = request.meta.get("job") or {}
+        key = (job.get("company"), callback)
+        if self.limit and self.counts[key] >= self.limit:
+            return
+        self.counts[key] += 1
+        name = f"{slug(job.get('company'))}_{callback}_{self.counts[key]}"
+        save_fixture(self.directory, name, response, callback, request.meta)
+        self.saved += 1
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Record responses of a crawl as benchmark fixtures.")
+    parser.add_argument("-i", "--input", default="jobs.json", help="companies file")
+    parser.add_argument("-o", "--output", default=str(FIXTURES), help="fixture directory")
+    parser.add_argument("-a", dest="spider_args", action="append", default=[], metavar="NAME=VALUE",
+                        help="spider argument (company=..., domain=...)")
+    parser.add_argument("--limit", type=int, default=3, help="responses per company and callback (0 = all)")
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault("SCRAPY_SETTINGS_MODULE", "jobscraper.settings")
+    from scrapy import signals
+    from scrapy.crawler import CrawlerProcess
+    from scrapy.utils.project import get_project_settings
+
+    settings = get_project_settings()
+    # Record everything, not just what changed since the last run
+    settings.set("CRAWL_STATE_FILE", None, priority="cmdline")
+    process = CrawlerProcess(settings)
+    crawler = process.create_crawler("job_discovery")
+    recorder = Recorder(args.output, args.limit)
+    crawler.signals.connect(recorder.response_received, signal=signals.response_received)
+    process.crawl(crawler, urls_file=os.path.abspath(args.input),
+                  **dict(a.split("=", 1) for a in args.spider_args))
+    process.start()
+    print(f"Recorded {recorder.saved} responses to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,329 @@
+import html
+import json
+from urllib.parse import parse_qsl, urlencode, urlparse
+
+import scrapy
+from scrapy.http import JsonRequest
+from w3lib.html import remove_tags
+
+from jobscraper.items import JobRecord, job_page_candidate
+
+
+class AtsExtractor:
+    """
+    Base class for boards hosted on a known ATS (applicant tracking system).
+
+    Instead of scraping the careers page, an extractor asks the vendor for its
+    structured listing (one request per board) and yields finished jobs.
+    Anything it does not recognize goes back to the generic `parse` cascade.
+    """
+    name = None
+    hosts = ()
+
+    def matches(self, url):
+        host = (urlparse(url).hostname or "").lower()
+        return any(host == h or host.endswith("." + h) for h in self.hosts)
+
+    def board_request(self, url, job, spider):
+        """
+        Request for the structured listing of the board behind `url`, or None if
+        the url does not look like a board of this ATS - the default: the careers
+        page then goes through the generic cascade.
+        """
+        return None
+
+    def parse_board(self, response, spider):
+        """
+        Yield jobs/requests from the listing response.
+        Return None (instead of a generator) when the payload is not usable - the
+        default, which sends the board back to the generic cascade.
+        """
+        return None
+
+    def parse_posting(self, response, spider):
+        return []
+
+    def make_request(self, url, job, spider, **kwargs):
+        meta = kwargs.pop("meta", {})
+        meta.update({"job": job, "ats": self.name})
+        request_cls = kwargs.pop("request_cls", scrapy.Request)
+        return request_cls(
+            url,
+            callback=spider.parse_ats,
+            errback=spider.ats_failed,
+            meta=meta,
+            **kwargs,
+        )
+
+    def make_job(self, job, title, href, description, spider):
+        job = dict(job)
+        job["title"] = title
+        job["href"] = href
+        job["description"] = spider.clean_description(remove_tags(html.unescape(description))) if description else None
+        job["resolved_via"] = self.name
+        return job
+
+    def path_parts(self, url):
+        return [p for p in urlparse(url).path.split("/") if p]
+
+    def load_json(self, response):
+        try:
+            return json.loads(response.text)
+        except (ValueError, AttributeError):
+            return None
+
+
+class ComeetExtractor(AtsExtractor):
+    """
+    Comeet boards embed the full position list in COMPANY_POSITIONS_DATA,
+    so the careers page itself is the listing.
+    """
+    name = "comeet"
+    hosts = ("comeet.com", "comeet.co")
+
+    def board_request(self, url, job, spider):
+        return self.make_request(url, job, spider)
+
+    def parse_board(self, response, spider):
+        script_text = spider.js_var_extract(response, "COMPANY_POSITIONS_DATA")
+        if not script_text:
+            return None
+        try:
+            positions = json.loads(script_text)
+        except json.JSONDecodeError:
+            return None
+        return self._positions(response, positions, spider)
+
+    def _positions(self, response, positions, spider):
+        job = response.meta["job"]
+        for pos in positions:
+            title = pos.get("name") or ""
+            if not spider.role_family(title):
+                continue
+            # The Comeet position page is the posting's href either way, so dedup and the crawl state see one key
+            page = pos.get("url_active_page") or pos.get("position_url")
+            if not page:
+                continue
+            href = response.urljoin(page)
+            details = (pos.get("custom_fields") or {}).get("details") or []
+            description = "\n\n".join(d.get("value") for d in details if d.get("value"))
+            if description:
+                yield self.make_job(job, title, href, description, spider)
+            else:
+                # Description is not in the listing - fall back to the position page
+                yield job_page_candidate(job, href, title=title, href=href, resolved_via="js")
+
+
+class GreenhouseExtractor(AtsExtractor):
+    name = "greenhouse"
+    hosts = ("greenhouse.io",)
+    api_url = "https://boards-api.greenhouse.io/v1/boards/{board}/jobs?content=true"
+
+    def board_request(self, url, job, spider):
+        parts = self.path_parts(url)
+        board = dict(parse_qsl(urlparse(url).query)).get("for")
+        if not board and parts and parts[0] != "embed":
+            board = parts[0]
+        if not board:
+            return None
+        return self.make_request(self.api_url.format(board=board), job, spider)
+
+    def parse_board(self, response, spider):
+        data = self.load_json(response)
+        if not isinstance(data, dict) or "jobs" not in data:
+            return None
+        job = response.meta["job"]
+        return (
+            self.make_job(job, pos.get("title"), pos.get("absolute_url"), pos.get("content"), spider)
+            for pos in data["jobs"]
+            if spider.role_family(pos.get("title") or "")
+        )
+
+
+class LeverExtractor(AtsExtractor):
+    name = "lever"
+    hosts = ("lever.co",)
+    api_url = "https://api.lever.co/v0/postings/{company}?{query}"
+
+    def board_request(self, url, job, spider):
+        parts = self.path_parts(url)
+        if not parts:
+            return None
+        # Keep board filters like ?location=Israel, the API understands the same ones
+        query = dict(parse_qsl(urlparse(url).query))
+        query["mode"] = "json"
+        return self.make_request(self.api_url.format(company=parts[0], query=urlencode(query)), job, spider)
+
+    def parse_board(self, response, spider):
+        data = self.load_json(response)
+        if not isinstance(data, list):
+            return None
+        job = response.meta["job"]
+        return (
+            self.make_job(job, pos.get("text"), pos.get("hostedUrl"), self._description(pos), spider)
+            for pos in data
+            if spider.role_family(pos.get("text") or "")
+        )
+
+    def _description(self, pos):
+        sections = [pos.get("description") or pos.get("descriptionPlain") or ""]
+        for item in pos.get("lists") or []:
+            sections.append(f"{item.get('text', '')}\n{item.get('content', '')}")
+        sections.append(pos.get("additional") or pos.get("additionalPlain") or "")
+        return "\n\n".join(s for s in sections if s)
+
+
+class AshbyExtractor(AtsExtractor):
+    name = "ashby"
+    hosts = ("ashbyhq.com",)
+    api_url = "https://api.ashbyhq.com/posting-api/job-board/{org}"
+
+    def board_request(self, url, job, spider):
+        parts = self.path_parts(url)
+        if not parts:
+            return None
+        return self.make_request(self.api_url.format(org=parts[0]), job, spider)
+
+    def parse_board(self, response, spider):
+        data = self.load_json(response)
+        if not isinstance(data, dict) or "jobs" not in data:
+            return None
+        job = response.meta["job"]
+        return (
+            self.make_job(job, pos.get("title"), pos.get("jobUrl"), pos.get("descriptionHtml") or pos.get("descriptionPlain"), spider)
+            for pos in data["jobs"]
+            if spider.role_family(pos.get("title") or "")
+        )
+
+
+class WorkableExtractor(AtsExtractor):
+    name = "workable"
+    hosts = ("workable.com",)
+    api_url = "https://apply.workable.com/api/v1/widget/accounts/{account}?details=true"
+
+    def board_request(self, url, job, spider):
+        parts = self.path_parts(url)
+        if not parts:
+            return None
+        return self.make_request(self.api_url.format(account=parts[0]), job, spider)
+
+    def parse_board(self, response, spider):
+        data = self.load_json(response)
+        if not isinstance(data, dict) or "jobs" not in data:
+            return None
+        job = response.meta["job"]
+        return (
+            self.make_job(job, pos.get("title"), pos.get("url") or pos.get("shortlink"), pos.get("description"), spider)
+            for pos in data["jobs"]
+            if spider.role_family(pos.get("title") or "")
+        )
+
+
+class WorkdayExtractor(AtsExtractor):
+    """
+    Workday's listing API is paged (20 per page) and has no descriptions,
+    so only the matching postings get a follow-up request.
+    """
+    name = "workday"
+    hosts = ("myworkdayjobs.com", "myworkdaysite.com")
+    page_size = 20
+
+    def _board(self, url):
+        parsed = urlparse(url)
+        parts = self.path_parts(url)
+        # Drop the locale prefix ("en-US")
+        if parts and len(parts[0]) == 5 and parts[0][2] == "-":
+            parts = parts[1:]
+        if parsed.hostname.endswith("myworkdaysite.com"):
+            # wd5.myworkdaysite.com/recruiting/<tenant>/<site>
+            if len(parts) < 3 or parts[0] != "recruiting":
+                return None
+            tenant, site = parts[1], parts[2]
+        else:
+            # <tenant>.wd1.myworkdayjobs.com/<site>
+            if not parts:
+                return None
+            tenant, site = parsed.hostname.split(".")[0], parts[0]
+        facets = {}
+        for key, value in parse_qsl(parsed.query):
+            if key != "source":
+                facets.setdefault(key, []).append(value)
+        return {
+            "api": f"https://{parsed.hostname}/wday/cxs/{tenant}/{site}",
+            "site": f"https://{parsed.hostname}/{site}",
+            "facets": facets,
+        }
+
+    def board_request(self, url, job, spider):
+        board = self._board(url)
+        if not board:
+            return None
+        return self._page_request(board, 0, job, spider)
+
+    def _page_request(self, board, offset, job, spider):
+        return self.make_request(
+            f"{board['api']}/jobs",
+            job,
+            spider,
+            request_cls=JsonRequest,
+            data={"appliedFacets": board["facets"], "limit": self.page_size, "offset": offset, "searchText": ""},
+            meta={"workday_board": board, "workday_offset": offset},
+            dont_filter=True,
+        )
+
+    def parse_board(self, response, spider):
+        data = self.load_json(response)
+        if not isinstance(data, dict) or "jobPostings" not in data:
+            return None
+        return self._postings(response, data, spider)
+
+    def _postings(self, response, data, spider):
+        job = response.meta["job"]
+        board = response.meta["workday_board"]
+        offset = response.meta["workday_offset"]
+        # Workday only reports the total on the first page
+        total = response.meta.get("workday_total") or data.get("total") or 0
+        for pos in data["jobPostings"]:
+            title = pos.get("title") or ""
+            if not pos.get("externalPath") or not spider.role_family(title):
+                continue
+            yield self.make_request(
+                board["api"] + pos["externalPath"],
+                JobRecord(job, title=title, href=board["site"] + pos["externalPath"]),
+                spider,
+                meta={"ats_posting": True},
+                headers={"Accept": "application/json"},
+            )
+        next_offset = offset + self.page_size
+        if data["jobPostings"] and next_offset < total:
+            request = self._page_request(board, next_offset, job, spider)
+            request.meta["workday_total"] = total
+            yield request
+
+    def parse_posting(self, response, spider):
+        job = response.meta["job"]
+        data = self.load_json(response)
+        info = data.get("jobPostingInfo") if isinstance(data, dict) else None
+        if not isinstance(info, dict):
+            info = {}
+        return [self.make_job(job, info.get("title") or job["title"], info.get("externalUrl") or job["href"], info.get("jobDescription"), spider)]
+
+
+ATS_EXTRACTORS = {
+    extractor.name: extractor
+    for extractor in (
+        ComeetExtractor(),
+        GreenhouseExtractor(),
+        LeverExtractor(),
+        AshbyExtractor(),
+        WorkableExtractor(),
+        WorkdayExtractor(),
+    )
+}
+
+
+def get_extractor(url):
+    for extractor in ATS_EXTRACTORS.values():
+        if extractor.matches(url):
+            return extractor
+    return None
@@ -0,0 +1,133 @@
+import csv
+import json
+import zlib
+
+from jobscraper.memory import domain_of, registered_domain
+
+CHUNK_SIZE = 64 * 1024
+
+
+def iter_json_array(f, chunk_size=CHUNK_SIZE):
+    """
+    Yield the elements of a top-level JSON array one by one, reading the file in chunks.
+    """
+    decoder = json.JSONDecoder()
+    buf = ""
+    pos = 0
+    eof = False
+    started = False
+
+    def more():
+        nonlocal buf, pos, eof
+        chunk = f.read(chunk_size)
+        if not chunk:
+            eof = True
+        buf = buf[pos:] + chunk
+        pos = 0
+
+    while True:
+        # Skip whitespace and separators up to the next value
+        while True:
+            while pos < len(buf) and buf[pos] in " \t\r\n,":
+                pos += 1
+            if pos < len(buf) or eof:
+                break
+            more()
+        if pos >= len(buf):
+            raise ValueError("Unexpected end of JSON array")
+        if not started:
+            if buf[pos] != "[":
+                raise ValueError("Expected a JSON array of companies")
+            started = True
+            pos += 1
+            continue
+        if buf[pos] == "]":
+            return
+        try:
+            value, end = decoder.raw_decode(buf, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            # The value is cut by the chunk boundary
+            more()
+            continue
+        # What follows, by index - slicing the rest of buf for every value is quadratic
+        following = end
+        while following < len(buf) and buf[following] in " \t\r\n":
+            following += 1
+        if not eof and (following >= len(buf) or buf[following] not in ",]"):
+            # Only complete once we see what follows (a number like "2.5" could go on as "2.5e3")
+            more()
+            continue
+        pos = end
+        yield value
+
+
+def iter_json_lines(f):
+    for line in f:
+        line = line.strip()
+        if line:
+            yield json.loads(line)
+
+
+def iter_records(path):
+    """
+    Company records from a JSON array, JSON Lines (.jsonl/.ndjson) or CSV file, read lazily.
+    """
+    with open(path, "r", encoding="utf8", newline="") as f:
+        if path.endswith((".jsonl", ".ndjson")):
+            yield from iter_json_lines(f)
+        elif path.endswith(".csv"):
+            yield from csv.DictReader(f)
+        else:
+            yield from iter_json_array(f)
+
+
+def shard_of(url, count):
+    # Stable across processes (unlike hash()), and by registered domain so one site
+    # (and all its subdomains) stays in one shard - per-domain politeness still holds
+    return zlib.crc32(registered_domain(url).encode("utf8")) % count
+
+
+def parse_shard(shard):
+    """
+    "i/n" -> (i, n)
+    """
+    index, count = (int(x) for x in shard.split("/"))
+    if not 0 <= index < count:
+        raise ValueError(f"Invalid shard {shard!r}, expected i/n with 0 <= i < n")
+    return index, count
+
+
+class CompanySource:
+    """
+    Iterable over the companies of a urls file, read on demand.
+
+    shard:   "i/n" - only companies whose registered domain falls in shard i of n.
+    company: comma separated company names to keep.
+    domain:  comma separated domains to keep (subdomains match too).
+    """
+
+    def __init__(self, path, shard=None, company=None, domain=None):
+        self.path = path
+        self.shard = parse_shard(shard) if shard else None
+        self.company = {c.strip().lower() for c in company.split(",")} if company else None
+        self.domain = {domain_of(f"//{d.strip()}") for d in domain.split(",")} if domain else None
+
+    def __iter__(self):
+        for record in iter_records(self.path):
+            url = record.get("Careers URL")
+            if not url:
+                continue
+            if self.accepts(record.get("Company"), url):
+                yield record
+
+    def accepts(self, company, url):
+        if self.company is not None and (company or "").strip().lower() not in self.company:
+            return False
+        host = domain_of(url)
+        if self.domain is not None and not any(host == d or host.endswith("." + d) for d in self.domain):
+            return False
+        if self.shard is not None and shard_of(url, self.shard[1]) != self.shard[0]:
+            return False
+        return True
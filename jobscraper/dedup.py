@@ -0,0 +1,99 @@
+import weakref
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from jobscraper.items import is_candidate
+
+# Query parameters that only say where the visitor came from
+TRACKING_PARAMS = {
+    "gclid", "fbclid", "msclkid", "mc_cid", "mc_eid", "_hsenc", "_hsmi",
+    "ref", "referrer", "source", "src", "gh_src", "coref", "lever-source", "lever-origin",
+}
+TRACKING_PREFIXES = ("utm_",)
+
+
+def canonical_href(url):
+    """
+    Key for "is this the same posting": no fragment, no tracking parameters,
+    sorted query, lowercased host and no trailing slash.
+    """
+    parts = urlsplit(url)
+    query = sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if k.lower() not in TRACKING_PARAMS and not k.lower().startswith(TRACKING_PREFIXES)
+    )
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, urlencode(query), ""))
+
+
+def better_title(current, candidate):
+    """
+    Nested containers around one link give the same title plus surrounding noise
+    (location, "Apply", ...) - the shortest one is the cleanest.
+    """
+    if not current:
+        return candidate
+    if candidate and len(candidate) < len(current):
+        return candidate
+    return current
+
+
+class CandidateDeduper:
+    """
+    Per-company filter for job page candidates (see jobscraper.items.job_page_candidate).
+
+    Candidates of one callback are merged by canonical job page URL (keeping the best
+    title) and anything a company already had - from another extraction path, the
+    browser retry, etc. - is dropped.
+
+    Only the keys are kept for the whole crawl. A kept candidate can still get a better
+    title from a later duplicate while it waits for Phase B - after that, it is gone.
+    """
+
+    def __init__(self, stats=None):
+        self.stats = stats
+        # (company, canonical href) of every candidate that was kept
+        self.seen = set()
+        # Same keys -> the kept candidates that are still waiting somewhere (in memory)
+        self.waiting = weakref.WeakValueDictionary()
+        self.followups = 0
+        self.saved = 0
+
+    def dedupe(self, results):
+        """
+        Pass items and requests through, merge candidates.
+        """
+        pending = {}
+        for result in results:
+            if not is_candidate(result):
+                yield result
+                continue
+            key = (result.get("company"), canonical_href(result["resolve_url"]))
+            kept = pending.get(key)
+            if kept is None and key not in self.seen:
+                pending[key] = result
+                continue
+            if kept is None:
+                kept = self.waiting.get(key)
+            if kept is not None:
+                # The kept candidate becomes the job page request's meta - while it waits
+                # in the resolution queue or for download, the better title still makes it in
+                kept["title"] = better_title(kept.get("title"), result.get("title"))
+            self._count_saved(result)
+
+        for key, candidate in pending.items():
+            self.seen.add(key)
+            try:
+                self.waiting[key] = candidate
+            except TypeError:
+                # A plain dict can't be weakly referenced - it just won't get a better title later
+                pass
+            self.followups += 1
+            if self.stats:
+                self.stats.inc_value("dedup/followups")
+            yield candidate
+
+    def _count_saved(self, job):
+        self.saved += 1
+        if self.stats:
+            self.stats.inc_value("dedup/followups_saved")
+            self.stats.inc_value(f"dedup/followups_saved/{job.get('resolved_via')}")
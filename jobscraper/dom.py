@@ -0,0 +1,140 @@
+import re
+
+# Elements html_extract looks at (same set as the old CSS selector)
+CANDIDATE_TAGS = {"button", "div", "li", "span", "tr", "td", "h1", "h2", "h3", "h4", "h5", "h6"}
+
+# normalize-space() only treats these as whitespace
+XPATH_WHITESPACE = re.compile(r"[ \t\r\n]+")
+
+
+def job_title(text, keywords):
+    """
+    `text` if it looks like the title of a job we want, else None.
+    `keywords` is a jobscraper.keywords.KeywordMatcher.
+    """
+    if not text:
+        return None
+    # Heuristic filters (cheap + deterministic)
+    if len(text) < 5 or len(text) > 80:
+        return None
+    if not keywords.job_role(text):
+        return None
+    return text
+
+
+def _href(el):
+    # None means "no href attribute" - an empty href is still an href
+    return el.attrib.get("href") if "href" in el.attrib else None
+
+
+def scan_job_links(root, accept_text, max_len=80):
+    """
+    Walk the lxml tree once and yield (text, href) for every candidate element, in document order.
+
+    Gives the same result as running, for each `a[href], button, div, li, span, tr, td, h1-h6`:
+        normalize-space(.)
+        .//@href | ./ancestor::a/@href | ./preceding-sibling::a[1]/@href | ../following-sibling::a[1]/@href
+    but without serializing every subtree again for each of its ancestors.
+    Text is built bottom-up and dropped as soon as it is longer than `max_len`,
+    and `accept_text` is only called once per distinct text.
+    """
+    accepted = {}
+    candidates = []
+    order = 0
+    stack = [_frame(root, None, None, None, None, order)]
+    while stack:
+        frame = stack[-1]
+        el, children, i = frame[0], frame[1], frame[2]
+        if i < len(children):
+            frame[2] = i + 1
+            child = children[i]
+            if not isinstance(child.tag, str):
+                # Comments/processing instructions are not text, but their tail is
+                frame[3].append(child.tail or "")
+                continue
+            prev_a, next_a = frame[11][i]
+            ancestor = frame[6]
+            if ancestor is None and el.tag == "a":
+                ancestor = _href(el)
+            order += 1
+            stack.append(_frame(child, ancestor, prev_a, frame[9], next_a, order))
+            continue
+
+        stack.pop()
+        text = None
+        if not frame[4]:
+            raw = "".join(frame[3])
+            if len(raw) > max_len and _too_long(raw, max_len):
+                # Too long however its whitespace collapses (a <script>, a whole section) - no regex over it
+                text = None
+            else:
+                # Collapsed but not stripped, so it can be glued into the parent's text as is
+                collapsed = XPATH_WHITESPACE.sub(" ", raw)
+                text = collapsed.strip()
+                if len(text) > max_len:
+                    text = None
+        if stack:
+            parent = stack[-1]
+            if text is None:
+                parent[4] = True
+            else:
+                parent[3].append(collapsed)
+                parent[3].append(el.tail or "")
+            if parent[5] is None:
+                parent[5] = frame[5]
+
+        tag = el.tag
+        if text is None or not (tag in CANDIDATE_TAGS or (tag == "a" and "href" in el.attrib)):
+            continue
+        if text not in accepted:
+            accepted[text] = accept_text(text)
+        if not accepted[text]:
+            continue
+        # First match in document order: ancestor <a>, preceding <a>, own/descendant href, <a> after the parent
+        for href in (frame[6], frame[7], frame[5], frame[8]):
+            if href is not None:
+                candidates.append((frame[10], accepted[text], href))
+                break
+    candidates.sort(key=lambda c: c[0])
+    for _, text, href in candidates:
+        yield text, href
+
+
+def _too_long(text, max_len):
+    # Counts the characters normalize-space() keeps for sure - str.count is much cheaper than the
+    # regex, and a prefix is usually enough to tell
+    for piece in (text[:4 * max_len], text):
+        visible = len(piece) - piece.count(" ") - piece.count("\t") - piece.count("\r") - piece.count("\n")
+        if visible > max_len:
+            return True
+        if len(piece) == len(text):
+            break
+    return False
+
+
+def _frame(el, ancestor_href, prev_a_href, parent_next_a_href, next_a_href, order):
+    children = list(el)
+    # element, its children, next child index, text pieces, text too long,
+    # first href in subtree, ancestor <a> href, preceding sibling <a> href,
+    # parent's following sibling <a> href, href of our own following sibling <a>,
+    # document order, (preceding, following) <a> href per child
+    return [el, children, 0, [el.text or ""], False, _href(el), ancestor_href, prev_a_href,
+            parent_next_a_href, next_a_href, order, _sibling_a_hrefs(children)]
+
+
+def _sibling_a_hrefs(children):
+    """
+    For each child: href of the nearest <a> sibling before it and after it.
+    """
+    result = [[None, None] for _ in children]
+    last = None
+    for i, child in enumerate(children):
+        result[i][0] = last
+        if child.tag == "a":
+            last = _href(child)
+    last = None
+    for i in range(len(children) - 1, -1, -1):
+        result[i][1] = last
+        if children[i].tag == "a":
+            last = _href(children[i])
+    return result
@@ -0,0 +1,306 @@
+import functools
+import gzip
+import io
+import json
+import os
+from datetime import date, datetime, timezone
+
+from jobscraper.state import content_hash
+
+# Item columns of Parquet parts (JSON Lines parts keep whatever keys an item has)
+ITEM_COLUMNS = ("company", "title", "href", "source_url", "resolved_via", "change", "description_hash", "scraped_at")
+
+EXTENSIONS = {"gzip": ".jsonl.gz", "zstd": ".jsonl.zst", "parquet": ".parquet"}
+
+MANIFEST = "manifest.jsonl"
+
+
+def description_hash(text):
+    return content_hash(text)[:16]
+
+
+def _codec(fmt, codec):
+    if fmt == "parquet":
+        return "parquet"
+    if fmt != "jsonl":
+        raise ValueError(f"Unknown EXPORT_FORMAT {fmt!r}, expected 'jsonl' or 'parquet'")
+    if codec not in ("gzip", "zstd"):
+        raise ValueError(f"Unknown EXPORT_CODEC {codec!r}, expected 'gzip' or 'zstd'")
+    return codec
+
+
+def _check_installed(codec):
+    # Fail when the crawl starts, not at its first batch of items
+    try:
+        if codec == "zstd":
+            import zstandard  # noqa: F401
+        elif codec == "parquet":
+            import pyarrow.parquet  # noqa: F401
+    except ImportError as e:
+        raise ValueError(f"Exporting {codec} needs {'zstandard' if codec == 'zstd' else 'pyarrow'} installed") from e
+
+
+class _JsonLinesPart:
+    def __init__(self, path, codec, level):
+        self.file = open(path, "wb")
+        if codec == "zstd":
+            import zstandard
+
+            self.stream = zstandard.ZstdCompressor(level=level or 3).stream_writer(self.file)
+        else:
+            self.stream = gzip.GzipFile(fileobj=self.file, mode="wb", compresslevel=level or 6)
+
+    def write(self, rows):
+        self.stream.write("".join(json.dumps(row, ensure_ascii=False, separators=(",", ":")) + "\n" for row in rows).encode("utf8"))
+
+    def close(self):
+        self.stream.close()
+        if not self.file.closed:
+            self.file.close()
+
+
+class _ParquetPart:
+    def __init__(self, path, columns):
+        import pyarrow
+        import pyarrow.parquet
+
+        self.pyarrow = pyarrow
+        self.schema = pyarrow.schema([(c, pyarrow.string()) for c in columns])
+        self.writer = pyarrow.parquet.ParquetWriter(path, self.schema, compression="zstd")
+
+    def write(self, rows):
+        columns = {name: [row.get(name) for row in rows] for name in self.schema.names}
+        self.writer.write_table(self.pyarrow.table(columns, schema=self.schema))
+
+    def close(self):
+        self.writer.close()
+
+
+class CorpusWriter:
+    """
+    Appends items to a corpus directory that every run adds to.
+
+    Items go to items-<run>-<n> parts, with the description replaced by its hash
+    (description_hash) and a scraped_at time. Each description is written once, to the
+    descriptions-<run>-<n> part of the items that first had it, so a posting seen on
+    every run costs a line, not its description again. Rows are written in batches of
+    `batch_size`; after `rotate_items` items both parts are closed and new ones started.
+    A part is only listed in manifest.jsonl (and visible to Corpus) once it is closed.
+    """
+
+    def __init__(self, directory, fmt="jsonl", codec="gzip", level=None, batch_size=500, rotate_items=50000):
+        self.directory = directory
+        self.codec = _codec(fmt, codec)
+        _check_installed(self.codec)
+        self.level = level
+        self.batch_size = max(1, batch_size)
+        self.rotate_items = rotate_items
+        os.makedirs(directory, exist_ok=True)
+        # Descriptions earlier runs already stored
+        self.known = set()
+        for entry in read_manifest(directory):
+            if entry["kind"] == "descriptions":
+                self.known.update(entry["hashes"])
+        self.run = f"{datetime.now(timezone.utc):%Y%m%dT%H%M%S}-{os.getpid()}"
+        self.sequence = 1
+        # kind -> (file name, open part), opened on the first row of that kind
+        self.parts = {}
+        self._reset()
+
+    def _reset(self):
+        self.items = []
+        self.descriptions = []
+        self.part_items = 0
+        self.part_companies = set()
+        self.part_hashes = []
+        self.part_first = self.part_last = None
+
+    def write(self, item):
+        """
+        Adds one item (a dict). Returns the description hash (None if it has no description).
+        """
+        row = dict(item)
+        description = row.pop("description", None)
+        digest = None
+        if description:
+            digest = description_hash(description)
+            if digest not in self.known:
+                self.known.add(digest)
+                self.descriptions.append({"hash": digest, "text": description})
+                self.part_hashes.append(digest)
+        row["description_hash"] = digest
+        row.setdefault("scraped_at", f"{datetime.now(timezone.utc):%Y-%m-%dT%H:%M:%SZ}")
+        self.items.append(row)
+        self.part_items += 1
+        self.part_companies.add(row.get("company"))
+        if self.part_first is None or row["scraped_at"] < self.part_first:
+            self.part_first = row["scraped_at"]
+        if self.part_last is None or row["scraped_at"] > self.part_last:
+            self.part_last = row["scraped_at"]
+        if len(self.items) >= self.batch_size:
+            self.flush()
+        if self.rotate_items and self.part_items >= self.rotate_items:
+            self.rotate()
+        return digest
+
+    def flush(self):
+        for kind, rows in (("descriptions", self.descriptions), ("items", self.items)):
+            if rows:
+                if kind not in self.parts:
+                    self.parts[kind] = self._open(kind)
+                self.parts[kind][1].write(rows)
+        self.items = []
+        self.descriptions = []
+
+    def rotate(self):
+        self.flush()
+        if not self.parts:
+            return
+        for _, part in self.parts.values():
+            part.close()
+        # Descriptions first: an items part is never listed without the descriptions it refers to
+        entries = []
+        if "descriptions" in self.parts:
+            entries.append({
+                "file": self.parts["descriptions"][0],
+                "kind": "descriptions",
+                "count": len(self.part_hashes),
+                "hashes": self.part_hashes,
+            })
+        entries.append({
+            "file": self.parts["items"][0],
+            "kind": "items",
+            "count": self.part_items,
+            "companies": sorted(c for c in self.part_companies if c is not None),
+            "first": self.part_first,
+            "last": self.part_last,
+        })
+        with open(os.path.join(self.directory, MANIFEST), "a", encoding="utf8") as f:
+            f.write("".join(json.dumps(entry, ensure_ascii=False) + "\n" for entry in entries))
+        self.parts = {}
+        self.sequence += 1
+        self._reset()
+
+    def close(self):
+        self.rotate()
+
+    def _open(self, kind):
+        while True:
+            name = f"{kind}-{self.run}-{self.sequence:04d}{EXTENSIONS[self.codec]}"
+            path = os.path.join(self.directory, name)
+            if not os.path.exists(path):
+                break
+            # Another writer of the same second and process id (several crawls in one process)
+            self.sequence += 1
+        if self.codec == "parquet":
+            columns = ITEM_COLUMNS if kind == "items" else ("hash", "text")
+            return name, _ParquetPart(path, columns)
+        return name, _JsonLinesPart(path, self.codec, self.level)
+
+
+def read_manifest(directory):
+    path = os.path.join(directory, MANIFEST)
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _read_part(path, needle=None):
+    """
+    The rows of one part, streamed. JSON Lines rows without `needle` in their text are skipped unparsed.
+    """
+    if path.endswith(".parquet"):
+        import pyarrow.parquet
+
+        for batch in pyarrow.parquet.ParquetFile(path).iter_batches():
+            yield from batch.to_pylist()
+        return
+    with open(path, "rb") as raw:
+        if path.endswith(".zst"):
+            import zstandard
+
+            stream = zstandard.ZstdDecompressor().stream_reader(raw)
+        else:
+            stream = gzip.GzipFile(fileobj=raw, mode="rb")
+        for line in io.TextIOWrapper(stream, encoding="utf8"):
+            if line.strip() and (needle is None or needle in line):
+                yield json.loads(line)
+
+
+def _time_bound(value):
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, datetime):
+        return f"{value.astimezone(timezone.utc):%Y-%m-%dT%H:%M:%SZ}" if value.tzinfo else value.isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError(f"Expected a date, datetime or ISO string, got {value!r}")
+
+
+class Corpus:
+    """
+    Reads what CorpusWriter wrote.
+
+        corpus = Corpus("corpus")
+        for job in corpus.items(company="Acme", title="devops", since=date(2026, 1, 1)):
+            print(job["title"], corpus.description(job["description_hash"]))
+
+    The manifest says which companies and time range each part has, so parts that
+    can't match are never opened, and descriptions are only read when asked for.
+    Only the last `cached_parts` description parts read are kept in memory.
+    """
+
+    def __init__(self, directory, cached_parts=4):
+        self.directory = directory
+        self.manifest = read_manifest(directory)
+        self.description_parts = {}
+        for entry in self.manifest:
+            if entry["kind"] == "descriptions":
+                for digest in entry["hashes"]:
+                    self.description_parts.setdefault(digest, entry["file"])
+        self._load_part = functools.lru_cache(maxsize=cached_parts)(self._read_descriptions)
+
+    def items(self, company=None, title=None, since=None, before=None, descriptions=False):
+        """
+        Items of `company` (exact name), with `title` in their title (case-insensitive),
+        scraped at or after `since` and before `before` (dates, datetimes or ISO strings).
+        With descriptions=True each item gets its description back.
+        """
+        since, before = _time_bound(since), _time_bound(before)
+        title = title.lower() if title else None
+        for entry in self.manifest:
+            if entry["kind"] != "items" or not entry["count"]:
+                continue
+            if company is not None and company not in entry["companies"]:
+                continue
+            if since and entry["last"] < since or before and entry["first"] >= before:
+                continue
+            # Rows are written compact, so a company's rows all have this in them
+            needle = f'"company":{json.dumps(company, ensure_ascii=False)}' if company is not None else None
+            for item in _read_part(os.path.join(self.directory, entry["file"]), needle):
+                if company is not None and item.get("company") != company:
+                    continue
+                if title and title not in (item.get("title") or "").lower():
+                    continue
+                if since and item["scraped_at"] < since or before and item["scraped_at"] >= before:
+                    continue
+                if descriptions:
+                    item["description"] = self.description(item.get("description_hash"))
+                yield item
+
+    def companies(self):
+        return sorted({c for entry in self.manifest if entry["kind"] == "items" for c in entry["companies"]})
+
+    def description(self, digest):
+        """
+        The description with this hash (None if there is none). Reads its whole part, unless
+        that part is one of the last few read.
+        """
+        name = self.description_parts.get(digest)
+        if name is None:
+            return None
+        return self._load_part(name).get(digest)
+
+    def _read_descriptions(self, name):
+        return {row["hash"]: row["text"] for row in _read_part(os.path.join(self.directory, name))}
@@ -0,0 +1,153 @@
+# Define here your extensions
+#
+# See documentation in:
+# https://docs.scrapy.org/en/latest/topics/extensions.html
+
+import time
+
+from scrapy import signals
+from scrapy.exceptions import NotConfigured
+from twisted.internet import task
+from twisted.web.server import Site
+
+from jobscraper.metrics import MetricsResource, crawler_metrics
+
+
+class LoopLagMonitor:
+    """
+    How late the reactor runs a timer scheduled every LOOP_LAG_INTERVAL seconds.
+
+    Anything that blocks the reactor thread (parsing a huge page in a callback, ...)
+    delays every download and Playwright event by the same amount, and shows up here
+    as loop_lag/* stats (milliseconds).
+    """
+
+    def __init__(self, stats, interval):
+        self.stats = stats
+        self.interval = interval
+        self.samples = []
+        self.task = None
+        self.last = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        interval = crawler.settings.getfloat("LOOP_LAG_INTERVAL")
+        if not interval:
+            raise NotConfigured
+        ext = cls(crawler.stats, interval)
+        crawler.signals.connect(ext.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(ext.spider_closed, signal=signals.spider_closed)
+        return ext
+
+    def spider_opened(self, spider):
+        self.last = time.monotonic()
+        self.task = task.LoopingCall(self.tick)
+        self.task.start(self.interval, now=False)
+
+    def tick(self):
+        now = time.monotonic()
+        self.samples.append(max(0.0, now - self.last - self.interval))
+        self.last = now
+
+    def spider_closed(self, spider):
+        if self.task and self.task.running:
+            self.task.stop()
+        if not self.samples:
+            return
+        samples = sorted(self.samples)
+        self.stats.set_value("loop_lag/samples", len(samples))
+        self.stats.set_value("loop_lag/mean_ms", round(sum(samples) / len(samples) * 1000, 2))
+        for name, q in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99)):
+            self.stats.set_value(f"loop_lag/{name}_ms", round(samples[int(q * (len(samples) - 1))] * 1000, 2))
+        self.stats.set_value("loop_lag/max_ms", round(samples[-1] * 1000, 2))
+        self.stats.set_value("loop_lag/over_100ms", sum(1 for s in samples if s > 0.1))
+
+
+class MetricsExporter:
+    """
+    The reporting side of the instrumentation middlewares (see jobscraper.metrics).
+
+    Samples queue depths every METRICS_INTERVAL seconds (queue/*/max stats), serves
+    everything in the Prometheus text format on http://METRICS_HOST:METRICS_PORT/metrics
+    while the crawl runs (if METRICS_PORT is set), and writes the timing histograms
+    (timing/* stats) and the METRICS_TOP_DOMAINS slowest domains when the spider closes.
+    """
+
+    def __init__(self, crawler, interval, host, port, top_domains):
+        self.crawler = crawler
+        self.metrics = crawler_metrics(crawler)
+        self.interval = interval
+        self.host = host
+        self.port = port
+        self.top_domains = top_domains
+        self.task = None
+        self.listener = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        ext = cls(
+            crawler,
+            interval=settings.getfloat("METRICS_INTERVAL"),
+            host=settings.get("METRICS_HOST", "127.0.0.1"),
+            port=settings.getint("METRICS_PORT"),
+            top_domains=settings.getint("METRICS_TOP_DOMAINS", 20),
+        )
+        crawler.signals.connect(ext.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(ext.spider_closed, signal=signals.spider_closed)
+        return ext
+
+    def spider_opened(self, spider):
+        if self.interval:
+            self.task = task.LoopingCall(self.sample)
+            self.task.start(self.interval, now=False)
+        if self.port:
+            from twisted.internet import reactor
+
+            self.listener = reactor.listenTCP(self.port, Site(MetricsResource(self.metrics, self.crawler.stats)), interface=self.host)
+            spider.logger.info(f"Metrics on http://{self.host}:{self.port}/metrics")
+
+    def sample(self):
+        for queue, depth in queue_depths(self.crawler.engine).items():
+            self.metrics.set("queue_depth", depth, queue=queue)
+            self.crawler.stats.max_value(f"queue/{queue}/max", depth)
+
+    def spider_closed(self, spider):
+        if self.task and self.task.running:
+            self.task.stop()
+        if self.listener is not None:
+            self.listener.stopListening()
+        stats = self.crawler.stats
+        for (name, labels), histogram in self.metrics.histograms.items():
+            if not histogram.buckets or not histogram.count:
+                # Per-domain series only go to the endpoint and timing/slowest_domains
+                continue
+            key = "/".join(["timing", name.replace("_seconds", "")] + [str(v) for _, v in labels])
+            stats.set_value(f"{key}/count", histogram.count)
+            stats.set_value(f"{key}/total_ms", round(histogram.sum * 1000, 1))
+            stats.set_value(f"{key}/p50_ms", round(histogram.quantile(0.5) * 1000, 1))
+            stats.set_value(f"{key}/p95_ms", round(histogram.quantile(0.95) * 1000, 1))
+            stats.set_value(f"{key}/max_ms", round(histogram.max * 1000, 1))
+        if self.top_domains:
+            stats.set_value("timing/slowest_domains", self.metrics.slowest_domains(self.top_domains))
+
+
+def queue_depths(engine):
+    """
+    Requests in the scheduler, waiting for a download slot and downloading, and responses waiting for the spider.
+    """
+    slot = getattr(engine, "_slot", None) or getattr(engine, "slot", None)
+    scheduler = getattr(slot, "scheduler", None)
+    downloader = engine.downloader
+    scraper_slot = getattr(engine.scraper, "slot", None)
+    try:
+        scheduled = len(scheduler) if scheduler is not None else 0
+    except TypeError:
+        # Schedulers don't have to implement __len__
+        scheduled = 0
+    return {
+        "scheduler": scheduled,
+        "download_slots": sum(len(s.queue) for s in downloader.slots.values()),
+        "downloading": len(downloader.active),
+        "parsing": len(scraper_slot.queue) + len(scraper_slot.active) if scraper_slot else 0,
+    }
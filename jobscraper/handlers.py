@@ -0,0 +1,118 @@
+import asyncio
+import zlib
+from collections import Counter
+
+from scrapy_playwright.handler import ScrapyPlaywrightDownloadHandler
+
+from jobscraper.memory import domain_of
+from jobscraper.render import JsonCapture, ResourceBlocker
+
+
+class HybridDownloadHandler(ScrapyPlaywrightDownloadHandler):
+    """
+    Plain Scrapy HTTP download by default, browser only for requests with meta["playwright"].
+
+    The stock Playwright handler starts the Playwright driver as soon as the engine
+    starts, even if the crawl never renders a single page. Here the driver (and the
+    browser) are started on the first request that actually asks for rendering.
+
+    Renders share a pool of RENDER_CONTEXTS browser contexts (a site always gets the
+    same one), each replaced by a fresh one after RENDER_CONTEXT_MAX_PAGES pages so
+    the browser's memory doesn't keep growing. Unless PLAYWRIGHT_ABORT_REQUEST is set,
+    the browser skips RENDER_BLOCK_RESOURCE_TYPES and RENDER_BLOCK_HOSTS.
+
+    For requests with meta["render_capture_json"], the JSON the page fetched while
+    rendering ends up in meta["render_json"] (see render.JsonCapture).
+
+    This relies on private parts of ScrapyPlaywrightDownloadHandler, checked against the
+    scrapy-playwright versions pyproject.toml allows (0.0.46 - 0.0.48): _engine_started and
+    _maybe_launch_in_thread (connected to engine_started, launch the driver), _launch(),
+    _download_request(request, spider) (one browser download) and _create_page(request,
+    spider) (opens the page, before navigation), and the abort_request, context_wrappers
+    and stats attributes. Check them again before raising the upper bound.
+    """
+
+    def __init__(self, crawler):
+        super().__init__(crawler)
+        self.playwright_launched = False
+        self.playwright_launch_lock = asyncio.Lock()
+        settings = crawler.settings
+        if self.abort_request is None:
+            self.abort_request = ResourceBlocker(
+                settings.getlist("RENDER_BLOCK_RESOURCE_TYPES"), settings.getlist("RENDER_BLOCK_HOSTS"), self.stats
+            )
+        self.pool_size = settings.getint("RENDER_CONTEXTS")
+        self.recycle_after = settings.getint("RENDER_CONTEXT_MAX_PAGES")
+        # Current context of each pool slot is "render-<slot>.<generation>"
+        self.generations = [0] * self.pool_size
+        self.context_slots = {}
+        self.context_pages = Counter()
+        self.in_flight = Counter()
+        self.capture_max_bytes = settings.getint("RENDER_CAPTURE_MAX_BYTES")
+        self.capture_max_responses = settings.getint("RENDER_CAPTURE_MAX_RESPONSES")
+        self.captures = {}
+
+    # Both of these are connected to engine_started by the parent handler
+    # (which one depends on the Scrapy version) - launching is deferred instead.
+    def _engine_started(self):
+        return None
+
+    async def _maybe_launch_in_thread(self):
+        return None
+
+    async def _download_request(self, request, spider=None):
+        if not self.playwright_launched:
+            async with self.playwright_launch_lock:
+                if not self.playwright_launched:
+                    await self._launch()
+                    self.playwright_launched = True
+        self.stats.inc_value("hybrid/playwright_requests")
+        name = request.meta.get("playwright_context")
+        if self.pool_size and (name is None or name.startswith("render-")):
+            # Retries of a request get the slot's current context, not one that was retired
+            name = request.meta["playwright_context"] = self._pool_context(request)
+        self.in_flight[name] += 1
+        try:
+            response = await super()._download_request(request, spider)
+            capture = self.captures.pop(id(request), None)
+            if capture is not None:
+                await capture.wait()
+                self.stats.inc_value("render/json_captured", len(capture.captured))
+            return response
+        finally:
+            self.captures.pop(id(request), None)
+            self.in_flight[name] -= 1
+            self.context_pages[name] += 1
+            if name in self.context_slots:
+                await self._maybe_recycle(name)
+
+    async def _create_page(self, request, spider):
+        page = await super()._create_page(request, spider)
+        if request.meta.get("render_capture_json") and self.capture_max_responses:
+            capture = self.captures[id(request)] = JsonCapture(self.capture_max_bytes, self.capture_max_responses)
+            request.meta["render_json"] = capture.captured
+            page.on("response", capture.on_response)
+        return page
+
+    def _pool_context(self, request):
+        slot = zlib.crc32(domain_of(request.url).encode("utf8")) % self.pool_size
+        name = f"render-{slot}.{self.generations[slot]}"
+        self.context_slots[name] = slot
+        return name
+
+    async def _maybe_recycle(self, name):
+        slot = self.context_slots[name]
+        current = name == f"render-{slot}.{self.generations[slot]}"
+        if current and self.recycle_after and self.context_pages[name] >= self.recycle_after:
+            # New renders go to a fresh context, this one closes once its pages are done
+            self.generations[slot] += 1
+            current = False
+        if current or self.in_flight[name]:
+            return
+        wrapper = self.context_wrappers.get(name)
+        del self.context_slots[name]
+        del self.context_pages[name]
+        del self.in_flight[name]
+        if wrapper is not None:
+            await wrapper.context.close()
+            self.stats.inc_value("render/contexts_recycled")
@@ -0,0 +1,184 @@
+import re
+import ssl
+import time
+
+import scrapy.exceptions
+from OpenSSL import SSL
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+from twisted.internet import error as twisted_errors
+
+from jobscraper.memory import DomainMemory
+
+AUTH_WALL = "auth_wall"
+BLOCKED = "blocked"
+TLS = "tls"
+DNS = "dns"
+TIMEOUT = "timeout"
+CONNECTION = "connection"
+NO_JOBS = "no_jobs"
+
+# 999 is LinkedIn's answer to anyone not logged in
+AUTH_WALL_STATUSES = (401, 407, 999)
+BLOCKED_STATUSES = (403,)
+# Where sites send us instead of their jobs
+AUTH_WALL_PATH = re.compile(r"/(?:authwall|login|signin|sign-in|sign_in|uas/login|checkpoint/|sso/)", re.IGNORECASE)
+
+
+def _exceptions(module, *names):
+    # Not every Scrapy version has all of them
+    return tuple(getattr(module, name) for name in names if hasattr(module, name))
+
+
+FAILURES = (
+    (DNS, _exceptions(twisted_errors, "DNSLookupError") + _exceptions(scrapy.exceptions, "CannotResolveHostError")),
+    (TLS, (SSL.Error, ssl.SSLError) + _exceptions(twisted_errors, "SSLError")),
+    (TIMEOUT, (PlaywrightTimeoutError,) + _exceptions(twisted_errors, "TimeoutError", "TCPTimedOutError")
+        + _exceptions(scrapy.exceptions, "DownloadTimeoutError")),
+    (CONNECTION, _exceptions(twisted_errors, "ConnectionRefusedError", "ConnectError")
+        + _exceptions(scrapy.exceptions, "DownloadConnectionRefusedError")),
+)
+
+
+def classify_failure(exception):
+    """
+    What kind of host failure a download exception is (DNS, TLS, TIMEOUT, CONNECTION), None
+    for anything else. Looks through the exceptions it wraps: Scrapy wraps Twisted's, and a
+    response that was never received carries the TLS error behind it in `reasons`.
+    """
+    pending = [exception]
+    seen = set()
+    while pending:
+        e = pending.pop(0)
+        if e is None or id(e) in seen:
+            continue
+        seen.add(id(e))
+        for outcome, types in FAILURES:
+            if isinstance(e, types):
+                return outcome
+        pending.append(e.__cause__)
+        pending.extend(getattr(r, "value", r) for r in getattr(e, "reasons", None) or ())
+    return None
+
+
+def classify_response(request, response):
+    """
+    AUTH_WALL for a login wall (status, or a redirect to a login page), BLOCKED for a 403, else None.
+    """
+    if response.status in AUTH_WALL_STATUSES:
+        return AUTH_WALL
+    if response.status in BLOCKED_STATUSES:
+        return BLOCKED
+    first_url = request.meta.get("redirect_urls", [request.url])[0]
+    if AUTH_WALL_PATH.search(response.url) and not AUTH_WALL_PATH.search(first_url):
+        return AUTH_WALL
+    return None
+
+
+class CircuitBreaker:
+    """
+    In-run breaker of one host: after `threshold` failures in a row its requests are
+    dropped for `cooldown` seconds. Then one request is let through - a success closes
+    the breaker, a failure opens it again for twice as long (up to `max_cooldown`).
+    """
+
+    def __init__(self, threshold=3, cooldown=300.0, max_cooldown=3600.0):
+        self.threshold = max(1, threshold)
+        self.base_cooldown = cooldown
+        self.cooldown = cooldown
+        self.max_cooldown = max(max_cooldown, cooldown)
+        self.failures = 0
+        self.open_until = 0.0
+        self.probing = False
+
+    @property
+    def is_open(self):
+        return self.failures >= self.threshold
+
+    def allow(self, now=None):
+        if not self.is_open:
+            return True
+        now = time.monotonic() if now is None else now
+        if now < self.open_until:
+            return False
+        # One request to see if the host is back; the next one waits another cooldown
+        self.probing = True
+        self.open_until = now + self.cooldown
+        return True
+
+    def record_success(self):
+        self.failures = 0
+        self.probing = False
+        self.cooldown = self.base_cooldown
+
+    def record_failure(self, now=None):
+        now = time.monotonic() if now is None else now
+        self.failures += 1
+        if self.probing:
+            self.probing = False
+            self.cooldown = min(self.cooldown * 2, self.max_cooldown)
+            self.open_until = now + self.cooldown
+        elif self.failures == self.threshold:
+            self.open_until = now + self.cooldown
+
+
+class HostHealth:
+    """
+    Failures of earlier runs, kept in a JSON file (HOST_HEALTH_FILE): careers pages whose
+    requests failed (auth wall, TLS, DNS, timeout...) or that never had a job. They are
+    skipped for `backoff` seconds after a failing run, twice as long after every further
+    failing run in a row, up to `max_backoff`. A success forgets them.
+
+    Kept under the careers page's URL, not its host - many companies share an ATS host, and
+    one of them failing says nothing of the others.
+    A page counts once per run, and not at all if it also worked this run.
+    """
+
+    def __init__(self, path=None, backoff=20 * 3600, max_backoff=30 * 24 * 3600):
+        self.memory = DomainMemory(path, key=str)
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        # Careers pages that failed / worked this run
+        self.failed_now = set()
+        self.ok_now = set()
+
+    def __contains__(self, url):
+        return self.lookup(url) is not None
+
+    def lookup(self, url):
+        """
+        The failure on record for the careers page `url`: {outcome, failures, since, until}, or None.
+        """
+        return self.memory.get(url)
+
+    def blocked(self, url, now=None):
+        """
+        Outcome of the failure `url` is still backing off from, None if it may be crawled.
+        """
+        record = self.lookup(url)
+        now = time.time() if now is None else now
+        if record and record["until"] > now:
+            return record["outcome"]
+        return None
+
+    def failed(self, url, outcome, now=None):
+        if not url or url in self.failed_now or url in self.ok_now:
+            return
+        self.failed_now.add(url)
+        now = time.time() if now is None else now
+        previous = self.memory.get(url) or {}
+        failures = previous.get("failures", 0) + 1
+        self.memory.set(url, {
+            "outcome": outcome,
+            "failures": failures,
+            "since": previous.get("since", int(now)),
+            "until": int(now + min(self.max_backoff, self.backoff * 2 ** (failures - 1))),
+        })
+
+    def succeeded(self, url):
+        if not url or url in self.ok_now:
+            return
+        self.ok_now.add(url)
+        self.memory.discard(url)
+
+    def save(self):
+        self.memory.save()
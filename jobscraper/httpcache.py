@@ -0,0 +1,249 @@
+import json
+import os
+import sqlite3
+import time
+import zlib
+
+from scrapy.http import Headers
+from scrapy.responsetypes import responsetypes
+from scrapy.utils.httpobj import urlparse_cached
+from scrapy.utils.project import data_path
+from w3lib.http import headers_dict_to_raw, headers_raw_to_dict
+
+from jobscraper.state import content_hash
+from jobscraper.throttle import host_settings
+
+
+def replay_settings(settings):
+    """
+    Turn `settings` into an offline replay of what the cache has (HTTPCACHE_REPLAY):
+    nothing is downloaded, and every job comes out as if this were the first run.
+    """
+    settings.set("HTTPCACHE_ENABLED", True, priority="spider")
+    # A request the cache doesn't have is dropped instead of downloaded
+    settings.set("HTTPCACHE_IGNORE_MISSING", True, priority="spider")
+    # Leave the incremental state, the corpus and the host health of the live runs alone
+    settings.set("CRAWL_STATE_FILE", None, priority="spider")
+    settings.set("EXPORT_DIR", None, priority="spider")
+    settings.set("HOST_HEALTH_FILE", None, priority="spider")
+    # ...and what they learned about each careers page: a replay neither follows it (it would
+    # skip the branches the cache has pages for) nor overwrites it with what it saw offline
+    settings.set("RENDER_MEMORY_FILE", None, priority="spider")
+    settings.set("JSON_PATHS_FILE", None, priority="spider")
+    settings.set("API_ENDPOINTS_FILE", None, priority="spider")
+    settings.set("SITEMAP_MEMORY_FILE", None, priority="spider")
+
+
+class ContentAddressedCacheStorage:
+    """
+    HTTPCACHE_STORAGE for plain and rendered (Playwright) responses.
+
+    An SQLite index maps each request to the status, headers and body hash of its last
+    response; bodies are stored once per content, zlib-compressed, under bodies/ - a
+    page that didn't change since the last run costs an index row, not another copy.
+    The JSON a render captured (meta["render_json"]) is stored the same way and put
+    back on the request when the render is served from the cache. A render and a plain
+    download of the same URL are separate entries.
+
+    Entries older than their host's TTL (HTTPCACHE_HOST_TTLS, else HTTPCACHE_EXPIRATION_SECS,
+    0 = never) are downloaded again - but kept until then, so HTTPCACHE_REPLAY can still
+    serve them. Entries no run stored or served for HTTPCACHE_EVICT_SECS (careers pages and
+    postings that left the input, or were taken down) are deleted, with their bodies, when
+    the spider closes.
+    """
+
+    def __init__(self, settings):
+        self.cachedir = data_path(settings["HTTPCACHE_DIR"])
+        self.expiration_secs = settings.getint("HTTPCACHE_EXPIRATION_SECS")
+        self.ttls = {k.lower(): v for k, v in settings.getdict("HTTPCACHE_HOST_TTLS").items()}
+        self.level = settings.getint("HTTPCACHE_LEVEL")
+        self.evict_secs = settings.getint("HTTPCACHE_EVICT_SECS")
+        self.replay = settings.getbool("HTTPCACHE_REPLAY")
+        self.conn = None
+        self.stats = None
+        # Some entry got a different body this run, so bodies/ may have orphans
+        self.replaced = False
+
+    def open_spider(self, spider):
+        self.root = os.path.join(self.cachedir, spider.name)
+        os.makedirs(os.path.join(self.root, "bodies"), exist_ok=True)
+        self._fingerprinter = spider.crawler.request_fingerprinter
+        self.stats = spider.crawler.stats
+        # Parallel workers share the cache: autocommit + WAL keeps every write lock short
+        self.conn = sqlite3.connect(os.path.join(self.root, "index.sqlite"), timeout=60, isolation_level=None)
+        self.conn.executescript(
+            """
+            PRAGMA journal_mode = WAL;
+            PRAGMA synchronous = NORMAL;
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                url TEXT,
+                method TEXT,
+                status INTEGER,
+                response_url TEXT,
+                headers BLOB,
+                flags TEXT,
+                body_hash TEXT,
+                captures_hash TEXT,
+                stored_at REAL,
+                seen_at REAL
+            );
+            """
+        )
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(entries)")}
+        if "seen_at" not in columns:
+            # A cache from before eviction: everything counts as seen when it was stored
+            try:
+                self.conn.execute("ALTER TABLE entries ADD COLUMN seen_at REAL")
+                self.conn.execute("UPDATE entries SET seen_at = stored_at")
+            except sqlite3.OperationalError:
+                # Another worker just did it
+                pass
+
+    def close_spider(self, spider):
+        if not self.replay:
+            if self.evict_secs:
+                self.evict(time.time() - self.evict_secs)
+            if self.replaced:
+                self.prune()
+        self.conn.close()
+
+    def retrieve_response(self, spider, request):
+        row = self.conn.execute(
+            "SELECT status, response_url, headers, flags, body_hash, captures_hash, stored_at FROM entries WHERE key = ?",
+            (self._key(request),),
+        ).fetchone()
+        if row is None:
+            return None
+        status, url, raw_headers, flags, body_hash, captures_hash, stored_at = row
+        ttl = self.ttl(urlparse_cached(request).hostname)
+        if not self.replay and 0 < ttl < time.time() - stored_at:
+            self.stats.inc_value("httpcache/expired")
+            return None
+        body = self._read(body_hash)
+        if body is None:
+            # Another worker is still storing it, pruned by another worker, or deleted by hand - a miss
+            return None
+        if not self.replay:
+            # Still in use - not evicted (a replay only reads)
+            self.conn.execute("UPDATE entries SET seen_at = ? WHERE key = ?", (time.time(), self._key(request)))
+        if captures_hash:
+            captures = self._read(captures_hash)
+            request.meta["render_json"] = json.loads(captures) if captures else []
+        headers = Headers(headers_raw_to_dict(raw_headers))
+        request.meta["cache_timestamp"] = stored_at
+        respcls = responsetypes.from_args(headers=headers, url=url, body=body)
+        return respcls(url=url, status=status, headers=headers, body=body, flags=json.loads(flags), request=request)
+
+    def store_response(self, spider, request, response):
+        if self.replay:
+            return
+        key = self._key(request)
+        if response.status == 304:
+            # Revalidated (IncrementalCrawlMiddleware sends validators) - what we have is still current
+            now = time.time()
+            self.conn.execute("UPDATE entries SET stored_at = ?, seen_at = ? WHERE key = ?", (now, now, key))
+            return
+        body_hash = content_hash(response.body)
+        captures = captures_hash = None
+        if request.meta.get("render_capture_json"):
+            captures = json.dumps(request.meta.get("render_json") or [], ensure_ascii=False).encode("utf8")
+            captures_hash = content_hash(captures)
+        previous = self.conn.execute("SELECT body_hash, captures_hash FROM entries WHERE key = ?", (key,)).fetchone()
+        if previous is not None and previous != (body_hash, captures_hash):
+            self.replaced = True
+        now = time.time()
+        self.conn.execute(
+            "INSERT OR REPLACE INTO entries (key, url, method, status, response_url, headers, flags, body_hash,"
+            " captures_hash, stored_at, seen_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                key,
+                request.url,
+                request.method,
+                response.status,
+                response.url,
+                headers_dict_to_raw(response.headers),
+                json.dumps([f for f in response.flags if f != "cached"]),
+                body_hash,
+                captures_hash,
+                now,
+                now,
+            ),
+        )
+        # Bodies only after the row that refers to them, so another worker's prune() either
+        # sees the row or finds the body newer than itself (see prune). Until then a worker
+        # that reads the row finds no body, which is a cache miss.
+        self._write(body_hash, response.body)
+        if captures is not None:
+            self._write(captures_hash, captures)
+
+    def ttl(self, host):
+        return host_settings(host, self.ttls, default=self.expiration_secs)
+
+    def evict(self, before):
+        """
+        Delete the entries not stored or served since `before` (their bodies go with the next prune).
+        """
+        evicted = self.conn.execute("DELETE FROM entries WHERE seen_at < ?", (before,)).rowcount
+        if evicted:
+            self.replaced = True
+            self.stats.inc_value("httpcache/evicted", evicted)
+
+    def prune(self):
+        """
+        Delete the bodies no entry refers to any more. Bodies written (or reused) since the
+        prune started are kept: another worker may be storing them.
+        """
+        started = time.time()
+        referenced = set()
+        for body_hash, captures_hash in self.conn.execute("SELECT body_hash, captures_hash FROM entries"):
+            referenced.add(body_hash)
+            referenced.add(captures_hash)
+        removed = 0
+        for directory, _, files in os.walk(os.path.join(self.root, "bodies")):
+            for name in files:
+                if not name.endswith(".z") or name[:-2] in referenced:
+                    continue
+                path = os.path.join(directory, name)
+                try:
+                    if os.path.getmtime(path) >= started:
+                        continue
+                    os.remove(path)
+                except FileNotFoundError:
+                    # Another worker's prune got it first
+                    continue
+                removed += 1
+        self.stats.inc_value("httpcache/bodies_pruned", removed)
+
+    def _key(self, request):
+        key = self._fingerprinter.fingerprint(request).hex()
+        return f"{key}#render" if request.meta.get("playwright") else key
+
+    def _path(self, digest):
+        return os.path.join(self.root, "bodies", digest[:2], f"{digest}.z")
+
+    def _write(self, digest, body):
+        path = self._path(digest)
+        try:
+            # Reused: touched, so a prune that started before this keeps it
+            os.utime(path)
+            self.stats.inc_value("httpcache/bodies_reused")
+            return
+        except FileNotFoundError:
+            pass
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        data = zlib.compress(body, self.level or 6)
+        # Written aside and renamed, so a reader (or another worker) never sees half a body
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+        self.stats.inc_value("httpcache/bodies_new")
+        self.stats.inc_value("httpcache/bytes_stored", len(data))
+
+    def _read(self, digest):
+        try:
+            with open(self._path(digest), "rb") as f:
+                return zlib.decompress(f.read())
+        except FileNotFoundError:
+            return None
@@ -3,7 +3,12 @@
 # See documentation in:
 # https://docs.scrapy.org/en/latest/topics/items.html
 
+import sys
+from collections.abc import MutableMapping
+
 import scrapy
+from itemadapter import ItemAdapter
+from itemadapter.adapter import AdapterInterface
 
 
 class JobCandidate(scrapy.Item):
@@ -15,3 +20,130 @@ class JobCandidate(scrapy.Item):
     # Phase B fields
     description = scrapy.Field()
     resolved_via = scrapy.Field()
+
+    # Incremental runs: "new", "changed" or "removed" since the last run
+    change = scrapy.Field()
+
+    # Phase A candidates only: the job page Phase B gets the description from (see JobResolutionMiddleware)
+    resolve_url = scrapy.Field()
+
+
+_UNSET = object()
+
+
+class JobRecord(MutableMapping):
+    """
+    What requests carry in meta["job"], and what job page candidates are: the JobCandidate
+    fields, but in __slots__ instead of a dict - tens of thousands of them wait in the
+    scheduler and the resolution queue on a big crawl. Works like a dict of the fields that
+    are set (job["title"], job.get(...), dict(job) for the item).
+
+    company, source_url and resolved_via are interned: every candidate of a board shares
+    one copy, also after a trip through a disk queue. Weak references are allowed (see
+    CandidateDeduper).
+    """
+
+    FIELDS = tuple(JobCandidate.fields)
+    __slots__ = FIELDS + ("__weakref__",)
+    INTERNED = ("company", "source_url", "resolved_via")
+
+    def __init__(self, job=(), **fields):
+        if isinstance(job, JobRecord):
+            # Already checked and interned
+            for key, value in job._fields():
+                setattr(self, key, value)
+        else:
+            for key, value in dict(job).items():
+                self[key] = value
+        for key, value in fields.items():
+            self[key] = value
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except (AttributeError, TypeError):
+            raise KeyError(key) from None
+
+    def __setitem__(self, key, value):
+        if key not in self.FIELDS:
+            raise KeyError(f"JobRecord does not support field: {key}")
+        if key in self.INTERNED and type(value) is str:
+            value = sys.intern(value)
+        setattr(self, key, value)
+
+    def __delitem__(self, key):
+        try:
+            delattr(self, key)
+        except (AttributeError, TypeError):
+            raise KeyError(key) from None
+
+    def __iter__(self):
+        return (key for key, _ in self._fields())
+
+    def __len__(self):
+        return sum(1 for _ in self._fields())
+
+    def __reduce__(self):
+        # Through __init__, so the strings are interned again when it comes back from disk
+        return JobRecord, (dict(self._fields()),)
+
+    def __repr__(self):
+        return f"JobRecord({dict(self._fields())!r})"
+
+    def _fields(self):
+        for key in self.FIELDS:
+            value = getattr(self, key, _UNSET)
+            if value is not _UNSET:
+                yield key, value
+
+    def copy(self):
+        return JobRecord(self)
+
+
+class JobRecordAdapter(AdapterInterface):
+    """
+    Lets itemadapter (and so Scrapy's feed exports and item checks) take a JobRecord for an
+    item, with the JobCandidate fields and their metadata.
+    """
+
+    @classmethod
+    def is_item_class(cls, item_class):
+        return issubclass(item_class, JobRecord)
+
+    @classmethod
+    def get_field_meta_from_class(cls, item_class, field_name):
+        return ItemAdapter.get_field_meta_from_class(JobCandidate, field_name)
+
+    @classmethod
+    def get_field_names_from_class(cls, item_class):
+        return list(JobRecord.FIELDS)
+
+    def __getitem__(self, field_name):
+        return self.item[field_name]
+
+    def __setitem__(self, field_name, value):
+        self.item[field_name] = value
+
+    def __delitem__(self, field_name):
+        del self.item[field_name]
+
+    def __iter__(self):
+        return iter(self.item)
+
+    def __len__(self):
+        return len(self.item)
+
+
+ItemAdapter.ADAPTER_CLASSES.appendleft(JobRecordAdapter)
+
+
+def job_page_candidate(job, url, **fields):
+    """
+    A Phase A job (with `fields` changed) whose description is on its own page at `url`.
+    JobResolutionMiddleware queues it and fetches the page into parse_job_page.
+    """
+    return JobRecord(job, resolve_url=url, **fields)
+
+
+def is_candidate(result):
+    return isinstance(result, (dict, scrapy.Item, JobRecord)) and bool(result.get("resolve_url"))
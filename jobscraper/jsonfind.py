@@ -0,0 +1,119 @@
+# Heuristics for finding jobs and descriptions in embedded JSON (e.g. Next.js __NEXT_DATA__)
+
+TITLE_FIELDS = {'title', 'name', 'position', 'role', 'jobTitle', 'heading'}
+URL_FIELDS = {'url', 'href', 'link', 'path', 'slug', 'canonicalUrl', 'jobUrl'}
+DESCRIPTION_FIELDS = {'description', 'content', 'text', 'body', 'summary', 'details', 'requirements', 'responsibilities', 'fullDescription', 'jobDescription', 'positionDescription'}
+
+# Keys are compared lowercased
+_TITLE_KEYS = {f.lower() for f in TITLE_FIELDS}
+_URL_KEYS = {f.lower() for f in URL_FIELDS}
+_DESCRIPTION_KEYS = {f.lower() for f in DESCRIPTION_FIELDS}
+
+
+def scan_json(data, jobs=True, description=True):
+    """
+    Walk a parsed JSON document once, depth first, without recursion or depth limit.
+
+    Returns (job_lists, description):
+    - job_lists: (path, list) for every list whose first item looks like a job
+      (has a title field and a url/path field), in document order. `path` is the
+      list of keys/indexes leading to it (see resolve_path).
+    - description: the first long string under a description-like key.
+    Stops as soon as the description is found when job lists are not wanted.
+    """
+    job_lists = []
+    found_description = None
+    # Keys repeat across every object of the same shape - lowercase each one once
+    lowered = {}
+    # Stack entries are (value, key, parent entry); the path is only rebuilt for job lists
+    stack = [(data, None, None)]
+    while stack:
+        entry = stack.pop()
+        obj = entry[0]
+        if isinstance(obj, dict):
+            if description and found_description is None:
+                for key, value in obj.items():
+                    if isinstance(value, str) and len(value) > 50 and _lower(lowered, key) in _DESCRIPTION_KEYS:
+                        found_description = value
+                        break
+                if found_description is not None and not jobs:
+                    break
+            children = [(value, key, entry) for key, value in obj.items() if isinstance(value, (dict, list))]
+        elif isinstance(obj, list):
+            if jobs and obj and isinstance(obj[0], dict) and _is_job_like(obj[0], lowered):
+                job_lists.append((_path(entry), obj))
+            children = [(value, index, entry) for index, value in enumerate(obj) if isinstance(value, (dict, list))]
+        else:
+            continue
+        children.reverse()
+        stack.extend(children)
+    return job_lists, found_description
+
+
+def _lower(cache, key):
+    lowered = cache.get(key)
+    if lowered is None:
+        lowered = cache[key] = key.lower() if isinstance(key, str) else key
+    return lowered
+
+
+def _is_job_like(item, lowered):
+    has_title = has_url = False
+    for key, value in item.items():
+        key = _lower(lowered, key)
+        if key in _TITLE_KEYS:
+            has_title = True
+        elif key in _URL_KEYS and isinstance(value, str) and (value.startswith('http') or value.startswith('/')):
+            has_url = True
+    return has_title and has_url
+
+
+def _path(entry):
+    path = []
+    while entry[2] is not None:
+        path.append(entry[1])
+        entry = entry[2]
+    path.reverse()
+    return path
+
+
+def resolve_path(data, path):
+    """
+    The value at `path` (as returned by scan_json), or None if the document has no such path.
+    """
+    for key in path:
+        try:
+            data = data[key]
+        except (KeyError, IndexError, TypeError):
+            return None
+    return data
+
+
+def jobs_at(data, paths):
+    """
+    job_lists (as in scan_json) for the given paths - the ones that still hold jobs.
+    """
+    lowered = {}
+    job_lists = []
+    for path in paths:
+        obj = resolve_path(data, path)
+        if isinstance(obj, list) and obj and isinstance(obj[0], dict) and _is_job_like(obj[0], lowered):
+            job_lists.append((path, obj))
+    return job_lists
+
+
+def find_job_objects(data):
+    for _, objs in scan_json(data, description=False)[0]:
+        for obj in objs:
+            if isinstance(obj, dict):
+                yield obj
+
+
+def find_description(data):
+    return scan_json(data, jobs=False)[1]
+
+
+def job_title_and_url(obj):
+    title = obj.get('title') or obj.get('name') or obj.get('position') or obj.get('role') or obj.get('jobTitle')
+    url = obj.get('url') or obj.get('href') or obj.get('link') or obj.get('path') or obj.get('slug') or obj.get('canonicalUrl') or obj.get('jobUrl')
+    return title, url
@@ -0,0 +1,174 @@
+import functools
+import json
+import re
+
+# What the spider looks for in titles and page text. "roles" are the jobs we want, by role
+# family - whole words, so "sre" doesn't match "presence". "generic" words tell a careers
+# page from one that needs a render, "noise" words mark links that are never jobs - both
+# match anywhere in a word, like "engineer" in "engineering".
+# KEYWORDS_FILE replaces this with a JSON file of the same shape.
+DEFAULT_KEYWORDS = {
+    "roles": {
+        "devops": ["devops engineer", "mlops engineer"],
+        "sre": ["sre"],
+    },
+    "generic": ["engineer", "recruiter", "researcher", "leader", "developer", "manager", "specialist", "technician"],
+    "noise": ["privacy", "terms", "about", "contact", "blog", "login"],
+}
+
+ROLE, GENERIC, NOISE = 1, 2, 4
+
+WHITESPACE = re.compile(r"\s+")
+
+
+def normalize(text):
+    """
+    Lowercased, with whitespace runs as single spaces - "DevOps\n  Engineer" is "devops engineer".
+    """
+    return WHITESPACE.sub(" ", text).lower()
+
+
+def _is_word(char):
+    # Same as \w
+    return char.isalnum() or char == "_"
+
+
+class KeywordMatcher:
+    """
+    All role, generic and noise keywords compiled into one Aho-Corasick automaton, so a
+    string is classified in one pass over it however many keywords there are - the
+    alternation regexes this replaces try every keyword at every position.
+
+    The automaton is stored as a DFA (each state has its transitions, failure links
+    already followed), so a step is one dict lookup. Characters that are in no keyword
+    are not stored and go back to the start state.
+    """
+
+    def __init__(self, roles, generic=(), noise=()):
+        self.config = {
+            "roles": {family: list(keywords) for family, keywords in roles.items()},
+            "generic": list(generic),
+            "noise": list(noise),
+        }
+        self.delta = [{}]
+        # Matches ending in each state: (length, kind, family, whole_word)
+        self.out = [()]
+        for family, keywords in roles.items():
+            for keyword in keywords:
+                self._add(keyword, ROLE, family, True)
+        for keyword in generic:
+            self._add(keyword, GENERIC, None, False)
+        for keyword in noise:
+            self._add(keyword, NOISE, None, False)
+        self._build()
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(config.get("roles") or {}, config.get("generic") or (), config.get("noise") or ())
+
+    def __reduce__(self):
+        # Sent to offload workers as its config - each worker compiles it once (see _compiled)
+        return _compiled, (json.dumps(self.config, sort_keys=True),)
+
+    def _add(self, keyword, kind, family, whole_word):
+        keyword = normalize(keyword).strip()
+        if not keyword:
+            return
+        state = 0
+        for char in keyword:
+            if char not in self.delta[state]:
+                self.delta.append({})
+                self.out.append(())
+                self.delta[state][char] = len(self.delta) - 1
+            state = self.delta[state][char]
+        self.out[state] += ((len(keyword), kind, family, whole_word),)
+
+    def _build(self):
+        fail = [0] * len(self.delta)
+        queue = list(self.delta[0].values())
+        goto = [dict(d) for d in self.delta]
+        for state in queue:
+            # Breadth first: the failure state is done before anything that fails to it
+            if state:
+                self.out[state] += self.out[fail[state]]
+                self.delta[state] = {**self.delta[fail[state]], **goto[state]}
+            for char, child in goto[state].items():
+                queue.append(child)
+                if state:
+                    fail[child] = self.delta[fail[state]].get(char, 0)
+
+    def scan(self, text, stop=0):
+        """
+        (family, generic, noise) of `text`: the role family of the first role keyword
+        in it (None if there is none), whether it has a generic / noise keyword.
+        Stops as soon as a keyword of a kind in `stop` (ROLE | GENERIC | NOISE) is found.
+        """
+        if not text:
+            return None, False, False
+        text = normalize(text)
+        delta = self.delta
+        out = self.out
+        end = len(text)
+        state = 0
+        family = None
+        found = 0
+        for i, char in enumerate(text):
+            state = delta[state].get(char, 0)
+            if not out[state]:
+                continue
+            for length, kind, match_family, whole_word in out[state]:
+                if whole_word:
+                    start = i - length + 1
+                    if start and _is_word(text[start - 1]) or i + 1 < end and _is_word(text[i + 1]):
+                        continue
+                if kind == ROLE and family is None:
+                    family = match_family
+                found |= kind
+            if found & stop:
+                break
+        return family, bool(found & GENERIC), bool(found & NOISE)
+
+    def role_family(self, text):
+        """
+        Role family of the first role keyword in `text`, None if it has none.
+        """
+        return self.scan(text, ROLE)[0]
+
+    def job_role(self, text):
+        """
+        Role family of `text` as a job title: None if it has no role keyword, or a noise keyword.
+        """
+        family, _, noise = self.scan(text, NOISE)
+        return None if noise else family
+
+    def has_generic(self, text):
+        return self.scan(text, GENERIC)[1]
+
+    def pattern(self, kind):
+        """
+        Case-insensitive regex source for the keywords of one kind - for the browser, see render.wait_for_jobs.
+        """
+        if kind == "roles":
+            keywords = [k for family in self.config["roles"].values() for k in family]
+        else:
+            keywords = self.config[kind]
+        words = ["\\s+".join(re.escape(word) for word in normalize(k).split()) for k in keywords]
+        words = [w for w in words if w]
+        if kind == "roles":
+            return "|".join(f"\\b{w}\\b" for w in words)
+        return "|".join(words)
+
+
+@functools.lru_cache(maxsize=8)
+def _compiled(config):
+    return KeywordMatcher.from_config(json.loads(config))
+
+
+def load_keywords(path=None):
+    """
+    KeywordMatcher for the KEYWORDS_FILE at `path`, or the built-in DEFAULT_KEYWORDS.
+    """
+    if not path:
+        return KeywordMatcher.from_config(DEFAULT_KEYWORDS)
+    with open(path, encoding="utf8") as f:
+        return KeywordMatcher.from_config(json.load(f))
@@ -0,0 +1,91 @@
+import json
+import os
+from urllib.parse import urlparse
+
+import tldextract
+
+# Bundled public suffix list only - no network fetch at import/first use
+_tld_extract = tldextract.TLDExtract(suffix_list_urls=())
+
+
+def domain_of(url):
+    """
+    Host of a url, lowercased and without a leading "www.".
+    """
+    host = (urlparse(url).hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    return host
+
+
+def registered_domain(url):
+    """
+    Domain a site was registered under ("3m.wd1.myworkdayjobs.com" -> "myworkdayjobs.com").
+    Falls back to the host for IPs and unknown suffixes.
+    """
+    parts = _tld_extract(url)
+    domain = getattr(parts, "top_domain_under_public_suffix", None)
+    if domain is None:
+        domain = parts.registered_domain
+    return domain or domain_of(url)
+
+
+class DomainMemory:
+    """
+    Small per-domain mapping that is kept in a JSON file between runs.
+    Used to remember things we learned about a site (e.g. that it needs a browser).
+    """
+
+    def __init__(self, path=None, key=domain_of):
+        self.path = path
+        # What an entry is kept under - the domain of the url by default
+        self.key = key
+        self.data = self._load()
+        # Keys we changed (None = removed), re-applied on top of the file when saving,
+        # so parallel workers sharing the file don't drop each other's entries
+        self.changes = {}
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, "r", encoding="utf8") as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return {}
+
+    def __contains__(self, url):
+        return self.key(url) in self.data
+
+    def __len__(self):
+        return len(self.data)
+
+    def get(self, url, default=None):
+        return self.data.get(self.key(url), default)
+
+    def set(self, url, value):
+        domain = self.key(url)
+        if domain and self.data.get(domain) != value:
+            self.data[domain] = value
+            self.changes[domain] = value
+
+    def discard(self, url):
+        domain = self.key(url)
+        if self.data.pop(domain, None) is not None:
+            self.changes[domain] = None
+
+    def save(self):
+        if not self.path or not self.changes:
+            return
+        data = self._load()
+        for domain, value in self.changes.items():
+            if value is None:
+                data.pop(domain, None)
+            else:
+                data[domain] = value
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf8") as f:
+            json.dump(data, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
+        self.data = data
+        self.changes = {}
@@ -0,0 +1,222 @@
+import re
+import time
+
+from twisted.web.resource import Resource
+
+# Histogram buckets (seconds) for stage, download and render timings
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+class Histogram:
+    """
+    Prometheus-style histogram. Without buckets it only keeps count/sum/max (a summary),
+    which is what the per-domain series use - one line per domain instead of one per bucket.
+    """
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+    def quantile(self, q):
+        """
+        Upper bound of the bucket holding the q-quantile (the max if it is past the last bucket).
+        """
+        rank = q * self.count
+        for bound, total in self.cumulative():
+            if total >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def merged(self, other):
+        """
+        A new histogram with the observations of both (same buckets).
+        """
+        histogram = Histogram(self.buckets)
+        histogram.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        histogram.count = self.count + other.count
+        histogram.sum = self.sum + other.sum
+        histogram.max = max(self.max, other.max)
+        return histogram
+
+    def cumulative(self):
+        total = 0
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            yield bound, total
+
+
+class Metrics:
+    """
+    Labelled timings, counters and gauges of one crawl, for the metrics endpoint and
+    the timing/* stats (see MetricsExporter). Plain totals go straight to Scrapy stats.
+    Labels are passed as keyword arguments, always in the same order for the same series:
+    metrics.observe("stage_seconds", 0.2, stage="parse", branch="next_data").
+
+    Series with a domain label are exported for the `top_domains` domains we spent most
+    time on only; the others add up under domain="other", so a crawl of 30k companies
+    doesn't serve 30k series per metric.
+    """
+
+    HELP = {
+        "stage_seconds": "Time spent in spider callbacks, by callback and the branch that resolved the page",
+        "download_seconds": "Download time (browser render time for kind=render)",
+        "wait_seconds": "Time from reaching the downloader to the download starting (delays, concurrency limits)",
+        "domain_seconds": "Download and callback time per company domain",
+        "candidates_total": "Items and job page follow-ups yielded by callbacks, per company domain",
+        "items_total": "Items that went through the pipelines, per company domain",
+        "resolved_total": "Listing pages by the parse branch that found their jobs",
+        "queue_depth": "Requests waiting in the scheduler / downloader, responses waiting for the spider",
+    }
+
+    def __init__(self, top_domains=20):
+        self.top_domains = top_domains
+        self.histograms = {}
+        self.counters = {}
+        self.gauges = {}
+
+    def observe(self, name, value, buckets=BUCKETS, **labels):
+        key = (name, tuple(labels.items()))
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = Histogram(buckets)
+        histogram.observe(value)
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(labels.items()))
+        self.counters[key] = self.counters.get(key, 0) + value
+
+    def set(self, name, value, **labels):
+        self.gauges[(name, tuple(labels.items()))] = value
+
+    def render(self, stats=None, prefix="jobscraper"):
+        """
+        Everything in the Prometheus text format, plus the numeric Scrapy stats as jobscraper_stat{key=...}.
+        """
+        lines = []
+        typed = set()
+        top = {domain for domain, _, _ in self.slowest_domains(self.top_domains)}
+        histograms = _other_domains(self.histograms, top, Histogram.merged)
+        counters = _other_domains(self.counters, top, lambda a, b: a + b)
+
+        def header(name, kind):
+            if name not in typed:
+                typed.add(name)
+                if name in self.HELP:
+                    lines.append(f"# HELP {prefix}_{name} {self.HELP[name]}")
+                lines.append(f"# TYPE {prefix}_{name} {kind}")
+
+        for (name, labels), histogram in sorted(histograms.items()):
+            header(name, "histogram" if histogram.buckets else "summary")
+            for bound, count in histogram.cumulative():
+                lines.append(f"{prefix}_{name}_bucket{_labels(labels + (('le', bound),))} {count}")
+            if histogram.buckets:
+                lines.append(f"{prefix}_{name}_bucket{_labels(labels + (('le', '+Inf'),))} {histogram.count}")
+            lines.append(f"{prefix}_{name}_sum{_labels(labels)} {histogram.sum}")
+            lines.append(f"{prefix}_{name}_count{_labels(labels)} {histogram.count}")
+        for (name, labels), value in sorted(counters.items()):
+            header(name, "counter")
+            lines.append(f"{prefix}_{name}{_labels(labels)} {value}")
+        for (name, labels), value in sorted(self.gauges.items()):
+            header(name, "gauge")
+            lines.append(f"{prefix}_{name}{_labels(labels)} {value}")
+        if stats:
+            header("stat", "untyped")
+            for key, value in sorted(stats.items()):
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    lines.append(f"{prefix}_stat{_labels((('key', key),))} {value}")
+        return "\n".join(lines) + "\n"
+
+    def slowest_domains(self, count):
+        """
+        [domain, seconds, pages] of the `count` domains we spent most time on (download + callbacks).
+        """
+        totals = {}
+        for (name, labels), histogram in self.histograms.items():
+            if name != "domain_seconds":
+                continue
+            labels = dict(labels)
+            total = totals.setdefault(labels["domain"], [labels["domain"], 0.0, 0])
+            total[1] += histogram.sum
+            if labels.get("phase") == "download":
+                total[2] += histogram.count
+        ranked = sorted(totals.values(), key=lambda t: t[1], reverse=True)[:count]
+        return [[domain, round(seconds, 3), pages] for domain, seconds, pages in ranked]
+
+
+def _other_domains(series, top, merge):
+    # The series of domains not in `top` merged into domain="other"
+    capped = {}
+    for (name, labels), value in series.items():
+        if any(k == "domain" and v not in top for k, v in labels):
+            labels = tuple((k, "other" if k == "domain" else v) for k, v in labels)
+        key = (name, labels)
+        capped[key] = merge(capped[key], value) if key in capped else value
+    return capped
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels) + "}"
+
+
+def _escape(value):
+    return re.sub(r'(["\\])', r"\\\1", str(value)).replace("\n", "\\n")
+
+
+def crawler_metrics(crawler):
+    """
+    The Metrics of this crawl, shared by the instrumentation middlewares and the exporter.
+    """
+    metrics = getattr(crawler, "_jobscraper_metrics", None)
+    if metrics is None:
+        metrics = crawler._jobscraper_metrics = Metrics(crawler.settings.getint("METRICS_TOP_DOMAINS", 20))
+    return metrics
+
+
+class MetricsResource(Resource):
+    """
+    GET /metrics on the METRICS_PORT listener.
+    """
+
+    isLeaf = True
+
+    def __init__(self, metrics, stats):
+        super().__init__()
+        self.metrics = metrics
+        self.stats = stats
+
+    def render_GET(self, request):
+        if request.path not in (b"/", b"/metrics"):
+            request.setResponseCode(404)
+            return b"Not found\n"
+        request.setHeader(b"Content-Type", b"text/plain; version=0.0.4; charset=utf-8")
+        return self.metrics.render(self.stats.get_stats()).encode("utf8")
+
+
+class Timer:
+    """
+    Time accumulated over several stretches (e.g. each step of an async generator).
+    """
+
+    def __init__(self):
+        self.elapsed = 0.0
+        self.started = None
+
+    def start(self):
+        self.started = time.perf_counter()
+
+    def stop(self):
+        self.elapsed += time.perf_counter() - self.started
@@ -3,98 +3,670 @@
 # See documentation in:
 # https://docs.scrapy.org/en/latest/topics/spider-middleware.html
 
-from scrapy import signals
+import itertools
+import time
+
+from scrapy import Request, signals
+from scrapy.exceptions import DontCloseSpider, IgnoreRequest, NotConfigured
+from scrapy.utils.httpobj import urlparse_cached
 
 # useful for handling different item types with a single interface
 from itemadapter import ItemAdapter
 
+from jobscraper.dedup import CandidateDeduper, canonical_href
+from jobscraper.health import CircuitBreaker, classify_failure, classify_response
+from jobscraper.items import is_candidate
+from jobscraper.memory import domain_of
+from jobscraper.metrics import Timer, crawler_metrics
+from jobscraper.scheduler import SpillQueue
+from jobscraper.state import CrawlState, content_hash
+from jobscraper.throttle import HostLimit, host_settings, parse_retry_after
+
 
 class JobscraperSpiderMiddleware:
-    # Not all methods need to be defined. If a method is not defined,
-    # scrapy acts as if the spider middleware does not modify the
-    # passed objects.
+    """
+    Instrumentation of the spider callbacks (see jobscraper.metrics):
+    wall time of each callback by the branch that resolved the page, per company domain,
+    which parse branch resolved each listing (resolved/* stats), and the candidates
+    (items + job page follow-ups) the callbacks yielded vs. the items scraped, and the
+    role family of the scraped items (roles/* stats).
+    Sits closest to the spider, so it sees the callbacks' own output.
+    """
+
+    def __init__(self, crawler):
+        self.crawler = crawler
+        self.metrics = crawler_metrics(crawler)
 
     @classmethod
     def from_crawler(cls, crawler):
-        # This method is used by Scrapy to create your spiders.
-        s = cls()
-        crawler.signals.connect(s.spider_opened, signal=signals.spider_opened)
+        s = cls(crawler)
+        crawler.signals.connect(s.item_scraped, signal=signals.item_scraped)
         return s
 
-    def process_spider_input(self, response, spider):
-        # Called for each response that goes through the spider
-        # middleware and into the spider.
+    def process_spider_output(self, response, result, spider=None):
+        run = CallbackRun()
+        try:
+            result = iter(result)
+            while True:
+                run.timer.start()
+                try:
+                    r = next(result)
+                except StopIteration:
+                    break
+                finally:
+                    run.timer.stop()
+                run.add(r)
+                yield r
+        finally:
+            self._record(response, run)
+
+    async def process_spider_output_async(self, response, result, spider=None):
+        run = CallbackRun()
+        try:
+            while True:
+                run.timer.start()
+                try:
+                    r = await result.__anext__()
+                except StopAsyncIteration:
+                    break
+                finally:
+                    run.timer.stop()
+                run.add(r)
+                yield r
+        finally:
+            self._record(response, run)
+
+    def _record(self, response, run):
+        stats = self.crawler.stats
+        stage = getattr(response.request.callback, "__name__", None) or "parse"
+        branch = run.branch or "none"
+        domain = company_domain(response.meta.get("job"))
+        self.metrics.observe("stage_seconds", run.timer.elapsed, stage=stage, branch=branch)
+        self.metrics.observe("domain_seconds", run.timer.elapsed, buckets=(), domain=domain, phase="parse")
+        self.metrics.inc("candidates_total", run.items + run.followups, domain=domain)
+        stats.inc_value("candidates/items", run.items)
+        stats.inc_value("candidates/followups", run.followups)
+        if stage == "parse":
+            rendered = bool(response.meta.get("is_playwright"))
+            stats.inc_value(f"resolved/rendered/{branch}" if rendered else f"resolved/{branch}")
+            self.metrics.inc("resolved_total", branch=branch, rendered=str(rendered).lower())
+
+    def item_scraped(self, item, response, spider):
+        adapter = ItemAdapter(item)
+        self.metrics.inc("items_total", domain=company_domain(adapter))
+        if adapter.get("title") and hasattr(spider, "role_family"):
+            self.crawler.stats.inc_value(f"roles/{spider.role_family(adapter['title']) or 'none'}")
+
+
+class CallbackRun:
+    """
+    What one callback call yielded, and how long it ran.
+    """
+
+    def __init__(self):
+        self.timer = Timer()
+        self.items = 0
+        self.followups = 0
+        # resolved_via of the first result, or render_retry if the page is sent to the browser
+        self.branch = None
+
+    def add(self, result):
+        if isinstance(result, Request):
+            self.followups += 1
+            if self.branch is None and result.meta.get("playwright"):
+                self.branch = "render_retry"
+            job = result.meta.get("job") or {}
+        elif is_candidate(result):
+            # Its job page is fetched in Phase B - a follow-up too
+            self.followups += 1
+            job = result
+        else:
+            self.items += 1
+            job = ItemAdapter(result)
+        if self.branch is None:
+            self.branch = job.get("resolved_via")
+
 
-        # Should return None or raise an exception.
+def company_domain(job):
+    """
+    Domain of the careers page a job belongs to, so ATS and job pages count for their company.
+    """
+    return domain_of((job or {}).get("source_url") or "") or "-"
+
+
+class JobscraperDownloaderMiddleware:
+    """
+    Instrumentation of the downloads (see jobscraper.metrics): time spent waiting for a
+    download slot (DOWNLOAD_DELAY, concurrency limits) vs. downloading - rendering, for
+    Playwright requests - overall and per company domain.
+    """
+
+    def __init__(self, crawler):
+        self.crawler = crawler
+        self.metrics = crawler_metrics(crawler)
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(crawler)
+
+    def process_request(self, request, spider=None):
+        # Downloader middlewares run before the request waits for its slot
+        request.meta["metrics_queued_at"] = time.monotonic()
         return None
 
-    def process_spider_output(self, response, result, spider):
-        # Called with the results returned from the Spider, after
-        # it has processed the response.
+    def process_response(self, request, response, spider=None):
+        queued_at = request.meta.get("metrics_queued_at")
+        latency = request.meta.get("download_latency")
+        if queued_at is None or latency is None:
+            # Served without a download (cache, ...)
+            return response
+        total = time.monotonic() - queued_at
+        kind = "render" if request.meta.get("playwright") else "http"
+        self.metrics.observe("download_seconds", latency, kind=kind)
+        self.metrics.observe("wait_seconds", max(0.0, total - latency), kind=kind)
+        self.metrics.observe("domain_seconds", latency, buckets=(), domain=company_domain(request.meta.get("job")), phase="download")
+        return response
+
 
-        # Must return an iterable of Request, or item objects.
-        for i in result:
-            yield i
+class CandidateDedupMiddleware:
+    """
+    Drops job page candidates a company already has, before they reach the resolution queue.
+    See jobscraper.dedup.CandidateDeduper.
+    """
 
-    def process_spider_exception(self, response, exception, spider):
-        # Called when a spider or process_spider_input() method
-        # (from other spider middleware) raises an exception.
+    def __init__(self, crawler):
+        self.crawler = crawler
+        self.deduper = CandidateDeduper(crawler.stats)
 
-        # Should return either None or an iterable of Request or item objects.
-        pass
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(crawler)
+
+    def process_spider_output(self, response, result, spider=None):
+        yield from self.deduper.dedupe(result)
+
+    async def process_spider_output_async(self, response, result, spider=None):
+        # The follow-ups of one callback are merged together, so collect them first
+        results = [r async for r in result]
+        for r in self.process_spider_output(response, results, spider):
+            yield r
+
+
+class IncrementalCrawlMiddleware:
+    """
+    Only report what changed since the last run (see jobscraper.state.CrawlState).
+
+    - Listing pages are fetched with If-None-Match/If-Modified-Since. On a 304, or a
+      body identical to last time, the callback does not run at all and the
+      company's known postings count as still there.
+    - Job page candidates / follow-ups for postings we already have, with the same title, are not fetched
+      (from sitemaps, whose titles are made from the URL: postings we already have).
+    - Jobs come out with change="new" or "changed"; identical ones are dropped.
+    - Once the crawl is idle, postings missing from a board we did read are
+      emitted once with change="removed". A board counts as read when its listing was
+      unchanged, or a callback of that company (the listing, its render, ATS or API
+      fallback, sitemaps) yielded a job or a job page - not when the listing merely came
+      back: if the fallback it was handed to then fails, nothing is reported removed.
+    """
+
+    def __init__(self, crawler, path):
+        self.crawler = crawler
+        self.state = CrawlState(path)
+        # Companies whose board we read this run (see _read), and the ones already checked for removals
+        self.companies = set()
+        self.reported = set()
+        crawler.signals.connect(self.spider_idle, signal=signals.spider_idle)
+        crawler.signals.connect(self.spider_closed, signal=signals.spider_closed)
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        path = crawler.settings.get("CRAWL_STATE_FILE")
+        if not path:
+            raise NotConfigured
+        return cls(crawler, path)
 
     async def process_start(self, start):
-        # Called with an async iterator over the spider start() method or the
-        # matching method of an earlier spider middleware.
         async for item_or_request in start:
+            if isinstance(item_or_request, Request):
+                self._add_validators(item_or_request, self.crawler.spider)
             yield item_or_request
 
-    def spider_opened(self, spider):
-        spider.logger.info("Spider opened: %s" % spider.name)
+    def process_spider_output(self, response, result, spider=None):
+        spider = spider or self.crawler.spider
+        if self._skip_listing(response, spider):
+            return
+        yield from self._filter(response, result, spider)
 
+    async def process_spider_output_async(self, response, result, spider=None):
+        spider = spider or self.crawler.spider
+        if self._skip_listing(response, spider):
+            return
+        async for r in result:
+            for out in self._filter(response, [r], spider):
+                yield out
 
-class JobscraperDownloaderMiddleware:
-    # Not all methods need to be defined. If a method is not defined,
-    # scrapy acts as if the downloader middleware does not modify the
-    # passed objects.
+    def _skip_listing(self, response, spider):
+        request = getattr(response, "request", None)
+        if request is None or not self._is_listing(request, spider):
+            return False
+        company = response.meta["job"].get("company")
+        if not self._listing_unchanged(response, company):
+            return False
+        # Nothing new on the board: skip the callback and keep its postings alive
+        self.companies.add(company)
+        self.state.mark_seen(company)
+        self.crawler.stats.inc_value("state/listings_unchanged")
+        return True
+
+    def _filter(self, response, result, spider):
+        for r in result:
+            if isinstance(r, Request):
+                if self._is_posting(r, spider):
+                    self._read(r.meta["job"])
+                    if self._posting_unchanged(r.meta["job"], r.url):
+                        self.crawler.stats.inc_value("state/followups_skipped")
+                        continue
+                self._add_validators(r, spider)
+                yield r
+            elif is_candidate(r):
+                self._read(r)
+                if self._posting_unchanged(r, r["resolve_url"]):
+                    self.crawler.stats.inc_value("state/followups_skipped")
+                    continue
+                yield r
+            else:
+                if r.get("change") != "removed":
+                    self._read(r)
+                item = self._classify(response, r, spider)
+                if item is not None:
+                    yield item
+
+    def _read(self, job):
+        # A job (or a job page) of this company came out: its board was read
+        self.companies.add(job.get("company"))
+
+    def _is_listing(self, request, spider):
+        if request.method != "GET" or request.meta.get("ats_posting"):
+            return False
+        return request.callback in (spider.parse, spider.parse_ats, spider.parse_api)
+
+    def _is_posting(self, request, spider):
+        return request.callback == spider.parse_job_page or bool(request.meta.get("ats_posting"))
+
+    def _page_key(self, url, meta):
+        return f"{url}#render" if meta.get("playwright") else url
+
+    def _add_validators(self, request, spider):
+        if not self._is_listing(request, spider) or request.meta.get("playwright"):
+            return
+        page = self.state.page(self._page_key(request.url, request.meta))
+        if not page:
+            return
+        etag, last_modified, _ = page
+        if etag:
+            request.headers.setdefault("If-None-Match", etag)
+        if last_modified:
+            request.headers.setdefault("If-Modified-Since", last_modified)
+        request.meta["handle_httpstatus_list"] = request.meta.get("handle_httpstatus_list", []) + [304]
+
+    def _listing_unchanged(self, response, company):
+        if response.status == 304:
+            return True
+        url = response.meta.get("redirect_urls", [response.url])[0]
+        key = self._page_key(url, response.meta)
+        page = self.state.page(key)
+        body_hash = content_hash(response.body)
+        self.state.save_page(
+            key,
+            company,
+            response.headers.get("ETag", b"").decode("latin1") or None,
+            response.headers.get("Last-Modified", b"").decode("latin1") or None,
+            body_hash,
+        )
+        return page is not None and page[2] == body_hash
+
+    def _posting_unchanged(self, job, url):
+        company, key = job.get("company"), canonical_href(url)
+        # It is on the board either way, so it is not removed
+        self.state.mark_seen(company, key)
+        posting = self.state.posting(company, key)
+        if posting is None or posting[2]:
+            return False
+        # A sitemap's title is made up from the URL - that the posting is still listed is all we know
+        return job.get("resolved_via") == "sitemap" or posting[0] == job.get("title")
+
+    def _classify(self, response, item, spider):
+        if item.get("change") == "removed":
+            return item
+        company = item.get("company")
+        request = getattr(response, "request", None)
+        if request is not None and self._is_posting(request, spider):
+            # Same key the follow-up request was checked with
+            key = canonical_href(response.meta.get("redirect_urls", [request.url])[0])
+        else:
+            key = canonical_href(item.get("href") or item.get("source_url") or "")
+        item_hash = content_hash(item.get("title"), item.get("description"))
+        posting = self.state.posting(company, key)
+        if posting is not None and not posting[2] and posting[1] == item_hash:
+            self.state.mark_seen(company, key)
+            self.crawler.stats.inc_value("state/items_unchanged")
+            return None
+        item["change"] = "new" if posting is None or posting[2] else "changed"
+        self.state.save_posting(company, key, item.get("title"), item_hash, dict(item))
+        self.crawler.stats.inc_value(f"state/items_{item['change']}")
+        return item
+
+    def spider_idle(self, spider):
+        removed = []
+        for company in self.companies - self.reported:
+            removed.extend(self.state.pop_removed(company))
+        self.reported |= self.companies
+        if not removed:
+            return
+        for item in removed:
+            item["change"] = "removed"
+        self.crawler.stats.inc_value("state/items_removed", len(removed))
+        self.crawler.engine.crawl(
+            Request("data:,", callback=spider.parse_removed, meta={"removed": removed}, dont_filter=True)
+        )
+        raise DontCloseSpider
+
+    def spider_closed(self, spider):
+        self.state.close()
+
+
+class JobResolutionMiddleware:
+    """
+    Phase B of the crawl.
+
+    - Job page candidates from Phase A (see jobscraper.items.job_page_candidate) are taken
+      out of the callbacks' output and queued - they never reach the item pipelines. Their
+      pages are fetched through the engine into parse_job_page, at most RESOLUTION_CONCURRENCY
+      at a time, scheduled RESOLUTION_BATCH_SIZE at once at RESOLUTION_PRIORITY - so listing
+      pages never wait behind a pile of job pages, and Phase A callbacks never wait for them either.
+      Past RESOLUTION_MEMORY_LIMIT queued candidates, the rest wait on disk (SpillQueue).
+    - Inline jobs (the description came with the listing) pass straight through, as
+      resolved_via="inline" unless their extractor already said where they came from.
+    Sits below CandidateDedupMiddleware and IncrementalCrawlMiddleware, so only the
+    candidates they let through are queued.
+    """
+
+    def __init__(self, crawler, concurrency=16, batch_size=4, priority=-10, memory_limit=0):
+        self.crawler = crawler
+        self.concurrency = max(1, concurrency)
+        self.batch_size = max(1, min(batch_size, self.concurrency))
+        self.priority = priority
+        self.queue = SpillQueue(memory_limit)
+        # resolution_id of the job page requests between engine.crawl and their response / failure
+        self.in_flight = set()
+        self.ids = itertools.count()
 
     @classmethod
     def from_crawler(cls, crawler):
-        # This method is used by Scrapy to create your spiders.
-        s = cls()
-        crawler.signals.connect(s.spider_opened, signal=signals.spider_opened)
-        return s
+        settings = crawler.settings
+        middleware = cls(
+            crawler,
+            concurrency=settings.getint("RESOLUTION_CONCURRENCY"),
+            batch_size=settings.getint("RESOLUTION_BATCH_SIZE"),
+            priority=settings.getint("RESOLUTION_PRIORITY"),
+            memory_limit=settings.getint("RESOLUTION_MEMORY_LIMIT"),
+        )
+        crawler.signals.connect(middleware.response_received, signal=signals.response_received)
+        crawler.signals.connect(middleware.request_dropped, signal=signals.request_dropped)
+        crawler.signals.connect(middleware.spider_idle, signal=signals.spider_idle)
+        crawler.signals.connect(middleware.spider_closed, signal=signals.spider_closed)
+        return middleware
+
+    def process_spider_output(self, response, result, spider=None):
+        for r in result:
+            if self._queued(r):
+                continue
+            yield r
+
+    async def process_spider_output_async(self, response, result, spider=None):
+        async for r in result:
+            if self._queued(r):
+                continue
+            yield r
+
+    def _queued(self, result):
+        if isinstance(result, Request):
+            return False
+        if not is_candidate(result):
+            adapter = ItemAdapter(result)
+            if not adapter.get("resolved_via"):
+                adapter["resolved_via"] = "inline"
+                self.crawler.stats.inc_value("resolution/inline")
+            return False
+        self.queue.append(result)
+        self.crawler.stats.inc_value("resolution/queued")
+        self.crawler.stats.max_value("resolution/queue/max", len(self.queue))
+        self._schedule()
+        return True
+
+    def _schedule(self, force=False):
+        free = self.concurrency - len(self.in_flight)
+        # A batch at a time - unless the crawl is otherwise idle, then whatever fits
+        if free <= 0 or not self.queue or (free < self.batch_size and len(self.queue) > free and not force):
+            return
+        spider = self.crawler.spider
+        for _ in range(min(free, len(self.queue))):
+            job = self.queue.popleft()
+            # The candidate itself becomes the request's job (CandidateDeduper may still improve its title)
+            url = job.pop("resolve_url")
+            resolution_id = next(self.ids)
+            self.in_flight.add(resolution_id)
+            self.crawler.engine.crawl(Request(
+                url,
+                callback=spider.parse_job_page,
+                errback=self.failed,
+                meta={"job": job, "resolution_id": resolution_id},
+                priority=self.priority,
+                dont_filter=True,
+            ))
+            self.crawler.stats.inc_value("resolution/scheduled")
+
+    def _done(self, request):
+        resolution_id = request.meta.get("resolution_id")
+        if resolution_id in self.in_flight:
+            self.in_flight.discard(resolution_id)
+            self._schedule()
+
+    def response_received(self, response, request, spider=None):
+        self._done(request)
+
+    def request_dropped(self, request, spider=None):
+        self._done(request)
+
+    def failed(self, failure):
+        request = failure.request
+        self.crawler.stats.inc_value("resolution/failed")
+        self.crawler.spider.logger.warning(f"Job page {request.url} failed: {failure.value!r}")
+        self._done(request)
+
+    def spider_idle(self, spider=None):
+        # Idle means nothing is scheduled or downloading - anything still here was lost without a signal
+        self.in_flight.clear()
+        if self.queue:
+            self._schedule(force=True)
+            raise DontCloseSpider
+
+    def spider_closed(self, spider=None):
+        self.crawler.stats.set_value("resolution/queue/spilled", self.queue.spilled)
+        self.queue.close()
+
+
+class AdaptiveConcurrencyMiddleware:
+    """
+    Per-host download limits that follow how each host behaves (see jobscraper.throttle.HostLimit),
+    instead of one request at a time with a fixed delay everywhere.
+
+    Drives the concurrency and delay of Scrapy's own per-host download slots: hosts
+    that answer fast get more concurrent requests (up to ADAPTIVE_MAX_CONCURRENCY),
+    slow ones, 429/503 and Retry-After make us back off.
+    ADAPTIVE_HOST_LIMITS overrides the limits for a domain and its subdomains.
+    """
+
+    THROTTLE_CODES = (429, 503)
 
-    def process_request(self, request, spider):
-        # Called for each request that goes through the downloader
-        # middleware.
+    def __init__(self, crawler):
+        self.crawler = crawler
+        settings = crawler.settings
+        self.defaults = {
+            "min_concurrency": 1,
+            "max_concurrency": settings.getint("ADAPTIVE_MAX_CONCURRENCY"),
+            "start_concurrency": settings.getint("CONCURRENT_REQUESTS_PER_DOMAIN"),
+            "min_delay": settings.getfloat("ADAPTIVE_MIN_DELAY"),
+            "max_delay": settings.getfloat("ADAPTIVE_MAX_DELAY"),
+            "start_delay": settings.getfloat("DOWNLOAD_DELAY"),
+            "target_latency": settings.getfloat("ADAPTIVE_TARGET_LATENCY"),
+        }
+        self.overrides = {k.lower(): v for k, v in settings.getdict("ADAPTIVE_HOST_LIMITS").items()}
+        self.max_retry_after = settings.getfloat("ADAPTIVE_MAX_RETRY_AFTER")
+        self.hosts = {}
 
-        # Must either:
-        # - return None: continue processing this request
-        # - or return a Response object
-        # - or return a Request object
-        # - or raise IgnoreRequest: process_exception() methods of
-        #   installed downloader middleware will be called
+    @classmethod
+    def from_crawler(cls, crawler):
+        if not crawler.settings.getbool("ADAPTIVE_CONCURRENCY_ENABLED"):
+            raise NotConfigured
+        return cls(crawler)
+
+    def process_request(self, request, spider=None):
+        self._apply(request)
         return None
 
-    def process_response(self, request, response, spider):
-        # Called with the response returned from the downloader.
+    def process_response(self, request, response, spider=None):
+        limit = self._limit(request)
+        stats = self.crawler.stats
+        if response.status in self.THROTTLE_CODES:
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            if retry_after is not None:
+                retry_after = min(retry_after, self.max_retry_after)
+                stats.inc_value("adaptive/retry_after")
+            limit.record_throttled(retry_after)
+            stats.inc_value("adaptive/throttled")
+            stats.inc_value(f"adaptive/throttled/{response.status}")
+        elif "download_latency" in request.meta:
+            limit.record_success(request.meta["download_latency"])
+        stats.max_value("adaptive/concurrency/max", limit.concurrency)
+        self._apply(request)
+        return response
+
+    def process_exception(self, request, exception, spider=None):
+        # Timeouts, refused connections, ...: the host may be struggling
+        self._limit(request).back_off()
+        self.crawler.stats.inc_value("adaptive/backoff_errors")
+        self._apply(request)
+        return None
+
+    def _key(self, request):
+        return self.crawler.engine.downloader.get_slot_key(request)
+
+    def _limit(self, request):
+        key = self._key(request)
+        limit = self.hosts.get(key)
+        if limit is None:
+            options = dict(self.defaults)
+            options.update(host_settings(urlparse_cached(request).hostname, self.overrides))
+            limit = self.hosts[key] = HostLimit(**options)
+        return limit
+
+    def _apply(self, request):
+        limit = self._limit(request)
+        # Slots are created by the downloader on the first request to a host (and dropped when idle)
+        slot = self.crawler.engine.downloader.slots.get(self._key(request))
+        if slot is not None:
+            slot.concurrency = limit.concurrency
+            slot.delay = limit.current_delay()
+
+
+class HostHealthMiddleware:
+    """
+    Classifies failed downloads (auth wall, 403, TLS, DNS, timeout, refused connection -
+    see jobscraper.health) and stops hammering hosts that keep failing.
 
-        # Must either;
-        # - return a Response object
-        # - return a Request object
-        # - or raise IgnoreRequest
+    - Each host has an in-run CircuitBreaker: after HOST_BREAKER_THRESHOLD failed requests
+      in a row its requests are dropped (IgnoreRequest) until the cooldown has passed.
+    - Failures go to the spider's HostHealth (if it has one) under the careers page they
+      were for, so later runs skip that board - not every company of a shared ATS host - for
+      a while. Whether a board worked is the spider's call (it found jobs), not a 200's.
+      request.meta["health_outcome"] says what a response was.
+    Only requests of a board count (they carry its job): robots.txt and sitemaps say nothing
+    about it. Sits below RetryMiddleware and sees every attempt, but a retried request only
+    counts once.
+    """
+
+    def __init__(self, crawler):
+        self.crawler = crawler
+        settings = crawler.settings
+        self.threshold = settings.getint("HOST_BREAKER_THRESHOLD")
+        self.cooldown = settings.getfloat("HOST_BREAKER_COOLDOWN")
+        self.max_cooldown = settings.getfloat("HOST_BREAKER_MAX_COOLDOWN")
+        self.breakers = {}
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        if not crawler.settings.getint("HOST_BREAKER_THRESHOLD"):
+            raise NotConfigured
+        return cls(crawler)
+
+    def process_request(self, request, spider=None):
+        if not self._is_board(request):
+            return None
+        host = urlparse_cached(request).hostname
+        if not self._breaker(host).allow():
+            self.crawler.stats.inc_value("health/breaker_dropped")
+            raise IgnoreRequest(f"Circuit breaker open for {host}")
+        return None
+
+    def process_response(self, request, response, spider=None):
+        if not self._is_board(request):
+            return response
+        outcome = classify_response(request, response)
+        if outcome:
+            request.meta["health_outcome"] = outcome
+            self._failed(request, outcome)
+        elif response.status < 400:
+            self._breaker(urlparse_cached(request).hostname).record_success()
         return response
 
-    def process_exception(self, request, exception, spider):
-        # Called when a download handler or a process_request()
-        # (from other downloader middleware) raises an exception.
+    def process_exception(self, request, exception, spider=None):
+        if not self._is_board(request):
+            return None
+        outcome = classify_failure(exception)
+        if outcome:
+            self._failed(request, outcome)
+        return None
+
+    def _is_board(self, request):
+        job = request.meta.get("job")
+        if not job or request.meta.get("dont_obey_robotstxt") or urlparse_cached(request).path == "/robots.txt":
+            return False
+        # Sitemaps are the host's, and data: requests no download at all
+        return "sitemap_host" not in request.meta and urlparse_cached(request).scheme in ("http", "https")
+
+    def _failed(self, request, outcome):
+        if request.meta.get("retry_times"):
+            # Its first attempt already counted
+            return
+        host = urlparse_cached(request).hostname
+        breaker = self._breaker(host)
+        was_open = breaker.is_open
+        breaker.record_failure()
+        stats = self.crawler.stats
+        stats.inc_value(f"health/failures/{outcome}")
+        if breaker.is_open and not was_open:
+            stats.inc_value("health/breaker_opened")
+            self.crawler.spider.logger.info(f"Circuit breaker opened for {host} ({outcome})")
+        health = self._health()
+        if health is not None:
+            health.failed(request.meta["job"]["source_url"], outcome)
 
-        # Must either:
-        # - return None: continue processing this exception
-        # - return a Response object: stops process_exception() chain
-        # - return a Request object: stops process_exception() chain
-        pass
+    def _breaker(self, host):
+        breaker = self.breakers.get(host)
+        if breaker is None:
+            breaker = self.breakers[host] = CircuitBreaker(self.threshold, self.cooldown, self.max_cooldown)
+        return breaker
 
-    def spider_opened(self, spider):
-        spider.logger.info("Spider opened: %s" % spider.name)
+    def _health(self):
+        return getattr(self.crawler.spider, "host_health", None)
@@ -0,0 +1,140 @@
+import asyncio
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from parsel import Selector
+
+from jobscraper.dom import job_title, scan_job_links
+from jobscraper.jsonfind import find_description, job_title_and_url, jobs_at, scan_json
+
+
+# The heavy parsing steps of the spider, as plain functions of plain data, so they
+# can run in a worker thread or process. They return small results (not the parsed
+# tree) to keep the hand-off cheap.
+
+def next_data_links(text, keywords, known_paths=None):
+    """
+    (links, paths, remembered) for a __NEXT_DATA__ blob, None if it is not valid JSON.
+
+    links: (title, url) of every job-like object with a role we look for. paths: where the
+    job lists with such jobs were. If `known_paths` (from an earlier run) still hold them,
+    only those are read and the document is not walked at all (remembered=True).
+    """
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError:
+        return None
+    job_lists, remembered = _job_lists(data, known_paths, keywords)
+    links = [job_title_and_url(obj) for _, objs in job_lists for obj in objs]
+    return links, [path for path, _ in job_lists], remembered
+
+
+def api_jobs(text, keywords, known_paths=None):
+    """
+    Like next_data_links, for the JSON payload of a careers API: jobs are
+    (title, url, description), the description being None if the job objects don't carry one.
+    """
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError:
+        return None
+    job_lists, remembered = _job_lists(data, known_paths, keywords)
+    jobs = [
+        job_title_and_url(obj) + (find_description(obj),)
+        for _, objs in job_lists for obj in objs
+    ]
+    return jobs, [path for path, _ in job_lists], remembered
+
+
+def _job_lists(data, known_paths, keywords=None):
+    # The remembered paths only count if they still have jobs of our roles - else the site moved them
+    job_lists = _with_roles(jobs_at(data, known_paths), keywords) if known_paths else []
+    if job_lists:
+        return job_lists, True
+    return _with_roles(scan_json(data, description=False)[0], keywords), False
+
+
+def _with_roles(job_lists, keywords):
+    """
+    job_lists with only their job objects of a role in `keywords` (all of them if None),
+    and without the lists left empty.
+    """
+    kept = []
+    for path, objs in job_lists:
+        objs = [obj for obj in objs if isinstance(obj, dict) and (keywords is None or _has_role(obj, keywords))]
+        if objs:
+            kept.append((path, objs))
+    return kept
+
+
+def _has_role(obj, keywords):
+    title = job_title_and_url(obj)[0]
+    return isinstance(title, str) and keywords.role_family(title) is not None
+
+
+def next_data_description(text):
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError:
+        return None
+    return find_description(data)
+
+
+def html_job_links(text, keywords):
+    """
+    (text, href) candidates of html_extract, from the page source.
+    """
+    root = Selector(text=text, type="html").root
+    return list(scan_job_links(root, lambda t: job_title(t, keywords)))
+
+
+class Offloader:
+    """
+    Runs the functions above in a thread/process pool, or inline.
+
+    OFFLOAD_MODE:      None (inline, default), "thread" or "process".
+    OFFLOAD_WORKERS:   pool size, defaults to the number of CPUs.
+    OFFLOAD_MIN_BYTES: inputs smaller than this are still parsed inline - the
+                       hand-off costs more than it saves for ordinary pages.
+    """
+
+    def __init__(self, mode=None, workers=None, min_bytes=0, crawler=None):
+        self.mode = mode
+        self.min_bytes = min_bytes
+        # Stats are only available once the crawl started, so they are looked up when used
+        self.crawler = crawler
+        self.executor = None
+        if mode == "thread":
+            self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="offload")
+        elif mode == "process":
+            # Not forked: the crawling process has a reactor and other threads running
+            self.executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        elif mode:
+            raise ValueError(f"Unknown OFFLOAD_MODE {mode!r}, expected 'thread' or 'process'")
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        return cls(
+            mode=settings.get("OFFLOAD_MODE"),
+            workers=settings.getint("OFFLOAD_WORKERS") or os.cpu_count(),
+            min_bytes=settings.getint("OFFLOAD_MIN_BYTES"),
+            crawler=crawler,
+        )
+
+    def offloads(self, size):
+        return self.executor is not None and size >= self.min_bytes
+
+    async def run(self, fn, *args, size=0):
+        if not self.offloads(size):
+            return fn(*args)
+        if self.crawler:
+            self.crawler.stats.inc_value(f"offload/{fn.__name__}")
+            self.crawler.stats.inc_value("offload/bytes", size)
+        return await asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
@@ -5,31 +5,46 @@
 
 
 # useful for handling different item types with a single interface
-from scrapy import Request
+from itemadapter import ItemAdapter
+from scrapy.exceptions import NotConfigured
 
+from jobscraper.export import CorpusWriter
 
-class JobResolutionPipeline:
+
+class CorpusExportPipeline:
     """
-    Pipeline that:
-    - Receives Phase A items
-    - Schedules Phase B requests if needed
+    Adds every item to the compact corpus in EXPORT_DIR (see jobscraper.export) -
+    compressed parts, each description stored once. Items pass on unchanged, so the
+    feed exports still work alongside it.
     """
 
-    def process_item(self, item, spider):
-        # Only act on Phase A spider output
-        if spider.name != "job_discovery":
-            return item
-
-        # Case 1: job has its own page → schedule Phase B fetch
-        if item.get("href"):
-            spider.logger.warning(f"SCHEDULING {item['href']}")
-            return Request(
-                url=item["href"],
-                callback=spider.parse_job_page,
-                meta={"job": dict(item)},
-                dont_filter=True,
-            )
-
-        # Case 2: inline job → pass through unchanged
-        item["resolved_via"] = "inline"
+    def __init__(self, writer, stats):
+        self.writer = writer
+        self.stats = stats
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        if not settings.get("EXPORT_DIR"):
+            raise NotConfigured("EXPORT_DIR is not set")
+        writer = CorpusWriter(
+            settings.get("EXPORT_DIR"),
+            fmt=settings.get("EXPORT_FORMAT"),
+            codec=settings.get("EXPORT_CODEC"),
+            level=settings.getint("EXPORT_LEVEL") or None,
+            batch_size=settings.getint("EXPORT_BATCH_SIZE"),
+            rotate_items=settings.getint("EXPORT_ROTATE_ITEMS"),
+        )
+        return cls(writer, crawler.stats)
+
+    def process_item(self, item, spider=None):
+        known = len(self.writer.known)
+        digest = self.writer.write(ItemAdapter(item).asdict())
+        self.stats.inc_value("export/items")
+        if digest:
+            new = len(self.writer.known) > known
+            self.stats.inc_value("export/descriptions_new" if new else "export/descriptions_reused")
         return item
+
+    def close_spider(self, spider=None):
+        self.writer.close()
@@ -0,0 +1,111 @@
+import asyncio
+from urllib.parse import urlparse
+
+from playwright.async_api import Error as PlaywrightError
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+# True once the page has something parse can use: a data script, or a link whose text looks like a job
+JOB_SIGNALS_JS = """
+(pattern) => {
+    if (document.getElementById('__NEXT_DATA__')) return true;
+    for (const script of document.scripts) {
+        if (script.text.includes('COMPANY_POSITIONS_DATA')) return true;
+    }
+    const role = new RegExp(pattern, 'i');
+    for (const a of document.querySelectorAll('a[href]')) {
+        if (role.test(a.textContent)) return true;
+    }
+    return false;
+}
+"""
+
+
+async def wait_for_jobs(page, role_pattern, timeout=10, settle=0.25):
+    """
+    Page method for renders: return as soon as the page shows job links, __NEXT_DATA__
+    or COMPANY_POSITIONS_DATA (then give the list `settle` more seconds to finish
+    rendering), instead of waiting for networkidle - which chatty sites take ages to reach.
+    After `timeout` seconds the page is used as it is. Returns whether jobs showed up.
+    """
+    try:
+        await page.wait_for_function(JOB_SIGNALS_JS, arg=role_pattern, timeout=timeout * 1000, polling=100)
+    except PlaywrightTimeoutError:
+        return False
+    if settle:
+        await page.wait_for_timeout(settle * 1000)
+    return True
+
+
+class ResourceBlocker:
+    """
+    PLAYWRIGHT_ABORT_REQUEST callable: aborts browser requests for resource types we never
+    parse (images, fonts, ...) and for analytics/ads hosts (and their subdomains).
+    """
+
+    def __init__(self, resource_types=(), hosts=(), stats=None):
+        self.resource_types = set(resource_types)
+        self.hosts = {h.lower() for h in hosts}
+        self.stats = stats
+
+    def __call__(self, request):
+        if request.is_navigation_request():
+            # The page itself (or a frame of it)
+            return False
+        reason = None
+        if request.resource_type in self.resource_types:
+            reason = request.resource_type
+        elif self.hosts and self._blocked_host(urlparse(request.url).hostname or ""):
+            reason = "host"
+        if reason and self.stats is not None:
+            self.stats.inc_value(f"render/blocked/{reason}")
+        return reason is not None
+
+    def _blocked_host(self, host):
+        parts = host.lower().split(".")
+        return any(".".join(parts[i:]) in self.hosts for i in range(len(parts) - 1))
+
+
+class JsonCapture:
+    """
+    Keeps the JSON bodies of the XHR/fetch responses a page gets while it renders -
+    single page apps usually load their job list from an API call.
+    Captures are dicts: url, method, body and content_type of the request, status and text of the response.
+    """
+
+    def __init__(self, max_bytes, max_responses):
+        self.max_bytes = max_bytes
+        self.max_responses = max_responses
+        self.captured = []
+        self.tasks = []
+
+    def on_response(self, response):
+        if response.request.resource_type not in ("xhr", "fetch") or len(self.tasks) >= self.max_responses:
+            return
+        headers = response.headers
+        if "json" not in headers.get("content-type", ""):
+            return
+        if int(headers.get("content-length") or 0) > self.max_bytes:
+            return
+        self.tasks.append(asyncio.ensure_future(self._read(response)))
+
+    async def _read(self, response):
+        try:
+            body = await response.body()
+        except PlaywrightError:
+            # The page was closed first
+            return
+        if len(body) > self.max_bytes:
+            return
+        request = response.request
+        self.captured.append({
+            "url": response.url,
+            "method": request.method,
+            "body": request.post_data,
+            "content_type": request.headers.get("content-type"),
+            "status": response.status,
+            "text": body.decode("utf8", "replace"),
+        })
+
+    async def wait(self):
+        if self.tasks:
+            await asyncio.gather(*self.tasks, return_exceptions=True)
@@ -0,0 +1,121 @@
+import pickle
+import shutil
+import tempfile
+from collections import deque
+
+from queuelib import FifoDiskQueue
+from scrapy.core.scheduler import Scheduler
+
+
+class SpillingScheduler(Scheduler):
+    """
+    Scrapy's scheduler with at most SCHEDULER_MEMORY_LIMIT requests in memory - the rest
+    wait in its disk queues (JOBDIR's, or a temporary directory removed at close), so
+    tens of thousands of boards don't all sit in memory as start requests.
+    Requests that can't be serialized (a callback that isn't a spider method) stay in
+    memory. 0 keeps Scrapy's own behaviour.
+
+    Memory fills first, so the disk queue may hold requests of a higher priority than
+    all of memory (follow-ups yielded while thousands of start requests wait): the next
+    request comes from whichever queue has the highest priority at its head.
+    """
+
+    def __init__(self, *args, memory_limit=0, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.memory_limit = memory_limit
+        self.tmpdir = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        scheduler = super().from_crawler(crawler)
+        scheduler.memory_limit = crawler.settings.getint("SCHEDULER_MEMORY_LIMIT")
+        if scheduler.memory_limit and not scheduler.dqdir:
+            scheduler.tmpdir = tempfile.mkdtemp(prefix="jobscraper-requests-")
+            scheduler.dqdir = scheduler._dqdir(scheduler.tmpdir)
+        return scheduler
+
+    def _dqpush(self, request):
+        # Memory first - the disk queue only takes what doesn't fit
+        if self.memory_limit and len(self.mqs) < self.memory_limit:
+            return False
+        return super()._dqpush(request)
+
+    def next_request(self):
+        if self.memory_limit and self.dqs is not None:
+            disk = _head(self.dqs)
+            memory = _head(self.mqs)
+            # Priority queues are keyed by -priority: the lower key goes first
+            if disk is not None and (memory is None or disk < memory):
+                request = self._dqpop()
+                if request is not None:
+                    self.stats.inc_value("scheduler/dequeued/disk")
+                    self.stats.inc_value("scheduler/dequeued")
+                    return request
+        return super().next_request()
+
+    def close(self, reason):
+        result = super().close(reason)
+        if self.tmpdir:
+            shutil.rmtree(self.tmpdir, ignore_errors=True)
+        return result
+
+
+def _head(queue):
+    """
+    Key (-priority) of the next request of a priority queue, None if it is empty.
+    DownloaderAwarePriorityQueue keeps one queue per download slot: the best of them.
+    """
+    if hasattr(queue, "pqueues"):
+        heads = [q.curprio for q in queue.pqueues.values() if q.curprio is not None]
+        return min(heads) if heads else None
+    return queue.curprio
+
+
+class SpillQueue:
+    """
+    FIFO with at most `memory_limit` entries in memory; the rest are pickled to a disk queue
+    in `directory` (a temporary directory if None, removed by close()). 0 = all in memory.
+    """
+
+    def __init__(self, memory_limit=0, directory=None):
+        self.memory_limit = memory_limit
+        self.directory = directory
+        self.memory = deque()
+        self.disk = None
+        self.tmpdir = None
+        self.spilled = 0
+
+    def __len__(self):
+        return len(self.memory) + (len(self.disk) if self.disk is not None else 0)
+
+    def append(self, value):
+        on_disk = self.disk is not None and len(self.disk)
+        if self.memory_limit and (on_disk or len(self.memory) >= self.memory_limit):
+            # Once anything is on disk, new entries go behind it
+            self._disk().push(pickle.dumps(value, protocol=4))
+            self.spilled += 1
+        else:
+            self.memory.append(value)
+
+    def popleft(self):
+        if not self.memory and self.disk is not None:
+            while len(self.memory) < self.memory_limit:
+                data = self.disk.pop()
+                if data is None:
+                    break
+                self.memory.append(pickle.loads(data))
+        return self.memory.popleft()
+
+    def close(self):
+        if self.disk is not None:
+            self.disk.close()
+        if self.tmpdir:
+            shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def _disk(self):
+        if self.disk is None:
+            directory = self.directory
+            if directory is None:
+                directory = self.tmpdir = tempfile.mkdtemp(prefix="jobscraper-queue-")
+            self.disk = FifoDiskQueue(directory)
+        return self.disk
@@ -14,15 +14,71 @@ NEWSPIDER_MODULE = "jobscraper.spiders"
 
 TWISTED_REACTOR = "twisted.internet.asyncioreactor.AsyncioSelectorReactor"
 
+# Plain HTTP by default, Playwright only for requests with meta["playwright"]
 DOWNLOAD_HANDLERS = {
-    "http": "scrapy_playwright.handler.ScrapyPlaywrightDownloadHandler",
-    "https": "scrapy_playwright.handler.ScrapyPlaywrightDownloadHandler",
+    "http": "jobscraper.handlers.HybridDownloadHandler",
+    "https": "jobscraper.handlers.HybridDownloadHandler",
 }
 
+# JSON file of the role families to look for, and the generic/noise words (None: the
+# built-in DevOps/MLOps/SRE set, see jobscraper.keywords.DEFAULT_KEYWORDS for the format)
+KEYWORDS_FILE = None
+
+# Careers pages that needed a browser render are remembered here and rendered right away next run
+RENDER_MEMORY_FILE = "render_domains.json"
+
+# Where each careers page's __NEXT_DATA__ keeps its jobs, so later runs skip walking the whole blob
+JSON_PATHS_FILE = "json_paths.json"
+
+# Careers APIs that renders saw the job list come from, per careers page - later runs call them directly (None to disable)
+API_ENDPOINTS_FILE = "api_endpoints.json"
+
+# Before a careers page is parsed (or rendered), look for its job pages in the site's sitemaps and feeds:
+# /sitemap.xml, the Sitemap: lines of robots.txt and the indexes they point to (see parse_sitemap), read once
+# per host and run for all its boards. The page itself is only parsed when they list none of its jobs.
+SITEMAP_DISCOVERY = True
+# Most sitemap files read per host, indexes included - job-named ones go first
+SITEMAP_MAX_FILES = 10
+# Decompressed bytes read of one sitemap at most (the sitemap protocol's own limit is 50MB)
+SITEMAP_MAX_SIZE = 50 * 1024 * 1024
+# Hosts whose sitemaps had no jobs - their careers pages are parsed directly until SITEMAP_RECHECK_SECS later
+SITEMAP_MEMORY_FILE = "sitemap_misses.json"
+SITEMAP_RECHECK_SECS = 7 * 24 * 3600
+
+# Parse big __NEXT_DATA__ blobs / pages off the reactor thread: None (inline), "thread" or "process".
+# Only inputs of at least OFFLOAD_MIN_BYTES are handed to the pool (OFFLOAD_WORKERS, 0 = one per CPU).
+OFFLOAD_MODE = None
+OFFLOAD_WORKERS = 0
+OFFLOAD_MIN_BYTES = 256 * 1024
+
+# What previous runs saw - only new/changed/removed postings are output. Set to None for a full dump.
+CRAWL_STATE_FILE = "crawl_state.sqlite"
+
 # Optional: See the browser in action while debugging
 PLAYWRIGHT_LAUNCH_OPTIONS = {
     "headless": True, 
 }
+
+# Renders share RENDER_CONTEXTS browser contexts, each replaced after RENDER_CONTEXT_MAX_PAGES pages
+# to keep browser memory down, with at most PLAYWRIGHT_MAX_PAGES_PER_CONTEXT pages open in each
+RENDER_CONTEXTS = 2
+RENDER_CONTEXT_MAX_PAGES = 50
+PLAYWRIGHT_MAX_PAGES_PER_CONTEXT = 4
+# A render is done once job links / __NEXT_DATA__ / COMPANY_POSITIONS_DATA show up (plus RENDER_WAIT_SETTLE
+# seconds), or after RENDER_WAIT_TIMEOUT seconds with whatever the page has by then
+RENDER_WAIT_TIMEOUT = 10
+RENDER_WAIT_SETTLE = 0.25
+# JSON responses (XHR/fetch) a render keeps for parse to look for a job list in - at most this many, this big
+RENDER_CAPTURE_MAX_RESPONSES = 20
+RENDER_CAPTURE_MAX_BYTES = 2 * 1024 * 1024
+# The browser never downloads these - nothing we parse (ignored if PLAYWRIGHT_ABORT_REQUEST is set)
+RENDER_BLOCK_RESOURCE_TYPES = ["image", "media", "font", "stylesheet", "texttrack", "manifest"]
+RENDER_BLOCK_HOSTS = [
+    "google-analytics.com", "googletagmanager.com", "doubleclick.net", "googlesyndication.com",
+    "facebook.net", "hotjar.com", "segment.com", "segment.io", "mixpanel.com", "fullstory.com",
+    "clarity.ms", "hs-analytics.net", "hs-scripts.com", "intercom.io", "intercomcdn.com",
+    "optimizely.com", "nr-data.net", "newrelic.com", "quantserve.com", "criteo.com", "taboola.com",
+]
 ADDONS = {}
 
 
@@ -34,7 +90,8 @@ ROBOTSTXT_OBEY = True
 LOG_LEVEL = 'INFO'
 
 # Concurrency and throttling settings
-#CONCURRENT_REQUESTS = 16
+CONCURRENT_REQUESTS = 32
+# Where every host starts - AdaptiveConcurrencyMiddleware takes it from there
 CONCURRENT_REQUESTS_PER_DOMAIN = 1
 DOWNLOAD_DELAY = 1
 DNS_RESOLVER = 'scrapy.resolver.CachingHostnameResolver'
@@ -55,27 +112,112 @@ DOWNLOADER_CLIENTCONTEXTFACTORY = 'jobscraper.context.CustomContextFactory'
 
 # Enable or disable spider middlewares
 # See https://docs.scrapy.org/en/latest/topics/spider-middleware.html
-#SPIDER_MIDDLEWARES = {
-#    "jobscraper.middlewares.JobscraperSpiderMiddleware": 543,
-#}
+SPIDER_MIDDLEWARES = {
+    # Closest to the spider (past Referer 700, UrlLength 800, Depth 900), so it times the callbacks
+    # alone and sees everything they yield
+    "jobscraper.middlewares.JobscraperSpiderMiddleware": 950,
+    "jobscraper.middlewares.CandidateDedupMiddleware": 550,
+    "jobscraper.middlewares.IncrementalCrawlMiddleware": 540,
+    # Takes the job page candidates out of the output (Phase B) - after dedup and the incremental filter
+    "jobscraper.middlewares.JobResolutionMiddleware": 530,
+}
 
 # Enable or disable downloader middlewares
 # See https://docs.scrapy.org/en/latest/topics/downloader-middleware.html
-#DOWNLOADER_MIDDLEWARES = {
-#    "jobscraper.middlewares.JobscraperDownloaderMiddleware": 543,
-#}
+DOWNLOADER_MIDDLEWARES = {
+    # Between RetryMiddleware (550) and the redirect ones (580, 600): sees every attempt, and where redirects ended
+    "jobscraper.middlewares.HostHealthMiddleware": 570,
+    "jobscraper.middlewares.AdaptiveConcurrencyMiddleware": 940,
+    # Closest to the downloader, so the timings don't include the other middlewares
+    "jobscraper.middlewares.JobscraperDownloaderMiddleware": 950,
+}
+
+# Per-host concurrency/delay that adapts to latency, 429/503 and Retry-After (don't combine with AutoThrottle).
+# Fast hosts go up to ADAPTIVE_MAX_CONCURRENCY requests at once, ADAPTIVE_MIN_DELAY apart.
+ADAPTIVE_CONCURRENCY_ENABLED = True
+ADAPTIVE_MAX_CONCURRENCY = 4
+ADAPTIVE_MIN_DELAY = 0.25
+ADAPTIVE_MAX_DELAY = 60
+ADAPTIVE_TARGET_LATENCY = 2.0
+ADAPTIVE_MAX_RETRY_AFTER = 300
+# Per domain (and its subdomains): min/max/start_concurrency, min/max/start_delay, target_latency
+ADAPTIVE_HOST_LIMITS = {
+    # Shared ATS hosts serve many of our boards plus all their posting pages
+    "comeet.com": {"max_concurrency": 8, "min_delay": 0.1},
+    "greenhouse.io": {"max_concurrency": 8, "min_delay": 0.1},
+    "lever.co": {"max_concurrency": 6, "min_delay": 0.1},
+    "ashbyhq.com": {"max_concurrency": 6, "min_delay": 0.1},
+    "workable.com": {"max_concurrency": 6, "min_delay": 0.1},
+    "myworkdayjobs.com": {"max_concurrency": 4, "min_delay": 0.25},
+    # Blocks quickly - stay at one request every few seconds
+    "linkedin.com": {"max_concurrency": 1, "min_delay": 3, "start_delay": 3},
+}
+
+# Careers pages that failed (auth wall, 403, TLS, DNS, timeout...) or never had a job (see jobscraper.health)
+# - skipped for HOST_HEALTH_BACKOFF seconds after a failing run, twice as long after each further one, up to
+# HOST_HEALTH_MAX_BACKOFF. None to try everything every run.
+HOST_HEALTH_FILE = "host_health.json"
+HOST_HEALTH_BACKOFF = 20 * 3600
+HOST_HEALTH_MAX_BACKOFF = 30 * 24 * 3600
+# Once their backoff is over they are tried again, after the healthy boards
+HOST_HEALTH_RETRY_PRIORITY = -5
+# In-run circuit breaker: after HOST_BREAKER_THRESHOLD failed board requests in a row (a request's retries
+# count once) a host gets no requests for HOST_BREAKER_COOLDOWN seconds, then one to try it (doubling the
+# cooldown while it fails, up to HOST_BREAKER_MAX_COOLDOWN). 0 disables the breaker and the failure bookkeeping.
+HOST_BREAKER_THRESHOLD = 3
+HOST_BREAKER_COOLDOWN = 300
+HOST_BREAKER_MAX_COOLDOWN = 3600
 
 # Enable or disable extensions
 # See https://docs.scrapy.org/en/latest/topics/extensions.html
-#EXTENSIONS = {
+EXTENSIONS = {
 #    "scrapy.extensions.telnet.TelnetConsole": None,
-#}
+    "jobscraper.extensions.LoopLagMonitor": 500,
+    "jobscraper.extensions.MetricsExporter": 510,
+}
+
+# Reactor loop lag stats (loop_lag/*), sampled every LOOP_LAG_INTERVAL seconds
+LOOP_LAG_INTERVAL = 0.1
+
+# Instrumentation (timing/*, resolved/*, candidates/*, queue/* stats). Queue depths are sampled every
+# METRICS_INTERVAL seconds; set METRICS_PORT to serve live metrics on http://METRICS_HOST:METRICS_PORT/metrics.
+# Per-domain series are exported for the METRICS_TOP_DOMAINS slowest domains, the rest as domain="other"
+METRICS_INTERVAL = 1.0
+METRICS_HOST = "127.0.0.1"
+METRICS_PORT = None
+METRICS_TOP_DOMAINS = 20
 
 # Configure item pipelines
 # See https://docs.scrapy.org/en/latest/topics/item-pipeline.html
-# ITEM_PIPELINES = {
-#    "jobscraper.pipelines.JobResolutionPipeline": 300,
-# }
+ITEM_PIPELINES = {
+   "jobscraper.pipelines.CorpusExportPipeline": 800,
+}
+
+# Phase B (JobResolutionMiddleware): job pages of the candidates Phase A found are fetched at most
+# RESOLUTION_CONCURRENCY at a time, RESOLUTION_BATCH_SIZE scheduled together, at RESOLUTION_PRIORITY
+# (below the listing pages' 0, so discovery goes first)
+RESOLUTION_CONCURRENCY = 16
+RESOLUTION_BATCH_SIZE = 4
+RESOLUTION_PRIORITY = -10
+
+# Bounded memory on big crawls (see jobscraper.scheduler): at most SCHEDULER_MEMORY_LIMIT requests wait in
+# memory, the rest in a disk queue (JOBDIR's, or a temporary one); the same for the job page candidates
+# waiting for Phase B, past RESOLUTION_MEMORY_LIMIT. 0 keeps everything in memory.
+SCHEDULER = "jobscraper.scheduler.SpillingScheduler"
+SCHEDULER_MEMORY_LIMIT = 5000
+RESOLUTION_MEMORY_LIMIT = 5000
+
+# Compact item corpus that every run adds to (see jobscraper.export.Corpus to read it back):
+# compressed JSON Lines ("jsonl", EXPORT_CODEC "gzip" or "zstd" - needs zstandard) or "parquet"
+# (needs pyarrow), each description stored once. None disables it.
+EXPORT_DIR = None
+EXPORT_FORMAT = "jsonl"
+EXPORT_CODEC = "gzip"
+# Compression level, 0 for the codec's default
+EXPORT_LEVEL = 0
+# Items are written in batches of EXPORT_BATCH_SIZE, to a new part every EXPORT_ROTATE_ITEMS items
+EXPORT_BATCH_SIZE = 500
+EXPORT_ROTATE_ITEMS = 50000
 
 # Enable and configure the AutoThrottle extension (disabled by default)
 # See https://docs.scrapy.org/en/latest/topics/autothrottle.html
@@ -90,13 +232,27 @@ DOWNLOADER_CLIENTCONTEXTFACTORY = 'jobscraper.context.CustomContextFactory'
 # Enable showing throttling stats for every response received:
 #AUTOTHROTTLE_DEBUG = False
 
-# Enable and configure HTTP caching (disabled by default)
+# HTTP cache of plain and rendered responses, each body stored once, compressed (see jobscraper.httpcache).
+# Opt-in (main.py --cache): runs with it keep what HTTPCACHE_REPLAY replays, and don't refetch pages they
+# already got within HTTPCACHE_EXPIRATION_SECS.
 # See https://docs.scrapy.org/en/latest/topics/downloader-middleware.html#httpcache-middleware-settings
-#HTTPCACHE_ENABLED = True
-#HTTPCACHE_EXPIRATION_SECS = 0
-#HTTPCACHE_DIR = "httpcache"
-#HTTPCACHE_IGNORE_HTTP_CODES = []
-#HTTPCACHE_STORAGE = "scrapy.extensions.httpcache.FilesystemCacheStorage"
+HTTPCACHE_ENABLED = False
+HTTPCACHE_DIR = "httpcache"
+HTTPCACHE_STORAGE = "jobscraper.httpcache.ContentAddressedCacheStorage"
+# Pages are downloaded again once older than this - a daily crawl refetches, a rerun the same day doesn't
+HTTPCACHE_EXPIRATION_SECS = 20 * 3600
+# Per domain (and its subdomains) TTL in seconds, 0 to never refetch
+HTTPCACHE_HOST_TTLS = {}
+# Entries no run stored or served for this long are deleted when the spider closes (0 = kept forever)
+HTTPCACHE_EVICT_SECS = 7 * 24 * 3600
+# Throttling and server errors would be served again until they expire
+HTTPCACHE_IGNORE_HTTP_CODES = [408, 429, 500, 502, 503, 504]
+HTTPCACHE_IGNORE_SCHEMES = ["file", "data"]
+# zlib level of the stored bodies, 0 for the default
+HTTPCACHE_LEVEL = 0
+# Offline: re-run the callbacks over what the cache has, whatever its age - nothing is downloaded,
+# and the crawl state / corpus are left alone (scrapy crawl job_discovery -s HTTPCACHE_REPLAY=1 ...)
+HTTPCACHE_REPLAY = False
 
 # Set settings whose default value is deprecated to a future-proof value
 FEED_EXPORT_ENCODING = "utf-8"
@@ -0,0 +1,193 @@
+import re
+import zlib
+from urllib.parse import unquote, urlsplit
+
+from lxml import etree
+
+from jobscraper.memory import domain_of
+
+# Path of a job posting: a jobs/careers/... segment, then something more (the posting itself)
+JOB_PATH = re.compile(
+    r"/(?:jobs?|careers?|positions?|openings?|vacanc\w*|opportunit\w*|join[-_]?us|hiring)(?:[-_][\w-]*)?/[^/]+",
+    re.IGNORECASE,
+)
+# First path segment of a careers page that is about jobs, not a company on a shared host
+JOBS_SEGMENT = re.compile(r"^(?:jobs?|careers?|positions?|openings?|vacanc\w*|opportunit\w*|join[-_]?us|hiring)$", re.IGNORECASE)
+# Sitemaps (of an index, or robots.txt) worth reading first
+JOB_SITEMAP = re.compile(r"job|career|position|opening|vacanc|recruit|hiring", re.IGNORECASE)
+SLUG_SEPARATORS = re.compile(r"[-_+.,~\s]+")
+# Ids and file extensions in slugs ("12345", "a1b2c3d4e5", "html")
+SLUG_NOISE = re.compile(r"^(?:\d+|[0-9a-f]{8,}|[0-9a-f-]{36}|html?|php|aspx?)$", re.IGNORECASE)
+
+# Elements of sitemaps, sitemap indexes, RSS and Atom with a URL in them, any namespace
+ENTRY_TAGS = ("{*}url", "{*}sitemap", "{*}item", "{*}entry")
+GZIP_MAGIC = b"\x1f\x8b"
+CHUNK = 64 * 1024
+
+
+def robots_sitemaps(robotparser):
+    """
+    Sitemap: URLs of a robots.txt parser (Protego, Scrapy's default - the others don't keep them).
+    """
+    rp = getattr(robotparser, "rp", None)
+    return list(getattr(rp, "sitemaps", None) or ())
+
+
+def board_scope(url):
+    """
+    (host, path prefix) the job pages of the careers page `url` can be at: its host (a sitemap
+    only lists its own host's pages anyway), and under its first path segment if that one
+    looks like a company on a shared host ("jobs.example-ats.com/acme/careers",
+    "www.careers-page.com/acme") - "" if it is about jobs ("/careers/...") or a page ("/jobs.html").
+    """
+    segments = [s for s in urlsplit(url).path.split("/") if s]
+    if segments and not JOBS_SEGMENT.match(segments[0]) and "." not in segments[0]:
+        return domain_of(url), f"/{segments[0]}/"
+    return domain_of(url), ""
+
+
+def in_scope(url, scope):
+    host, prefix = scope
+    return domain_of(url) == host and urlsplit(url).path.startswith(prefix)
+
+
+def job_sitemaps_first(urls):
+    """
+    `urls` without duplicates, the sitemaps named like jobs/careers first.
+    """
+    urls = list(dict.fromkeys(urls))
+    return [u for u in urls if JOB_SITEMAP.search(u)] + [u for u in urls if not JOB_SITEMAP.search(u)]
+
+
+def slug_title(url, keywords):
+    """
+    Job title of a posting URL from its slug ("/careers/senior-devops-engineer-4411" ->
+    "Senior Devops Engineer"), None if no path segment has a role keyword.
+    """
+    for segment in reversed(unquote(urlsplit(url).path).split("/")):
+        words = [w for w in SLUG_SEPARATORS.split(segment) if w and not SLUG_NOISE.match(w)]
+        title = " ".join(words)
+        if title and keywords.role_family(title):
+            return title if not title.islower() else title.title()
+    return None
+
+
+def job_link(url, title, keywords, scope=None):
+    """
+    Title of the job at `url` (the feed's title, else one from the slug), None if it isn't a
+    posting of a role we look for, or not in `scope` (see board_scope).
+    """
+    # The whole URL first - most of a sitemap isn't jobs, and that is cheaper than splitting it
+    if not url or not JOB_PATH.search(url) or not JOB_PATH.search(urlsplit(url).path):
+        return None
+    if scope and not in_scope(url, scope):
+        return None
+    if title:
+        return title if keywords.role_family(title) else None
+    return slug_title(url, keywords)
+
+
+def sitemap_links(body, keywords, max_size=0, scope=None):
+    """
+    (jobs, sitemaps) of a sitemap, sitemap index, RSS or Atom feed: the (title, url) of its
+    job postings in `scope` (see job_link), and the sitemaps an index points to.
+
+    `body` may be gzipped (.xml.gz): it is decompressed and parsed a chunk at a time, each
+    entry dropped once read, so a big sitemap never sits in memory as a whole tree.
+    Parsing stops after `max_size` decompressed bytes (0 = no limit), or at broken XML.
+    """
+    jobs = []
+    sitemaps = []
+    parser = etree.XMLPullParser(
+        events=("end",),
+        tag=ENTRY_TAGS,
+        resolve_entities=False,
+        no_network=True,
+        huge_tree=True,
+        remove_comments=True,
+    )
+    try:
+        for chunk in _chunks(body, max_size):
+            parser.feed(chunk)
+            _read_entries(parser, keywords, scope, jobs, sitemaps)
+        parser.close()
+        _read_entries(parser, keywords, scope, jobs, sitemaps)
+    except (etree.XMLSyntaxError, zlib.error):
+        pass
+    return jobs, sitemaps
+
+
+def _chunks(body, max_size):
+    if body[:2] == GZIP_MAGIC:
+        chunks = _gunzip(body)
+    else:
+        chunks = (body[i:i + CHUNK] for i in range(0, len(body), CHUNK))
+    read = 0
+    for chunk in chunks:
+        if max_size and read + len(chunk) > max_size:
+            yield chunk[:max_size - read]
+            return
+        read += len(chunk)
+        yield chunk
+
+
+def _gunzip(body):
+    # At most CHUNK bytes out at a time - a sitemap compresses 20x or more
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    for i in range(0, len(body), CHUNK):
+        data = body[i:i + CHUNK]
+        while data and not decompressor.eof:
+            yield decompressor.decompress(data, CHUNK)
+            data = decompressor.unconsumed_tail
+        if decompressor.eof:
+            return
+
+
+def _read_entries(parser, keywords, scope, jobs, sitemaps):
+    for _, element in parser.read_events():
+        tag = _local(element.tag)
+        if tag == "url" or tag == "item":
+            # <url><loc> of a sitemap, <item><link>/<title> of RSS
+            url = _child_text(element, "loc") or _child_text(element, "link")
+            title = _child_text(element, "title")
+        elif tag == "entry":
+            # Atom: <link href="..."/>, the alternate one if there are several
+            url = None
+            for child in element:
+                if _local(child.tag) == "link" and child.get("rel", "alternate") == "alternate":
+                    url = child.get("href")
+                    break
+            title = _child_text(element, "title")
+        elif tag == "sitemap":
+            loc = _child_text(element, "loc")
+            if loc:
+                sitemaps.append(loc)
+            _drop(element)
+            continue
+        else:
+            _drop(element)
+            continue
+        title = job_link(url, title, keywords, scope)
+        if title:
+            jobs.append((title, url))
+        _drop(element)
+
+
+def _local(tag):
+    return tag.rpartition("}")[2] if isinstance(tag, str) else ""
+
+
+def _child_text(element, name):
+    for child in element:
+        if _local(child.tag) == name:
+            return (child.text or "").strip() or None
+    return None
+
+
+def _drop(element):
+    # Done with it, and with everything before it
+    element.clear()
+    parent = element.getparent()
+    if parent is not None:
+        while element.getprevious() is not None:
+            del parent[0]
@@ -0,0 +1,131 @@
+import json
+import re
+
+# What the extractors look for in the raw body
+MARKERS = ("COMPANY_POSITIONS_DATA", "POSITION_DATA", "__NEXT_DATA__", "application/ld+json")
+
+SCRIPT_END = re.compile(rb"</script", re.IGNORECASE)
+SCRIPT_TAG = re.compile(rb"<script\b", re.IGNORECASE)
+NEXT_DATA_ID = re.compile(rb"""\bid\s*=\s*["']?__NEXT_DATA__["'\s>]""")
+LD_JSON_TYPE = re.compile(rb"""\btype\s*=\s*["']?application/ld\+json["'\s>]""")
+WHITESPACE = b" \t\r\n"
+# A whole JS string literal, a bracket, or the quote of a string that is never closed
+TOKEN = re.compile(rb""""(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*'|`(?:[^`\\]|\\.)*`|[\[\]{}]|["'`]""", re.DOTALL)
+
+DECODER = json.JSONDecoder()
+
+
+class Sniff:
+    """
+    Offsets of the MARKERS in a response body, and the JSON they point at, sliced
+    straight out of the bytes - so the extractors only build the DOM (or run XPath
+    over it) when the page has something for them.
+
+        markers = Sniff(response.body, response.encoding)
+        if "__NEXT_DATA__" in markers:
+            next_data = markers.script("__NEXT_DATA__")
+    """
+
+    def __init__(self, body, encoding="utf-8"):
+        self.body = body
+        self.encoding = encoding
+        # A find() per marker is a memchr-speed scan - much faster than one regex alternation
+        self.offsets = {}
+        for marker in MARKERS:
+            offsets = _find_all(body, marker.encode("ascii"))
+            if offsets:
+                self.offsets[marker] = offsets
+
+    def __contains__(self, marker):
+        return marker in self.offsets
+
+    def js_var(self, name):
+        """
+        Source of the array/object literal assigned to the JS variable `name`
+        (`name = [...]` / `name = {...}`), None if there is none.
+        A JSON literal is measured by the C JSON scanner; anything else (single quotes,
+        unquoted keys...) by balanced_end.
+        """
+        offsets = self.offsets.get(name, ()) if name in MARKERS else _find_all(self.body, name.encode("ascii"))
+        for offset in offsets:
+            start = _skip(self.body, offset + len(name))
+            if self.body[start:start + 1] != b"=":
+                continue
+            start = _skip(self.body, start + 1)
+            if self.body[start:start + 1] not in (b"[", b"{"):
+                continue
+            text = self.body[start:].decode(self.encoding or "utf-8", "replace")
+            try:
+                return text[:DECODER.raw_decode(text)[1]]
+            except ValueError:
+                pass
+            end = balanced_end(self.body, start)
+            if end is not None:
+                return self._text(start, end)
+        return None
+
+    def script(self, marker):
+        """
+        Text of the first <script> whose tag has `marker` in it (its id or type), None if there is none.
+        """
+        texts = self.scripts(marker, first=True)
+        return texts[0] if texts else None
+
+    def scripts(self, marker, first=False):
+        pattern = NEXT_DATA_ID if marker == "__NEXT_DATA__" else LD_JSON_TYPE
+        texts = []
+        for offset in self.offsets.get(marker, ()):
+            tag_start = self.body.rfind(b"<", 0, offset)
+            tag_end = self.body.find(b">", offset)
+            if tag_start < 0 or tag_end < 0 or b">" in self.body[tag_start:offset]:
+                # Not inside a tag - the marker is in some text or script
+                continue
+            tag = self.body[tag_start:tag_end + 1]
+            if not SCRIPT_TAG.match(tag) or not pattern.search(tag):
+                continue
+            end = SCRIPT_END.search(self.body, tag_end + 1)
+            texts.append(self._text(tag_end + 1, end.start() if end else len(self.body)))
+            if first:
+                break
+        return texts
+
+    def _text(self, start, end):
+        return self.body[start:end].decode(self.encoding or "utf-8", "replace")
+
+
+def _find_all(body, needle):
+    offsets = []
+    offset = body.find(needle)
+    while offset >= 0:
+        offsets.append(offset)
+        offset = body.find(needle, offset + len(needle))
+    return offsets
+
+
+def _skip(body, pos):
+    while pos < len(body) and body[pos] in WHITESPACE:
+        pos += 1
+    return pos
+
+
+def balanced_end(body, start):
+    """
+    End offset of the JSON/JS array or object literal starting at `start` (just past its
+    closing bracket), None if there is no literal there or it is never closed.
+    Strings ('...', "...", `...`, with escapes) are skipped, so brackets in them don't count.
+    """
+    if body[start:start + 1] not in (b"[", b"{"):
+        return None
+    depth = 0
+    for match in TOKEN.finditer(body, start):
+        token = match.group()
+        if token in (b"[", b"{"):
+            depth += 1
+        elif token in (b"]", b"}"):
+            depth -= 1
+            if depth == 0:
+                return match.end()
+        elif len(token) == 1:
+            # A string that is never closed
+            return None
+    return None
@@ -1,97 +1,537 @@
 import scrapy
 import re
 import json
-from jobscraper.items import JobCandidate
+import time
+from scrapy import signals
+from scrapy.utils.httpobj import urlparse_cached
+from jobscraper.ats import ATS_EXTRACTORS, get_extractor
+from jobscraper.companies import CompanySource
+from jobscraper.dedup import better_title
+from jobscraper.dom import job_title, scan_job_links
+from jobscraper.health import AUTH_WALL, NO_JOBS, HostHealth
+from jobscraper.httpcache import replay_settings
+from jobscraper.items import JobRecord, job_page_candidate
+from jobscraper.keywords import load_keywords
+from jobscraper.memory import DomainMemory
+from jobscraper.offload import Offloader, api_jobs, html_job_links, next_data_description, next_data_links
+from jobscraper.render import wait_for_jobs
+from jobscraper.sitemap import board_scope, in_scope, job_sitemaps_first, robots_sitemaps, sitemap_links
+from jobscraper.sniff import Sniff
+from urllib.parse import urljoin, urlsplit
 from w3lib.html import remove_tags
 from scrapy_playwright.page import PageMethod
 
-TITLE_FIELDS = {'title', 'name', 'position', 'role', 'jobTitle', 'heading'}
-URL_FIELDS = {'url', 'href', 'link', 'path', 'slug', 'canonicalUrl', 'jobUrl'}
-DESCRIPTION_FIELDS = {'description', 'content', 'text', 'body', 'summary', 'details', 'requirements', 'responsibilities', 'fullDescription', 'jobDescription', 'positionDescription'}
-
 class JobDiscoverySpider(scrapy.Spider):
     name = "job_discovery"
     # start_urls = ["https://www.comeet.com/jobs/arpeely/57.001"]
-    ROLE_KEYWORDS = re.compile(
-        r"\b(devops|mlops)\s+(engineer)\b|\bSRE\b",
-        re.IGNORECASE
-    )
-
-    GENERIC_ROLE_KEYWORDS = re.compile(
-        r"(engineer|recruiter|researcher|leader|developer|manager|specialist|technician)",
-        re.IGNORECASE
-    )
-
-    NOISE_KEYWORDS = re.compile(
-        r"(privacy|terms|about|contact|blog|login)",
-        re.IGNORECASE
-    )
-
-    def __init__(self, urls_file=None, *args, **kwargs):
+
+    def __init__(self, urls_file=None, shard=None, company=None, domain=None, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.companies = []
+        # Role families we look for, and the generic/noise words (KEYWORDS_FILE, see jobscraper.keywords)
+        self.keywords = load_keywords()
+        # Careers pages that only gave us jobs after a browser render on a previous run - per page,
+        # not per host: one board of a shared host (linkedin.com...) needing a browser says nothing of the others
+        self.render_domains = DomainMemory(key=str)
+        # Where in a careers page's __NEXT_DATA__ its jobs were found, so later runs read them directly
+        self.json_paths = DomainMemory(key=str)
+        # JSON APIs that rendered careers pages loaded their jobs from - called directly on later runs
+        self.api_endpoints = DomainMemory(key=str)
+        # Hosts and careers pages that failed on earlier runs, skipped while they back off
+        self.host_health = HostHealth()
+        self.health_retry_priority = -5
+        # Heavy JSON/HTML parsing runs inline unless OFFLOAD_MODE says otherwise
+        self.offloader = Offloader()
+        # (timeout, settle) seconds of wait_for_jobs in renders
+        self.render_wait = (10, 0.25)
+        # Sitemap/feed discovery before the careers page is parsed (SITEMAP_DISCOVERY, see parse_sitemap)
+        self.sitemap_discovery = False
+        self.sitemap_max_files = 10
+        self.sitemap_max_size = 0
+        # Hosts whose sitemaps had no jobs, and when we looked - their careers pages are parsed directly for a while
+        self.sitemap_misses = DomainMemory()
+        self.sitemap_recheck = 7 * 24 * 3600
+        # Sitemap: lines of the robots.txt files Scrapy read, per netloc
+        self.robots_sitemaps = {}
+        # Netloc -> the discovery going on for it: {"pending", "files", "jobs", "seen", "boards", "scope"}
+        self.discoveries = {}
+        # Netloc -> the (title, url) of the job postings its sitemaps listed, once read this run
+        self.sitemap_jobs = {}
 
         if urls_file:
-            with open(urls_file, "r", encoding="utf8") as f:
-                self.companies = json.load(f)
+            # Read lazily as the scheduler asks for more start requests (JSON array, JSON Lines or CSV)
+            self.companies = CompanySource(urls_file, shard=shard, company=company, domain=domain)
+
+    @classmethod
+    def update_settings(cls, settings):
+        super().update_settings(settings)
+        if settings.getbool("HTTPCACHE_REPLAY"):
+            # Offline run over the HTTP cache (see jobscraper.httpcache)
+            replay_settings(settings)
+
+    @classmethod
+    def from_crawler(cls, crawler, *args, **kwargs):
+        spider = super().from_crawler(crawler, *args, **kwargs)
+        spider.keywords = load_keywords(crawler.settings.get("KEYWORDS_FILE"))
+        spider.render_domains = DomainMemory(crawler.settings.get("RENDER_MEMORY_FILE"), key=str)
+        spider.json_paths = DomainMemory(crawler.settings.get("JSON_PATHS_FILE"), key=str)
+        spider.api_endpoints = DomainMemory(crawler.settings.get("API_ENDPOINTS_FILE"), key=str)
+        spider.host_health = HostHealth(
+            crawler.settings.get("HOST_HEALTH_FILE"),
+            backoff=crawler.settings.getfloat("HOST_HEALTH_BACKOFF"),
+            max_backoff=crawler.settings.getfloat("HOST_HEALTH_MAX_BACKOFF"),
+        )
+        spider.health_retry_priority = crawler.settings.getint("HOST_HEALTH_RETRY_PRIORITY")
+        spider.offloader = Offloader.from_crawler(crawler)
+        spider.render_wait = (crawler.settings.getfloat("RENDER_WAIT_TIMEOUT"), crawler.settings.getfloat("RENDER_WAIT_SETTLE"))
+        spider.sitemap_discovery = crawler.settings.getbool("SITEMAP_DISCOVERY")
+        spider.sitemap_max_files = crawler.settings.getint("SITEMAP_MAX_FILES")
+        spider.sitemap_max_size = crawler.settings.getint("SITEMAP_MAX_SIZE")
+        spider.sitemap_misses = DomainMemory(crawler.settings.get("SITEMAP_MEMORY_FILE"))
+        spider.sitemap_recheck = crawler.settings.getfloat("SITEMAP_RECHECK_SECS")
+        crawler.signals.connect(spider.robots_parsed, signal=signals.robots_parsed)
+        return spider
 
     async def start(self):
         for company in self.companies:
-            job = JobCandidate(
+            # One small record per board, shared by its requests (see JobRecord)
+            job = JobRecord(
                 company = company.get("Company"),
                 source_url = company.get("Careers URL")
             )
-            yield scrapy.Request(company.get("Careers URL"), callback=self.parse, meta={"job": dict(job)})
+            url = company.get("Careers URL")
+            blocked = self.host_health.blocked(url)
+            if blocked:
+                # Failed on earlier runs - not worth a request (or a browser) until its backoff is over
+                self.crawler.stats.inc_value(f"health/skipped/{blocked}")
+                continue
+            request = self.board_request(url, job)
+            if request is None:
+                # Waits for the sitemaps of its host, which another board is having read
+                continue
+            if url in self.host_health:
+                # Its backoff is over: try it again, after the boards that work
+                self.crawler.stats.inc_value("health/retried")
+                request = request.replace(priority=self.health_retry_priority)
+            yield request
         # job = JobCandidate(
         #         company = "zenity",
         #         source_url = "https://makers.lemonade.com/",
         #     )
         # yield scrapy.Request("https://makers.lemonade.com/", callback=self.parse, meta={"job": dict(job),})
     
-    def parse(self, response):
+    def board_request(self, url, job, sitemaps=True):
+        """
+        First request for a careers page: its ATS API, or what earlier runs learned it needs, or its
+        site's sitemaps (unless `sitemaps` is False), or a plain fetch. None if it waits for the
+        sitemaps of its host, which another board is having read (see sitemap_request).
+        """
+        extractor = get_extractor(url)
+        ats_request = extractor.board_request(url, job, self) if extractor else None
+        if ats_request:
+            return ats_request
+        if url in self.api_endpoints:
+            # An earlier render saw where the page loads its jobs from - no browser needed
+            return self.api_request(url, job)
+        if sitemaps and self.sitemap_discovery and not self.sitemap_missed(url):
+            # The site may list its job pages already - no listing parse, no render
+            return self.sitemap_request(url, job)
+        if url in self.render_domains:
+            # We already know plain HTML has nothing for this site - go straight to the browser
+            return self.render_request(url, job)
+        return scrapy.Request(url, callback=self.parse, meta={"job": job})
+
+    async def parse(self, response):
         job = response.meta["job"]
         found_any = False
-        script_text = self.js_var_extract(response, "COMPANY_POSITIONS_DATA")
-        if script_text:
-            for pos in self.script_extract(response, script_text, job):
-                found_any = True
-                yield pos 
+        # One scan of the raw body says which of the data script branches can find anything
+        markers = Sniff(response.body, response.encoding)
+        if response.meta.get("render_json"):
+            # JSON the browser fetched while rendering - if one of them is the job list, that's the whole board
+            api = await self.find_api(response.meta["render_json"])
+            if api:
+                capture, (jobs, paths, _) = api
+                for pos in self.api_extract(response.url, job, jobs):
+                    found_any = True
+                    yield pos
+                if found_any:
+                    self.api_endpoints.set(job["source_url"], {
+                        "url": capture["url"],
+                        "method": capture["method"],
+                        "body": capture["body"],
+                        "content_type": capture["content_type"],
+                        "paths": paths,
+                    })
+
+        if not found_any and "COMPANY_POSITIONS_DATA" in markers:
+            script_text = self.js_var_extract(response, "COMPANY_POSITIONS_DATA", markers)
+            if script_text:
+                for pos in self.script_extract(response, script_text, job):
+                    found_any = True
+                    yield pos
+
+        if not found_any and "__NEXT_DATA__" in markers:
+            next_data = markers.script("__NEXT_DATA__")
+            if next_data:
+                found = await self.offloader.run(
+                    next_data_links, next_data, self.keywords, self.json_paths.get(job["source_url"]),
+                    size=len(next_data),
+                )
+                links = None
+                if found:
+                    links, paths, remembered = found
+                    if remembered:
+                        self.crawler.stats.inc_value("json_paths/hits")
+                    if paths:
+                        # Only the lists that had jobs of our roles
+                        self.json_paths.set(job["source_url"], paths)
+                    else:
+                        self.json_paths.discard(job["source_url"])
+                for pos in self.next_data_extract(response, job, links):
+                    found_any = True
+                    yield pos
         
         if not found_any:
-            for pos in self.next_data_extract(response, job):
+            links = None
+            if self.offloader.offloads(len(response.body)):
+                links = await self.offloader.run(
+                    html_job_links, response.text, self.keywords, size=len(response.body)
+                )
+            for pos in self.html_extract(response, job, links):
                 found_any = True
                 yield pos
-        
+        if found_any:
+            self.host_health.succeeded(job["source_url"])
+        if response.meta.get("is_playwright"):
+            if found_any:
+                self.render_domains.set(job["source_url"], True)
+            else:
+                # The browser didn't help either - no reason to go straight to it next time
+                self.render_domains.discard(job["source_url"])
+        # A browser would only get the same login page
+        if not found_any and not response.meta.get("is_playwright") and response.meta.get("health_outcome") != AUTH_WALL:
+            visible_text = " ".join(response.xpath("//a//text() | //h2//text() | //h3//text() | //li//text()").getall())
+            if not self.keywords.has_generic(visible_text):
+                yield self.render_request(response.url, job)
+                return
         if not found_any:
-            for pos in self.html_extract(response, job):
+            # Not in the HTML, and a render has nothing to add (or this was the render)
+            self.host_health.failed(job["source_url"], NO_JOBS)
+
+    async def parse_ats(self, response):
+        """
+        Listing (or posting) payload of a known ATS board.
+        Falls back to the generic cascade when the payload is not what we expected.
+        """
+        extractor = ATS_EXTRACTORS[response.meta["ats"]]
+        if response.meta.get("ats_posting"):
+            for result in extractor.parse_posting(response, self):
+                yield result
+            return
+        results = extractor.parse_board(response, self)
+        if results is not None:
+            found_any = False
+            for result in results:
                 found_any = True
-                yield pos 
-        if not found_any and not response.meta.get("is_playwright"):
-            visible_text = " ".join(response.xpath("//a//text() | //h2//text() | //h3//text() | //li//text()").getall())
-            if not self.GENERIC_ROLE_KEYWORDS.search(visible_text):
-                yield scrapy.Request(
-                url=response.url,
-                callback=self.parse,
-                meta={
-                    "job": job,
-                    "playwright": True, 
-                    "is_playwright": True, # Mark this so we don't loop forever
-                    "playwright_page_methods": [
-                        PageMethod("wait_for_selector", "a[href*='job'], a[href*='career'], a[href*='position'], a[href*='opening']", state="attached"), 
-                        PageMethod("wait_for_load_state", "networkidle")
-                    ],
-                },
-                dont_filter=True # Tell Scrapy: "Yes, I know I just visited this URL, do it anyway."
+                yield result
+            if found_any:
+                self.host_health.succeeded(response.meta["job"]["source_url"])
+            return
+        self.logger.warning(f"{extractor.name} payload not recognized for {response.url}, using generic parse")
+        job = self.fallback_job(response.meta["job"])
+        if response.url == job["source_url"]:
+            # The board page itself was fetched, no need to download it again
+            response.meta["job"] = job
+            async for result in self.parse(response):
+                yield result
+        else:
+            yield self.fallback_request(job)
+
+    def ats_failed(self, failure):
+        request = failure.request
+        self.logger.warning(f"{request.meta['ats']} request failed for {request.url}: {failure.value!r}")
+        if not request.meta.get("ats_posting"):
+            yield self.fallback_request(self.fallback_job(request.meta["job"]))
+
+    def fallback_job(self, job):
+        return JobRecord({k: v for k, v in job.items() if k in ("company", "source_url")})
+
+    def fallback_request(self, job):
+        return scrapy.Request(job["source_url"], callback=self.parse, meta={"job": job}, dont_filter=True)
+
+    def render_request(self, url, job):
+        """
+        Request for the same careers page, rendered by the browser this time.
+        """
+        return scrapy.Request(
+            url=url,
+            callback=self.parse,
+            meta={
+                "job": job,
+                "playwright": True,
+                "is_playwright": True,  # Mark this so we don't loop forever
+                "render_capture_json": True,
+                "playwright_page_goto_kwargs": {"wait_until": "domcontentloaded"},
+                "playwright_page_methods": [
+                    # Done as soon as job links or a data script show up, not when the network goes quiet
+                    PageMethod(wait_for_jobs, self.keywords.pattern("generic"), *self.render_wait),
+                ],
+            },
+            dont_filter=True  # Tell Scrapy: "Yes, I know I just visited this URL, do it anyway."
+        )
+
+    async def find_api(self, captures):
+        """
+        (capture, api_jobs result) of the captured JSON response with the most jobs of our roles,
+        None if none has any.
+        """
+        best = None
+        for capture in captures:
+            if capture["status"] != 200:
+                continue
+            found = await self.offloader.run(api_jobs, capture["text"], self.keywords, size=len(capture["text"]))
+            if found and found[0] and (best is None or len(found[0]) > len(best[1][0])):
+                best = (capture, found)
+        return best
+
+    def api_request(self, url, job):
+        """
+        Request for the JSON API a render of this careers page loaded its jobs from (see parse).
+        """
+        endpoint = self.api_endpoints.get(url)
+        headers = {"Accept": "application/json"}
+        if endpoint.get("content_type"):
+            headers["Content-Type"] = endpoint["content_type"]
+        return scrapy.Request(
+            endpoint["url"],
+            method=endpoint.get("method") or "GET",
+            body=endpoint.get("body"),
+            headers=headers,
+            callback=self.parse_api,
+            errback=self.api_failed,
+            meta={"job": job, "api_endpoint": endpoint},
+            dont_filter=True,
+        )
+
+    async def parse_api(self, response):
+        """
+        Jobs straight from a remembered careers API. If it doesn't answer with jobs any more,
+        it is forgotten and the careers page goes through parse again.
+        """
+        job = response.meta["job"]
+        endpoint = response.meta["api_endpoint"]
+        found = None
+        if response.status == 200:
+            found = await self.offloader.run(
+                api_jobs, response.text, self.keywords, endpoint.get("paths"), size=len(response.body)
+            )
+        found_any = False
+        if found:
+            jobs, paths, remembered = found
+            for pos in self.api_extract(job["source_url"], job, jobs):
+                found_any = True
+                yield pos
+        if not found_any:
+            self.logger.info(f"API {response.url} of {job['source_url']} no longer lists jobs, parsing the page")
+            self.api_endpoints.discard(job["source_url"])
+            yield self.fallback_request(job)
+            return
+        if not remembered:
+            self.api_endpoints.set(job["source_url"], {**endpoint, "paths": paths})
+        self.host_health.succeeded(job["source_url"])
+        self.crawler.stats.inc_value("api/hits")
+
+    def api_failed(self, failure):
+        request = failure.request
+        job = request.meta["job"]
+        self.logger.warning(f"API request failed for {job['source_url']}: {failure.value!r}")
+        self.api_endpoints.discard(job["source_url"])
+        yield self.fallback_request(job)
+
+    def api_extract(self, base_url, job, jobs):
+        """
+        Items (or job page candidates, when the API has no descriptions) for the (title, url, description)
+        of a careers API - see api_jobs.
+        """
+        for title, url, description in jobs:
+            if not (title and url and self.role_family(title)):
+                continue
+            href = urljoin(base_url, url)
+            if description:
+                yield dict(job, title=title, href=href, resolved_via="api", description=self.clean_description(remove_tags(description)))
+            else:
+                yield job_page_candidate(job, href, title=title, href=href, resolved_via="api")
+
+    def sitemap_missed(self, url):
+        """
+        Whether the sitemaps of `url`'s host had no jobs less than SITEMAP_RECHECK_SECS ago.
+        """
+        checked = self.sitemap_misses.get(url)
+        return checked is not None and time.time() - checked < self.sitemap_recheck
+
+    def sitemap_request(self, url, job):
+        """
+        Request for the /sitemap.xml of a careers page's site, the start of its sitemap discovery.
+        A host's sitemaps are read once per run, for all its boards: a board of a host being read
+        waits for it (None, nothing to request), one of a host already read gets its share of the
+        jobs found through a data: request.
+        """
+        parts = urlsplit(url)
+        host = parts.netloc
+        if host in self.sitemap_jobs:
+            return scrapy.Request("data:,", callback=self.parse_sitemap_jobs, meta={"job": job}, dont_filter=True)
+        self.crawler.stats.inc_value("sitemap/boards")
+        discovery = self.discoveries.get(host)
+        if discovery is not None:
+            discovery["boards"].append(job)
+            return None
+        sitemap_url = f"{parts.scheme}://{host}/sitemap.xml"
+        self.discoveries[host] = {
+            "pending": 1, "files": 1, "jobs": [], "seen": {sitemap_url}, "boards": [job],
+            "scope": (board_scope(url)[0], ""),
+        }
+        self.crawler.stats.inc_value("sitemap/hosts")
+        return scrapy.Request(
+            sitemap_url,
+            callback=self.parse_sitemap,
+            errback=self.sitemap_failed,
+            # A site without one is no error - the robots.txt ones may still be there
+            meta={"job": job, "sitemap_host": host, "sitemap_root": True, "handle_httpstatus_list": [404, 410]},
+            dont_filter=True,
         )
-      
-    def parse_job_page(self, response):
+
+    def robots_parsed(self, robotparser, request):
+        # Scrapy reads robots.txt before the first request to a host (ROBOTSTXT_OBEY) - no need to fetch it again
+        self.robots_sitemaps[urlparse_cached(request).netloc] = robots_sitemaps(robotparser)
+
+    async def parse_sitemap(self, response):
+        """
+        Job postings listed in a site's sitemaps and feeds: those of /sitemap.xml, the Sitemap: lines
+        of robots.txt and the sitemap indexes they point to (job-named sitemaps first, at most
+        SITEMAP_MAX_FILES per host). Once they are all read, each board of the host gets the postings
+        under its company's path on a shared host (see board_scope) whose path and slug (or feed
+        title) look like a role we want, as candidates for Phase B.
+        A board they list none for goes through parse (and a render) as usual.
+        """
+        host = response.meta["sitemap_host"]
+        discovery = self.discoveries.get(host)
+        found = ([], [])
+        if response.status == 200 and discovery is not None:
+            found = await self.offloader.run(
+                sitemap_links, response.body, self.keywords, self.sitemap_max_size, discovery["scope"],
+                size=len(response.body),
+            )
+        jobs, sitemaps = found
+        if response.meta.get("sitemap_root"):
+            sitemaps = self.robots_sitemaps.get(host, []) + sitemaps
+        for request in self.follow_sitemaps(response.meta["job"], host, sitemaps):
+            yield request
+        for result in self.sitemap_done(host, jobs):
+            yield result
+
+    def sitemap_failed(self, failure):
+        request = failure.request
+        host = request.meta["sitemap_host"]
+        sitemaps = []
+        if request.meta.get("sitemap_root"):
+            # No /sitemap.xml (or not allowed) - robots.txt may still list some
+            sitemaps = self.robots_sitemaps.get(host, [])
+        yield from self.follow_sitemaps(request.meta["job"], host, sitemaps)
+        yield from self.sitemap_done(host, [])
+
+    def follow_sitemaps(self, job, host, urls):
+        discovery = self.discoveries.get(host)
+        if discovery is None:
+            # Resumed crawl (JOBDIR) - the discovery it belonged to is gone
+            return
+        for url in job_sitemaps_first(urls):
+            if url in discovery["seen"]:
+                continue
+            if discovery["files"] >= self.sitemap_max_files:
+                self.crawler.stats.inc_value("sitemap/files_skipped")
+                continue
+            discovery["seen"].add(url)
+            discovery["files"] += 1
+            discovery["pending"] += 1
+            yield scrapy.Request(
+                url, callback=self.parse_sitemap, errback=self.sitemap_failed,
+                meta={"job": job, "sitemap_host": host}, dont_filter=True,
+            )
+
+    def sitemap_done(self, host, jobs):
+        """
+        Counts a sitemap of `host`'s discovery as read; after the last one, each board waiting
+        for it gets its jobs (see sitemap_board).
+        """
+        self.crawler.stats.inc_value("sitemap/files")
+        discovery = self.discoveries.get(host)
+        if discovery is None:
+            return
+        discovery["jobs"].extend(jobs)
+        discovery["pending"] -= 1
+        if discovery["pending"]:
+            return
+        del self.discoveries[host]
+        # (title, url) pairs are small, and only the job postings of our roles
+        jobs = self.sitemap_jobs[host] = list(dict.fromkeys(discovery["jobs"]))
+        self.crawler.stats.inc_value("sitemap/jobs", len(jobs))
+        if jobs:
+            self.sitemap_misses.discard(discovery["boards"][0]["source_url"])
+        else:
+            self.crawler.stats.inc_value("sitemap/misses")
+            self.sitemap_misses.set(discovery["boards"][0]["source_url"], int(time.time()))
+        for job in discovery["boards"]:
+            yield from self.sitemap_board(job, jobs)
+
+    def parse_sitemap_jobs(self, response):
+        """
+        A board of a host whose sitemaps were already read this run.
+        """
+        job = response.meta["job"]
+        yield from self.sitemap_board(job, self.sitemap_jobs.get(urlsplit(job["source_url"]).netloc, []))
+
+    def sitemap_board(self, job, jobs):
+        """
+        Job page candidates of the host's sitemap `jobs` that are the careers page's (see board_scope);
+        if there are none, the careers page goes on without sitemaps.
+        """
+        source_url = job["source_url"]
+        scope = board_scope(source_url)
+        found = 0
+        for title, href in jobs:
+            if in_scope(href, scope):
+                found += 1
+                yield job_page_candidate(job, href, title=title, href=href, resolved_via="sitemap")
+        if found:
+            self.crawler.stats.inc_value("sitemap/boards_found")
+            self.host_health.succeeded(source_url)
+            return
+        yield self.board_request(source_url, job, sitemaps=False)
+
+    def closed(self, reason):
+        self.render_domains.save()
+        self.json_paths.save()
+        self.api_endpoints.save()
+        self.host_health.save()
+        self.sitemap_misses.save()
+        self.offloader.close()
+
+    def parse_removed(self, response):
+        """
+        Postings that disappeared from their board since the last run (see IncrementalCrawlMiddleware).
+        """
+        yield from response.meta["removed"]
+
+    async def parse_job_page(self, response):
         """
         Parse the description from the position page.
-        Happen on a followup of a job link - when the job is in it's own page.
+        Phase B of a job page candidate (see JobResolutionMiddleware) - when the job is in it's own page.
         """
-        job = response.meta["job"]       
+        # The item is a plain dict - the candidate record stays as small as it was
+        job = dict(response.meta["job"])
+        markers = Sniff(response.body, response.encoding)
         if job["resolved_via"] == "js":
-            pos_details = self.js_var_extract(response, "POSITION_DATA")
+            pos_details = self.js_var_extract(response, "POSITION_DATA", markers)
             if pos_details:
                 details_list = json.loads(pos_details).get("custom_fields", {}).get("details", [])
                 full_description = [item.get("value", "") for item in details_list if item.get("value")]
@@ -99,17 +539,16 @@ class JobDiscoverySpider(scrapy.Spider):
                 job["description"] = self.clean_description(remove_tags(combined_description))
                 job["resolved_via"] = "js"
         elif job["resolved_via"] == "next_data":
-            next_data = response.xpath('//script[@id="__NEXT_DATA__"]/text()').get()
+            next_data = markers.script("__NEXT_DATA__")
             if next_data:
-                try:
-                    data = json.loads(next_data)
-                    desc = self._find_description_in_json(data)
-                    if desc:
-                        job["description"] = self.clean_description(remove_tags(desc))
-                except json.JSONDecodeError:
-                    pass
-        elif job["resolved_via"] == "html_extract":
-            structured_desc = self.json_ld_description_extract(response)
+                desc = await self.offloader.run(next_data_description, next_data, size=len(next_data))
+                if desc:
+                    job["description"] = self.clean_description(remove_tags(desc))
+        elif job["resolved_via"] in ("html_extract", "api", "sitemap"):
+            if job["resolved_via"] == "sitemap":
+                # All we had was the URL slug - the page has the real title
+                job["title"] = self.page_title(response, markers) or job["title"]
+            structured_desc = self.json_ld_description_extract(response, markers)
             if structured_desc:
                 job["description"] = self.clean_description(remove_tags(structured_desc))
                 job["resolved_via"] = "json-ld"
@@ -123,14 +562,18 @@ class JobDiscoverySpider(scrapy.Spider):
                 if not description or len(description.strip()) < 150:
                     description = response.xpath("//*[contains(@class, 'position') or contains(@class, 'job') or contains(@class, 'desc') or contains(@class, 'career')]").xpath("string(.)").get()
                 job["description"] = self.clean_description(description)
-                job["resolved_via"] = "html_extract"
         yield job
 
-    def json_ld_description_extract(self, response):
-        json_ld_data = response.xpath('//script[@type="application/ld+json"]/text()').getall()
-    
-        structured_desc = None
-        for data in json_ld_data:
+    def json_ld_description_extract(self, response, markers=None):
+        posting = self.json_ld_posting(response, markers)
+        return posting.get("description") if posting else None
+
+    def json_ld_posting(self, response, markers=None):
+        """
+        The JSON-LD JobPosting object of the page, None if it has none.
+        """
+        markers = markers or Sniff(response.body, response.encoding)
+        for data in markers.scripts("application/ld+json"):
             try:
                 parsed = json.loads(data)
                 # Sometimes it's a list, sometimes a single object
@@ -139,122 +582,81 @@ class JobDiscoverySpider(scrapy.Spider):
 
                 # Check if this specific JSON is a "JobPosting"
                 if parsed.get("@type") == "JobPosting":
-                    structured_desc = parsed.get("description")
-                    break
-            except (json.JSONDecodeError, KeyError):
+                    return parsed
+            except (json.JSONDecodeError, KeyError, AttributeError, IndexError):
                 continue
-        return structured_desc
+        return None
+
+    def page_title(self, response, markers=None):
+        """
+        Title of a job page - its JSON-LD JobPosting's, else its <h1> - if it is one of a role we look for.
+        """
+        posting = self.json_ld_posting(response, markers)
+        candidates = [posting.get("title")] if posting else []
+        candidates.append(" ".join(response.xpath("string(//h1)").get("").split()))
+        for title in candidates:
+            if isinstance(title, str) and self.role_family(title):
+                return title.strip()
+        return None
 
     def script_extract(self, response, script_text, job):
         try:
             positions = json.loads(script_text)
             for pos in positions:
-                if self.ROLE_KEYWORDS.search(pos.get('name', '')):
+                if self.role_family(pos.get('name', '')):
                     job_url = pos.get('url_active_page')
                     job['title'] = pos.get('name')
                     job['href'] = pos.get('job_url')
                     job['resolved_via'] = 'js'
-                    yield response.follow(
-                        job_url, 
-                        callback=self.parse_job_page, 
-                        meta={'job': dict(job)} # Pass the JSON data we already have
-                    )
+                    # Carries the JSON data we already have to the position page
+                    yield job_page_candidate(job, response.urljoin(job_url))
         except json.JSONDecodeError:
             self.logger.error("Failed to parse JSON from script")
     
-    def js_var_extract(self, response, var_name):
-        xpath_pattern = rf'//script[contains(text(), "{var_name}")]/text()'
-        script_text = response.xpath(xpath_pattern).get()
-        if script_text:
-            regex_pattern = rf'{var_name}\s*=\s*(\[.*?\]|\{{.*?\}});'
-            match = re.search(regex_pattern, script_text, re.DOTALL)
-
-            if match:
-                json_string = match.group(1)
-                return json_string
-        return None
+    def js_var_extract(self, response, var_name, markers=None):
+        """
+        The JSON assigned to `var_name` in the page's scripts, sliced out of the body
+        (bracket-balanced, see jobscraper.sniff) - no DOM needed.
+        """
+        markers = markers or Sniff(response.body, response.encoding)
+        return markers.js_var(var_name)
 
-    def next_data_extract(self, response, job):
-        next_data = response.xpath('//script[@id="__NEXT_DATA__"]/text()').get()
-        if not next_data:
-            return
-        
-        try:
-            data = json.loads(next_data)
-        except json.JSONDecodeError:
-            return
-        
-        for obj in self._find_job_objects(data):
-            title = obj.get('title') or obj.get('name') or obj.get('position') or obj.get('role') or obj.get('jobTitle')
-            url = obj.get('url') or obj.get('href') or obj.get('link') or obj.get('path') or obj.get('slug') or obj.get('canonicalUrl') or obj.get('jobUrl')
-            if title and url and self.ROLE_KEYWORDS.search(title):
-                job_copy = dict(job)
-                job_copy['title'] = title
-                job_copy['href'] = response.urljoin(url)
-                job_copy['resolved_via'] = 'next_data'
-                yield response.follow(url, callback=self.parse_job_page, meta={'job': job_copy})
-
-    def _find_job_objects(self, obj, depth=0):
-        if depth > 10:
-            return
-        
-        if isinstance(obj, list):
-            if obj and isinstance(obj[0], dict):
-                first_item = obj[0]
-                has_title = any(k.lower() in TITLE_FIELDS for k in first_item.keys())
-                has_url = any(k.lower() in URL_FIELDS for k, v in first_item.items() if isinstance(v, str) and (v.startswith('http') or v.startswith('/')))
-                
-                if has_title and has_url:
-                    yield from obj
-            
-            for item in obj:
-                yield from self._find_job_objects(item, depth + 1)
-        elif isinstance(obj, dict):
-            for value in obj.values():
-                yield from self._find_job_objects(value, depth + 1)
-
-    def _find_description_in_json(self, obj, depth=0):
-        if depth > 10:
-            return None
-        
-        if isinstance(obj, dict):
-            for key, value in obj.items():
-                if key.lower() in DESCRIPTION_FIELDS and isinstance(value, str) and len(value) > 50:
-                    return value
-            
-            for value in obj.values():
-                result = self._find_description_in_json(value, depth + 1)
-                if result:
-                    return result
-        
-        elif isinstance(obj, list):
-            for item in obj:
-                result = self._find_description_in_json(item, depth + 1)
-                if result:
-                    return result
-        
-        return None
+    def next_data_extract(self, response, job, links):
+        """
+        Job page candidates for the (title, url) pairs found in __NEXT_DATA__ (see next_data_links).
+        """
+        for title, url in links or ():
+            if title and url and self.role_family(title):
+                href = response.urljoin(url)
+                yield job_page_candidate(job, href, title=title, href=href, resolved_via='next_data')
 
-    def html_extract(self, response, job):
-        # We deliberately over-collect and filter in code
-        for el in response.css("a[href], button, div, li, span, tr, td, h1, h2, h3, h4, h5, h6"):
-            text = self.parse_text(el.xpath("normalize-space(.)").get())
-            if not text:
-                continue
-            href = self.parse_href(response, el.xpath(
-            ".//@href | "                     # Link is the element itself
-            "./ancestor::a/@href | "          # Link is a parent
-            "./preceding-sibling::a[1]/@href | " # Link is a sibling (like Zenity!)
-            "../following-sibling::a[1]/@href"  # Link is a sibling after
-        ).get())
-            if not href:
-                continue
+    def html_extract(self, response, job, links=None):
+        # We deliberately over-collect and filter in code.
+        # Candidates are every `a[href], button, div, li, span, tr, td, h1-h6` whose text passes
+        # parse_text, with the link being the element itself, a parent, a sibling before it
+        # (like Zenity!) or a sibling after its parent - see scan_job_links.
+        # `links` are those (text, href) candidates when they were already scanned in the offload pool.
+        if links is None:
+            root = response.selector.root
+            if not hasattr(root, "attrib"):
+                return
+            links = scan_job_links(root, self.parse_text)
+        titles = {}
+        found = 0
+        for text, href in links:
+            href = self.parse_href(response, href)
+            if href:
+                # Nested containers resolve to the same link - follow it once, with the cleanest title
+                titles[href] = better_title(titles.get(href), text)
+                found += 1
+        if found > len(titles) and hasattr(self, "crawler"):
+            self.crawler.stats.inc_value("dedup/followups_saved", found - len(titles))
+            self.crawler.stats.inc_value("dedup/followups_saved/html_extract", found - len(titles))
+        for href, text in titles.items():
             job['title'] = text
             job['href'] = href
             job['resolved_via'] = 'html_extract'
-            yield response.follow(href, 
-                                  callback=self.parse_job_page, 
-                                  meta={"job": dict(job),})
+            yield job_page_candidate(job, href)
             # yield response.follow(href, 
             #                       callback=self.parse_job_page, 
             #                       meta={"job": dict(job),                
@@ -264,16 +666,13 @@ class JobDiscoverySpider(scrapy.Spider):
             #                         ],})
     
     def parse_text(self, text):
-            if not text:
-                return None
-            # Heuristic filters (cheap + deterministic)
-            if len(text) < 5 or len(text) > 80:
-                return None
-            if self.NOISE_KEYWORDS.search(text):
-                return None
-            if not self.ROLE_KEYWORDS.search(text):
-                return None
-            return text
+        return job_title(text, self.keywords)
+
+    def role_family(self, title):
+        """
+        Role family the title is a job of (None if it isn't one we look for).
+        """
+        return self.keywords.role_family(title)
     
     # Check if link is not just the same link
     def parse_href(self, response, href):
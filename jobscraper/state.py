@@ -0,0 +1,104 @@
+import hashlib
+import json
+import sqlite3
+import time
+
+
+def content_hash(*parts):
+    digest = hashlib.sha1()
+    for part in parts:
+        if isinstance(part, str):
+            part = part.encode("utf8")
+        digest.update(part or b"")
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class CrawlState:
+    """
+    What previous runs saw, kept in SQLite.
+
+    pages:    validators and content hash of every listing page we fetched.
+    postings: the last job extracted for each (company, canonical href), and the run that last saw it.
+    """
+
+    def __init__(self, path):
+        # Parallel workers share the file: autocommit + WAL keeps every write lock short
+        self.conn = sqlite3.connect(path, timeout=60, isolation_level=None)
+        self.conn.executescript(
+            """
+            PRAGMA journal_mode = WAL;
+            PRAGMA synchronous = NORMAL;
+            CREATE TABLE IF NOT EXISTS pages (
+                key TEXT PRIMARY KEY,
+                company TEXT,
+                etag TEXT,
+                last_modified TEXT,
+                content_hash TEXT,
+                fetched_at REAL
+            );
+            CREATE TABLE IF NOT EXISTS postings (
+                company TEXT,
+                key TEXT,
+                title TEXT,
+                content_hash TEXT,
+                item TEXT,
+                last_seen_run INTEGER,
+                removed INTEGER DEFAULT 0,
+                PRIMARY KEY (company, key)
+            );
+            """
+        )
+        self.run = int(time.time())
+
+    def page(self, key):
+        return self.conn.execute(
+            "SELECT etag, last_modified, content_hash FROM pages WHERE key = ?", (key,)
+        ).fetchone()
+
+    def save_page(self, key, company, etag, last_modified, content_hash):
+        self._write(
+            "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?)",
+            (key, company, etag, last_modified, content_hash, time.time()),
+        )
+
+    def posting(self, company, key):
+        """
+        (title, content_hash, removed) of the posting, or None if we never saw it.
+        """
+        return self.conn.execute(
+            "SELECT title, content_hash, removed FROM postings WHERE company = ? AND key = ?", (company, key)
+        ).fetchone()
+
+    def save_posting(self, company, key, title, content_hash, item):
+        self._write(
+            "INSERT OR REPLACE INTO postings VALUES (?, ?, ?, ?, ?, ?, 0)",
+            (company, key, title, content_hash, json.dumps(item), self.run),
+        )
+
+    def mark_seen(self, company, key=None):
+        """
+        Mark one posting (or all postings of a company) as still on its board.
+        """
+        if key is None:
+            self._write("UPDATE postings SET last_seen_run = ? WHERE company = ? AND removed = 0", (self.run, company))
+        else:
+            self._write("UPDATE postings SET last_seen_run = ? WHERE company = ? AND key = ?", (self.run, company, key))
+
+    def pop_removed(self, company):
+        """
+        Postings of `company` that this run did not see, flagged as removed.
+        """
+        rows = self.conn.execute(
+            "SELECT key, item FROM postings WHERE company = ? AND removed = 0 AND last_seen_run != ?",
+            (company, self.run),
+        ).fetchall()
+        for key, _ in rows:
+            self._write("UPDATE postings SET removed = 1 WHERE company = ? AND key = ?", (company, key))
+        return [json.loads(item) for _, item in rows]
+
+    def _write(self, sql, params):
+        self.conn.execute(sql, params)
+
+    def close(self):
+        self.conn.close()
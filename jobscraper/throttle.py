@@ -0,0 +1,100 @@
+import time
+from email.utils import parsedate_to_datetime
+
+
+class HostLimit:
+    """
+    How hard we may hit one host: how many requests at once (concurrency) and how
+    long to wait between them (delay), adapted to how the host answers.
+
+    - A full window of fast responses (one per allowed concurrent request) first
+      halves the delay down to min_delay, then allows one more concurrent request.
+    - Slow responses (average latency over twice target_latency) and errors back off a step.
+    - 429/503 halve the concurrency and double the delay; a Retry-After holds every
+      request to the host until it has passed.
+    """
+
+    def __init__(self, min_concurrency=1, max_concurrency=4, start_concurrency=1,
+                 min_delay=0.25, max_delay=60.0, start_delay=1.0, target_latency=2.0):
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max(max_concurrency, min_concurrency)
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.target_latency = target_latency
+        self.concurrency = min(max(start_concurrency, min_concurrency), self.max_concurrency)
+        self.delay = min(max(start_delay, min_delay), max_delay)
+        # Moving average of the download latency
+        self.latency = None
+        self.successes = 0
+        self.blocked_until = 0.0
+
+    def record_success(self, latency, now=None):
+        now = time.monotonic() if now is None else now
+        self.latency = latency if self.latency is None else 0.7 * self.latency + 0.3 * latency
+        if now < self.blocked_until:
+            return
+        if self.latency > 2 * self.target_latency:
+            self.back_off()
+            return
+        self.successes += 1
+        if self.latency <= self.target_latency and self.successes >= self.concurrency:
+            self.successes = 0
+            if self.delay > self.min_delay:
+                self.delay = max(self.min_delay, self.delay / 2)
+            elif self.concurrency < self.max_concurrency:
+                self.concurrency += 1
+
+    def record_throttled(self, retry_after=None, now=None):
+        now = time.monotonic() if now is None else now
+        self.concurrency = max(self.min_concurrency, self.concurrency // 2)
+        self.delay = min(self.max_delay, max(self.delay * 2, self.min_delay, 1.0))
+        self.successes = 0
+        if retry_after:
+            self.blocked_until = max(self.blocked_until, now + retry_after)
+
+    def back_off(self):
+        self.concurrency = max(self.min_concurrency, self.concurrency - 1)
+        self.delay = min(self.max_delay, max(self.delay * 1.5, self.min_delay))
+        self.successes = 0
+
+    def current_delay(self, now=None):
+        now = time.monotonic() if now is None else now
+        if now < self.blocked_until:
+            # Waiting out a Retry-After
+            return max(self.delay, self.blocked_until - now)
+        return self.delay
+
+
+def parse_retry_after(value, now=None):
+    """
+    Seconds to wait from a Retry-After header (delta-seconds or an HTTP date), None if it can't be parsed.
+    """
+    if not value:
+        return None
+    if isinstance(value, bytes):
+        value = value.decode("latin1")
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        date = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if date is None:
+        return None
+    now = time.time() if now is None else now
+    return max(0.0, date.timestamp() - now)
+
+
+def host_settings(host, overrides, default=None):
+    """
+    Overrides for `host` from a {domain: {...}} mapping - the most specific domain that
+    `host` is or is a subdomain of ("jobs.comeet.com" uses "comeet.com"). `default`
+    (or {}) if there is none.
+    """
+    parts = (host or "").lower().split(".")
+    for i in range(len(parts)):
+        domain = ".".join(parts[i:])
+        if domain in overrides:
+            return overrides[domain]
+    return {} if default is None else default
@@ -1,6 +1,186 @@
-def main():
-    print("Hello from jobscraper!")
+"""
+Run the job_discovery crawl over several processes.
+
+    python main.py -i jobs.json -o jobs_found.jsonl -w 4
+    python main.py -i jobs.json -o jobs_found.jsonl --cache      # keep the pages for --replay
+    python main.py -i jobs.json -o jobs_replayed.jsonl --replay   # offline, from the HTTP cache
+
+Companies are split into shards by registered domain (so per-domain politeness
+still holds), each shard is crawled by its own Scrapy process, and the item
+streams are merged into one deduplicated output with a combined stats summary.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+from datetime import datetime
+
+
+def run_worker(index, count, urls_file, work_dir, spider_args, settings_overrides):
+    # Imported here: every worker is a fresh (spawned) process with its own reactor
+    from scrapy.crawler import CrawlerProcess
+    from scrapy.utils.project import get_project_settings
+
+    settings = get_project_settings()
+    settings.setdict(settings_overrides, priority="cmdline")
+    settings.set("FEEDS", {
+        os.path.join(work_dir, f"items-{index}.jsonl"): {"format": "jsonlines", "encoding": "utf8"},
+    }, priority="cmdline")
+    settings.set("LOG_FILE", os.path.join(work_dir, f"worker-{index}.log"), priority="cmdline")
+    if settings.getint("METRICS_PORT"):
+        # One metrics endpoint per worker: METRICS_PORT, METRICS_PORT + 1, ...
+        settings.set("METRICS_PORT", settings.getint("METRICS_PORT") + index, priority="cmdline")
+
+    process = CrawlerProcess(settings)
+    crawler = process.create_crawler("job_discovery")
+    process.crawl(crawler, urls_file=urls_file, shard=f"{index}/{count}", **spider_args)
+    process.start()
+
+    with open(os.path.join(work_dir, f"stats-{index}.json"), "w", encoding="utf8") as f:
+        json.dump(crawler.stats.get_stats(), f, default=str)
+
+
+def item_key(item):
+    from jobscraper.dedup import canonical_href
+
+    href = item.get("href")
+    return (item.get("company"), canonical_href(href) if href else item.get("title"), item.get("change"))
+
+
+def merge_items(work_dir, count, output):
+    """
+    Write every worker's items to `output` once. Returns (written, duplicates).
+    """
+    seen = set()
+    written = duplicates = 0
+    as_array = output.endswith(".json")
+    with open(output, "w", encoding="utf8") as out:
+        if as_array:
+            out.write("[\n")
+        for index in range(count):
+            path = os.path.join(work_dir, f"items-{index}.jsonl")
+            if not os.path.exists(path):
+                continue
+            with open(path, "r", encoding="utf8") as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    item = json.loads(line)
+                    key = item_key(item)
+                    if key in seen:
+                        duplicates += 1
+                        continue
+                    seen.add(key)
+                    if as_array and written:
+                        out.write(",\n")
+                    out.write(json.dumps(item, ensure_ascii=False))
+                    if not as_array:
+                        out.write("\n")
+                    written += 1
+        if as_array:
+            out.write("\n]\n")
+    return written, duplicates
+
+
+def is_max_stat(key):
+    # Can't be added up across workers: timing/*/p95_ms, loop_lag/max_ms, queue/*/max, ...
+    return key.endswith("/max") or (key.endswith("_ms") and not key.endswith("total_ms"))
+
+
+def merge_stats(work_dir, count):
+    """
+    Sum numeric stats over workers; keep the earliest start and latest finish time,
+    the highest maximum / percentile / mean, and concatenate lists.
+    """
+    merged = {}
+    for index in range(count):
+        path = os.path.join(work_dir, f"stats-{index}.json")
+        if not os.path.exists(path):
+            continue
+        with open(path, "r", encoding="utf8") as f:
+            stats = json.load(f)
+        for key, value in stats.items():
+            if key == "start_time":
+                merged[key] = min(merged.get(key, value), value)
+            elif key == "finish_time":
+                merged[key] = max(merged.get(key, value), value)
+            elif isinstance(value, (int, float)) and not isinstance(value, bool) and not is_max_stat(key) and not key.endswith("_time"):
+                merged[key] = merged.get(key, 0) + value
+            elif is_max_stat(key) and isinstance(value, (int, float)):
+                merged[key] = max(merged.get(key, value), value)
+            elif isinstance(value, list):
+                merged[key] = merged.get(key, []) + value
+            else:
+                merged.setdefault(key, value)
+    if "start_time" in merged and "finish_time" in merged:
+        start = datetime.fromisoformat(str(merged["start_time"]))
+        finish = datetime.fromisoformat(str(merged["finish_time"]))
+        merged["elapsed_time_seconds"] = (finish - start).total_seconds()
+    return merged
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Crawl careers pages with several worker processes.")
+    parser.add_argument("-i", "--input", default="jobs.json", help="companies file (JSON array, JSON Lines or CSV)")
+    parser.add_argument("-o", "--output", default="jobs_found.jsonl", help="merged output (.json for an array, JSON Lines otherwise)")
+    parser.add_argument("-w", "--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("-a", dest="spider_args", action="append", default=[], metavar="NAME=VALUE",
+                        help="extra spider argument (company=..., domain=...)")
+    parser.add_argument("-s", dest="settings", action="append", default=[], metavar="NAME=VALUE",
+                        help="Scrapy setting override for every worker")
+    parser.add_argument("--work-dir", help="keep per-worker items, stats and logs here")
+    parser.add_argument("--cache", action="store_true", help="keep the downloaded pages in the HTTP cache")
+    parser.add_argument("--replay", action="store_true", help="offline: re-run the extraction over the HTTP cache")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    os.environ.setdefault("SCRAPY_SETTINGS_MODULE", "jobscraper.settings")
+    spider_args = dict(a.split("=", 1) for a in args.spider_args)
+    settings_overrides = dict(s.split("=", 1) for s in args.settings)
+    if args.cache:
+        settings_overrides["HTTPCACHE_ENABLED"] = "True"
+    if args.replay:
+        settings_overrides["HTTPCACHE_REPLAY"] = "True"
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix="jobscraper-")
+    os.makedirs(work_dir, exist_ok=True)
+
+    context = multiprocessing.get_context("spawn")
+    workers = [
+        context.Process(
+            target=run_worker,
+            args=(index, args.workers, os.path.abspath(args.input), work_dir, spider_args, settings_overrides),
+            name=f"jobscraper-worker-{index}",
+        )
+        for index in range(args.workers)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    failed = [w.name for w in workers if w.exitcode != 0]
+
+    written, duplicates = merge_items(work_dir, args.workers, args.output)
+    stats = merge_stats(work_dir, args.workers)
+    stats["runner/workers"] = args.workers
+    stats["runner/workers_failed"] = len(failed)
+    stats["runner/items_written"] = written
+    stats["runner/items_duplicate"] = duplicates
+    with open(f"{args.output}.stats.json", "w", encoding="utf8") as f:
+        json.dump(stats, f, indent=2, sort_keys=True, default=str)
+
+    for key in sorted(stats):
+        print(f"{key}: {stats[key]}")
+    if failed:
+        print(f"Failed workers: {', '.join(failed)} - see {work_dir}", file=sys.stderr)
+    elif not args.work_dir:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return 1 if failed else 0
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -0,0 +1,76 @@
+import pytest
+from scrapy import Request
+from scrapy.exceptions import DontCloseSpider
+from scrapy.http import HtmlResponse
+from scrapy.utils.test import get_crawler
+
+from jobscraper.items import JobRecord, job_page_candidate
+from jobscraper.middlewares import IncrementalCrawlMiddleware
+from jobscraper.spiders.job_discovery_spider import JobDiscoverySpider
+
+BOARD = "https://acme.example.com/careers"
+POSTINGS = [f"https://acme.example.com/jobs/devops-engineer-{n}" for n in range(3)]
+
+
+class Engine:
+    def __init__(self):
+        self.crawled = []
+
+    def crawl(self, request):
+        self.crawled.append(request)
+
+
+@pytest.fixture
+def crawl(tmp_path):
+    """
+    (spider, middleware) of a second run: the first one saw Acme's three postings.
+    """
+    settings = {
+        "CRAWL_STATE_FILE": str(tmp_path / "state.sqlite"),
+        "RENDER_MEMORY_FILE": None,
+        "JSON_PATHS_FILE": None,
+        "API_ENDPOINTS_FILE": None,
+        "HOST_HEALTH_FILE": None,
+        "SITEMAP_MEMORY_FILE": None,
+    }
+    crawler = get_crawler(JobDiscoverySpider, settings)
+    crawler.spider = spider = JobDiscoverySpider.from_crawler(crawler)
+    crawler.engine = Engine()
+    middleware = IncrementalCrawlMiddleware.from_crawler(crawler)
+    state = middleware.state
+    for url in POSTINGS:
+        state.save_posting("Acme", url, "DevOps Engineer", "hash", {"company": "Acme", "href": url})
+    state.save_page(BOARD, "Acme", None, None, "first run's listing")
+    state.conn.execute("UPDATE postings SET last_seen_run = ?", (state.run - 86400,))
+    return spider, middleware
+
+
+def listing(spider):
+    job = JobRecord(company="Acme", source_url=BOARD)
+    request = Request(BOARD, callback=spider.parse, meta={"job": job})
+    return HtmlResponse(BOARD, body=b"<html><div id='app'></div></html>", request=request), job
+
+
+def test_failed_fallback_reports_nothing_removed(crawl):
+    spider, middleware = crawl
+    response, job = listing(spider)
+    # A JS shell: parse finds nothing and hands the page to a render, which then fails
+    out = list(middleware.process_spider_output(response, [spider.render_request(BOARD, job)], spider))
+    assert len(out) == 1
+
+    middleware.spider_idle(spider)
+    assert middleware.crawler.engine.crawled == []
+    assert all(middleware.state.posting("Acme", url)[2] == 0 for url in POSTINGS)
+
+
+def test_board_read_reports_the_missing_postings(crawl):
+    spider, middleware = crawl
+    response, job = listing(spider)
+    candidate = job_page_candidate(job, POSTINGS[0], title="DevOps Engineer", href=POSTINGS[0], resolved_via="html_extract")
+    out = list(middleware.process_spider_output(response, [candidate], spider))
+    assert out == []  # already known, same title
+
+    with pytest.raises(DontCloseSpider):
+        middleware.spider_idle(spider)
+    removed = middleware.crawler.engine.crawled[0].meta["removed"]
+    assert sorted(item["href"] for item in removed) == POSTINGS[1:]